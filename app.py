@@ -2,13 +2,22 @@
 汇享易报告自助生成智能体
 主应用程序 - Gradio界面
 """
-import gradio as gr
+import functools
 import os
+import re
 import shutil
+import time
+import uuid
 from datetime import datetime
-from excel_parser import ExcelParser
-from word_generator import WordGenerator
-from docx import Document
+import data_quality
+import metrics
+import profiling
+import worker_pool
+from preview_layout import layout_for
+from bundle import ReportBundle, bundle_path, summary_files
+from date_calculator import parse_as_of_date
+from report_pipeline import build_report
+from result_cache import ResultCache
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # 默认Excel密码
@@ -16,8 +25,25 @@ DEFAULT_PASSWORD = "110110"
 UPLOAD_DIR = os.path.join(BASE_DIR, "upload")
 TEMPLATE_PATH = os.path.join(BASE_DIR, "template.docx")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+# 界面生成的报告按会话分目录保存，不同用户使用相同文件名时互不覆盖
+SESSION_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "sessions")
+# 会话目录保留的时长（小时）和个数，启动时和新建会话目录时删除超出的旧目录
+SESSION_MAX_AGE_HOURS = float(os.environ.get("REPORTGENE_SESSION_MAX_AGE_HOURS", "24"))
+SESSION_MAX_DIRS = int(os.environ.get("REPORTGENE_SESSION_MAX_DIRS", "200"))
 VERSION_FILE = os.path.join(BASE_DIR, "version.txt")
 
+# 报告结果缓存（与预生成服务共享），设为None时每次都重新解析生成
+RESULT_CACHE = ResultCache()
+
+# 生成报告的工作进程数（见 worker_pool），同时处理的生成请求数不少于工作进程数
+WORKERS = worker_pool.configured_workers()
+# 同时处理的生成请求数（输出按会话隔离、原子写入，可以并发）
+UI_CONCURRENCY = int(os.environ.get("REPORTGENE_UI_CONCURRENCY", str(max(4, WORKERS))))
+
+# 性能指标服务（Prometheus格式），端口设为0时不启动
+METRICS_HOST = os.environ.get("REPORTGENE_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("REPORTGENE_METRICS_PORT", "9861"))
+
 
 def get_version():
     """读取版本号"""
@@ -80,158 +106,165 @@ def upload_file(file):
         return None, f"❌ 文件上传失败: {str(e)}"
 
 
-def preview_word_document(file_path):
+# 文档预览每页的段落数；预览按页渲染，首屏耗时与文档长度无关
+PREVIEW_PAGE_SIZE = int(os.environ.get("REPORTGENE_PREVIEW_PAGE_SIZE", "40"))
+# 缓存的已读取文档数（按路径、修改时间和大小区分，翻页时不再重新读取）
+PREVIEW_CACHE_SIZE = 32
+
+_PREVIEW_ERROR = """
+        <div style="color: #e74c3c; padding: 20px; border: 1px solid #e74c3c; border-radius: 8px; background-color: #fdf2f2;">
+            <h3>{title}</h3>{detail}
+        </div>
+        """
+
+_PREVIEW_HEADER = """
+    <div style="font-family: 'Microsoft YaHei', 'SimSun', serif; line-height: 1.6; color: #333;">
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 15px; border-radius: 8px 8px 0 0; margin-bottom: 0;">
+            <h2 style="margin: 0; font-size: 18px;">📄 文档预览（标注）{page_label}</h2>
+        </div>
+        <div style="border: 1px solid #ddd; border-top: none; border-radius: 0 0 8px 8px; padding: 20px; background-color: #fafafa; max-height: 600px; overflow-y: auto;">
+    """
+
+_PREVIEW_LEGEND = '''
+    <div style="margin-top: 20px; padding: 15px; background-color: #e8f5e8; border-radius: 5px; border-left: 4px solid #28a745;">
+        <h4 style="margin: 0 0 10px 0; color: #155724;">📊 动态渲染内容说明</h4>
+        <p style="margin: 5px 0; color: #155724;">
+            <span style="background-color: #ffc107; color: #856404; padding: 2px 6px; border-radius: 3px; font-size: 12px;">黄色高亮</span> 
+            表示从Excel中自动提取的动态数据
+        </p>
+        <p style="margin: 5px 0; color: #155724;">
+            • 统计数据：<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">8人</span>、<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">6人</span>
+        </p>
+        <p style="margin: 5px 0; color: #155724;">
+            • 人员信息：<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">贾汪XX</span>、<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">市直XX</span>
+        </p>
+        <p style="margin: 5px 0; color: #155724;">
+            • 趋势变化：<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">上升2人</span>、<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">下降</span>
+        </p>
+        <p style="margin: 5px 0; color: #155724;">
+            • 地区统计：<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">贾汪1人</span>、<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">铜山1人</span>
+        </p>
+    </div>
+    '''
+
+_PREVIEW_FOOTER = """
+        </div>
+    </div>
+    """
+
+
+class PreviewPages:
+    """按页渲染的文档预览：段落文本读取一次，每页在首次访问时才标注并缓存"""
+    
+    def __init__(self, lines, layout, page_size=PREVIEW_PAGE_SIZE):
+        """
+        Args:
+            lines: 文档中的非空段落 [(段落下标, 文本), ...]
+            layout: 预览版式（preview_layout.PreviewLayout），按段落下标查找样式
+            page_size: 每页段落数
+        """
+        self.lines = lines
+        self.layout = layout
+        self.page_size = max(1, page_size)
+        self._pages = {}
+    
+    def __len__(self):
+        return max(1, -(-len(self.lines) // self.page_size))
+    
+    def page(self, index):
+        """
+        渲染一页预览
+        
+        Args:
+            index: 页码（从0开始，超出范围时取最近的一页）
+        
+        Returns:
+            str: 该页的HTML
+        """
+        index = min(max(index, 0), len(self) - 1)
+        if index not in self._pages:
+            chunk = self.lines[index * self.page_size:(index + 1) * self.page_size]
+            page_label = f"　第 {index + 1} / {len(self)} 页" if len(self) > 1 else ""
+            self._pages[index] = "".join([
+                _PREVIEW_HEADER.format(page_label=page_label),
+                *(self.layout.render(para_index, text) for para_index, text in chunk),
+                _PREVIEW_LEGEND if index == len(self) - 1 else "",
+                _PREVIEW_FOOTER,
+            ])
+        return self._pages[index]
+
+
+@functools.lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def _load_preview_pages(file_path, mtime_ns, size, template_path):
+    """读取文档段落（按路径、修改时间和大小缓存，文件被替换后自动重新读取）"""
+    from docx import Document  # 延迟导入，避免模块加载时引入python-docx
+    
+    # 只打开一次文件，期间文件被替换也不影响本次读取
+    with open(file_path, 'rb') as f:
+        doc = Document(f)
+    lines = [(index, p.text.strip()) for index, p in enumerate(doc.paragraphs) if p.text.strip()]
+    # 版式按模板编译一次，预览时每个段落只需按下标查表
+    return PreviewPages(lines, layout_for(doc, template_path))
+
+
+def load_preview_pages(file_path):
+    """
+    读取Word文档用于分页预览
+    
+    Args:
+        file_path: Word文档路径
+    
+    Returns:
+        PreviewPages: 分页预览对象
+    """
+    stat = os.stat(file_path)
+    return _load_preview_pages(file_path, stat.st_mtime_ns, stat.st_size, TEMPLATE_PATH)
+
+
+@profiling.profiled('preview')
+def preview_word_document(file_path, page=0):
     """
     预览Word文档内容（HTML格式，字符级动态内容标注）
     
     Args:
         file_path: Word文档路径
+        page: 页码（从0开始），只渲染该页
     
     Returns:
         str: HTML格式的文档预览
     """
     try:
         if not file_path or not os.path.exists(file_path):
-            return """
-            <div style="color: #e74c3c; padding: 20px; border: 1px solid #e74c3c; border-radius: 8px; background-color: #fdf2f2;">
-                <h3>❌ 文档不存在，无法预览</h3>
-            </div>
-            """
-        
-        # 读取Word文档
-        doc = Document(file_path)
-        
-        # 构建HTML内容
-        html_content = """
-        <div style="font-family: 'Microsoft YaHei', 'SimSun', serif; line-height: 1.6; color: #333;">
-            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 15px; border-radius: 8px 8px 0 0; margin-bottom: 0;">
-                <h2 style="margin: 0; font-size: 18px;">📄 文档预览（标注）</h2>
-            </div>
-            <div style="border: 1px solid #ddd; border-top: none; border-radius: 0 0 8px 8px; padding: 20px; background-color: #fafafa; max-height: 600px; overflow-y: auto;">
-        """
-        
-        # 提取文本内容
-        content_lines = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                content_lines.append(paragraph.text.strip())
-        
-        # 显示全部内容，进行字符级标注
-        for i, line in enumerate(content_lines):
-            # 对每行进行字符级动态内容标注
-            annotated_line = _annotate_dynamic_content(line)
-            
-            # 根据内容类型添加不同的样式
-            if line.startswith('（一）') or line.startswith('（二）') or line.startswith('（三）'):
-                html_content += f'<h4 style="color: #2c3e50; margin: 15px 0 8px 0; font-size: 16px;">{annotated_line}</h4>'
-            elif line.startswith('1、') or line.startswith('2、') or line.startswith('3、'):
-                html_content += f'<p style="margin: 8px 0; padding-left: 20px; color: #34495e;">{annotated_line}</p>'
-            elif line.startswith('本周，我市在京信访登记') or line.startswith('从涉事地看') or line.startswith('从涉稳群体类型看') or line.startswith('从进京交通工具看'):
-                html_content += f'<p style="margin: 10px 0; font-weight: 500; color: #2980b9;">{annotated_line}</p>'
-            elif line.startswith('"情指行"机制复盘报告'):
-                html_content += f'<h3 style="color: #8e44ad; text-align: center; margin: 10px 0;">{annotated_line}</h3>'
-            elif line.startswith('第') and line.endswith('期'):
-                html_content += f'<h4 style="color: #8e44ad; text-align: center; margin: 5px 0;">{annotated_line}</h4>'
-            elif line.startswith('阳光信访登记复盘工作周报'):
-                html_content += f'<h3 style="color: #8e44ad; text-align: center; margin: 10px 0;">{annotated_line}</h3>'
-            else:
-                html_content += f'<p style="margin: 8px 0; color: #2c3e50;">{annotated_line}</p>'
+            return _PREVIEW_ERROR.format(title="❌ 文档不存在，无法预览", detail="")
         
-        # 添加动态内容说明
-        html_content += '''
-        <div style="margin-top: 20px; padding: 15px; background-color: #e8f5e8; border-radius: 5px; border-left: 4px solid #28a745;">
-            <h4 style="margin: 0 0 10px 0; color: #155724;">📊 动态渲染内容说明</h4>
-            <p style="margin: 5px 0; color: #155724;">
-                <span style="background-color: #ffc107; color: #856404; padding: 2px 6px; border-radius: 3px; font-size: 12px;">黄色高亮</span> 
-                表示从Excel中自动提取的动态数据
-            </p>
-            <p style="margin: 5px 0; color: #155724;">
-                • 统计数据：<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">8人</span>、<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">6人</span>
-            </p>
-            <p style="margin: 5px 0; color: #155724;">
-                • 人员信息：<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">贾汪XX</span>、<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">市直XX</span>
-            </p>
-            <p style="margin: 5px 0; color: #155724;">
-                • 趋势变化：<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">上升2人</span>、<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">下降</span>
-            </p>
-            <p style="margin: 5px 0; color: #155724;">
-                • 地区统计：<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">贾汪1人</span>、<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px;">铜山1人</span>
-            </p>
-        </div>
-        '''
-        
-        html_content += """
-            </div>
-        </div>
-        """
-        
-        return html_content
+        with metrics.stage('preview'):
+            return load_preview_pages(file_path).page(page)
         
     except Exception as e:
-        return f"""
-        <div style="color: #e74c3c; padding: 20px; border: 1px solid #e74c3c; border-radius: 8px; background-color: #fdf2f2;">
-            <h3>❌ 预览失败</h3>
-            <p>错误信息: {str(e)}</p>
-        </div>
-        """
+        return _PREVIEW_ERROR.format(title="❌ 预览失败", detail=f"\n            <p>错误信息: {str(e)}</p>")
+
 
-def _annotate_dynamic_content(text):
+def preview_page(state, step):
     """
-    对文本进行字符级动态内容标注
+    预览翻页
     
     Args:
-        text: 原始文本
+        state: 预览状态 {'path': 文档路径, 'page': 当前页码}，未生成报告时为None
+        step: 翻页方向（-1上一页，1下一页）
     
     Returns:
-        str: 标注后的HTML文本
+        tuple: (该页HTML, 新的预览状态)
     """
-    import re
-    
-    # 定义动态内容模式
-    patterns = [
-        # 统计数据模式
-        (r'(\d+人)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        
-        # 人员信息模式（责任单位+姓名）
-        (r'([贾汪市直铜山云龙经开区丰县沛县邳州泉山新沂睢宁鼓楼])([A-Za-z\u4e00-\u9fa5]{1,3}XX?)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1\2</span>'),
-        
-        # 趋势变化模式
-        (r'(上升\d+人|下降\d+人|持平)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        
-        # 地区统计模式
-        (r'([贾汪市直铜山云龙经开区丰县沛县邳州泉山新沂睢宁鼓楼])(\d+人)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1\2</span>'),
-        
-        # 诉求类型模式
-        (r'(征地拆迁|讨薪|拖欠工程款|失地保险|案件办理|截访)(\d+人)?', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1\2</span>'),
-        
-        # 进京方式模式
-        (r'(公路|铁路|长期在京)(\d+人)?', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1\2</span>'),
-        
-        # 环比数据模式
-        (r'(环比（\d+人）)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        
-        # 百分比模式
-        (r'(\d+\.\d+%)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        
-        # 具体数字模式（在特定上下文中）
-        (r'(本周登记\d+人中)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        (r'(在库\d+人中)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        (r'(\d+人触发平台)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        (r'(\d+人未触发)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        
-        # 车辆数据模式
-        (r'(\d+车\d+人)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-        
-        # 具体人员姓名模式（脱敏后）
-        (r'([A-Za-z\u4e00-\u9fa5]{1,2}XX)', r'<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; border-radius: 2px; font-weight: bold;">\1</span>'),
-    ]
-    
-    # 应用所有模式进行标注
-    annotated_text = text
-    for pattern, replacement in patterns:
-        annotated_text = re.sub(pattern, replacement, annotated_text)
-    
-    return annotated_text
+    if not state or not state.get('path'):
+        return "", state
+    try:
+        pages = len(load_preview_pages(state['path']))
+    except OSError:
+        return preview_word_document(state['path']), state
+    page = min(max(state['page'] + step, 0), pages - 1)
+    state = dict(state, page=page)
+    return preview_word_document(state['path'], page), state
+
 
 def _is_dynamic_content(line):
     """
@@ -286,7 +319,9 @@ def _is_dynamic_content(line):
     return has_numbers or has_dynamic_indicators
 
 
-def generate_report(upload_path, output_filename, password):
+@metrics.tracked_request('ui', outcome=lambda result: result[0] is not None)
+def generate_report(upload_path, output_filename, password, as_of=None, quality_report=False,
+                    export_stats=False, profile=False, session_id=None):
     """
     生成报告的主函数
     
@@ -294,15 +329,93 @@ def generate_report(upload_path, output_filename, password):
         upload_path: 上传后的Excel文件路径
         output_filename: 输出文件名
         password: Excel密码
+        as_of: 统计基准日期（"YYYY-MM-DD"或datetime），为空则使用当前日期
+        quality_report: 是否同时生成数据质量报告（JSON）供下载
+        export_stats: 是否同时导出统计数据（JSON和CSV）供下载
+        profile: 是否对本次请求进行性能分析
+        session_id: 会话ID，报告保存到该会话的输出目录；为空时本次请求使用独立目录
     
     Returns:
-        tuple: (输出文件路径, 状态消息, 预览内容)
+        tuple: (输出文件路径列表（Word报告在前），状态消息, 预览内容)，失败时文件列表为None
+    """
+    with profiling.request_profiling(profile) as profiles:
+        output_files, message, preview = _generate_report(
+            upload_path, output_filename, password, as_of, quality_report, export_stats, session_id
+        )
+    
+    if profiles:
+        message += "\n🔬 性能分析结果已保存：\n" + "\n".join(
+            f"  • {os.path.basename(path)}" for path in profiles
+        )
+    return output_files, message, preview
+
+
+def session_output_dir(session_id=None):
     """
+    会话的输出目录
+    
+    Args:
+        session_id: 会话ID（只保留字母、数字、下划线和连字符），为空时生成一个随机ID
+    
+    Returns:
+        str: SESSION_OUTPUT_DIR 下的子目录路径
+    """
+    name = re.sub(r'[^A-Za-z0-9_-]', '', session_id or '') or uuid.uuid4().hex[:12]
+    path = os.path.join(SESSION_OUTPUT_DIR, name)
+    if not os.path.isdir(path):
+        prune_session_dirs(keep=name)
+    return path
+
+
+def prune_session_dirs(keep=None, max_age_hours=None, max_dirs=None):
+    """
+    删除旧的会话输出目录：超过保留时长的目录，以及超出保留个数的最早的目录（按最近修改时间）
+    
+    Args:
+        keep: 不删除的会话目录名（当前会话）
+        max_age_hours: 保留时长（小时），默认为 SESSION_MAX_AGE_HOURS，0表示不按时长删除
+        max_dirs: 保留个数，默认为 SESSION_MAX_DIRS，0表示不按个数删除
+    
+    Returns:
+        int: 删除的目录数
+    """
+    max_age_hours = SESSION_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    max_dirs = SESSION_MAX_DIRS if max_dirs is None else max_dirs
+    if not os.path.isdir(SESSION_OUTPUT_DIR):
+        return 0
+    
+    entries = []
+    for name in os.listdir(SESSION_OUTPUT_DIR):
+        path = os.path.join(SESSION_OUTPUT_DIR, name)
+        if name != keep and os.path.isdir(path):
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:  # 其他进程已删除
+                pass
+    entries.sort(reverse=True)
+    
+    expired = entries[max_dirs:] if max_dirs > 0 else []
+    if max_age_hours > 0:
+        cutoff = time.time() - max_age_hours * 3600
+        expired += [entry for entry in entries[:len(entries) - len(expired)] if entry[0] < cutoff]
+    for _, path in expired:
+        shutil.rmtree(path, ignore_errors=True)
+    return len(expired)
+
+
+def _generate_report(upload_path, output_filename, password, as_of=None, quality_report=False,
+                     export_stats=False, session_id=None):
+    """生成报告（解析、渲染、预览），参数与返回值同generate_report"""
     try:
         # 验证输入
         if not upload_path or not os.path.exists(upload_path):
             return None, "❌ 请先上传Excel文件", ""
         
+        try:
+            as_of = parse_as_of_date(as_of)
+        except ValueError:
+            return None, f"❌ 统计基准日期格式不正确: {as_of}（应为YYYY-MM-DD）", ""
+        
         if not output_filename:
             # 如果未提供文件名，使用默认格式
             output_filename = f"报告_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
@@ -310,65 +423,73 @@ def generate_report(upload_path, output_filename, password):
         # 确保文件名以.docx结尾
         if not output_filename.endswith('.docx'):
             output_filename += '.docx'
+        output_filename = os.path.basename(output_filename)
         
         # 确保密码不为空
         if not password:
             password = DEFAULT_PASSWORD
         
-        # 步骤1: 解析Excel文件
+        # 解析Excel并生成Word文档
         status_msg = "📊 正在解析Excel数据..."
         print(status_msg)
         
-        parser = ExcelParser(upload_path, password=password)
-        data = parser.parse_all()
+        output_path = os.path.join(session_output_dir(session_id), output_filename)
+        summary = worker_pool.run(build_report, upload_path, TEMPLATE_PATH, output_path,
+                                  password=password, as_of=as_of, quality_report=quality_report,
+                                  export_stats=export_stats, cache=RESULT_CACHE)
+        data = summary['data']
         
         # 检查是否有错误
         if data.get('errors'):
             error_msg = "⚠️ 解析Excel时遇到以下问题：\n" + "\n".join(data['errors'])
             return None, error_msg, ""
         
-        # 显示统计结果
-        stats_msg = f"""✅ Excel解析成功！
-
-📅 统计时间范围：
-  • 本周: {parser.current_week_start.strftime('%Y-%m-%d')} 至 {parser.current_week_end.strftime('%Y-%m-%d')}
-  • 上周: {parser.last_week_start.strftime('%Y-%m-%d')} 至 {parser.last_week_end.strftime('%Y-%m-%d')}
-
-📈 数据统计：
-  • 阳光xf登记: 本周 {data['sunshine_current']} 人，上周 {data['sunshine_last']} 人，{data['sunshine_trend']}
-  • gab上访: 本周 {data['gab_current']} 人，上周 {data['gab_last']} 人，{data['gab_trend']}
-  • 本周总计: {data['total_current']} 人
-
-📝 正在生成Word文档..."""
-        print(stats_msg)
-        
-        # 步骤2: 生成Word文档
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        generator = WordGenerator(TEMPLATE_PATH)
-        
-        success = generator.generate(data, output_path)
-        
-        if success:
+        if summary['success']:
             # 生成预览内容
             preview_content = preview_word_document(output_path)
             
+            # 命中预生成的结果缓存时不再解析Excel；统计窗口内数据未变时沿用上次的报告
+            if summary.get('cached'):
+                cached_note = "（使用预生成的报告）"
+            elif summary.get('reused'):
+                cached_note = "（本周统计数据未变化，沿用上次生成的报告）"
+            else:
+                cached_note = ""
+            
+            source_lines = "\n".join(
+                f"  • {source['sheet']}: 本周 {data[source['prefix'] + '_current']} 人，"
+                f"上周 {data[source['prefix'] + '_last']} 人，{data[source['prefix'] + '_trend']}"
+                for source in data['sources']
+            )
             final_msg = f"""✅ 报告生成成功！
 
 📅 统计时间范围：
-  • 本周: {parser.current_week_start.strftime('%Y-%m-%d')} 至 {parser.current_week_end.strftime('%Y-%m-%d')}
-  • 上周: {parser.last_week_start.strftime('%Y-%m-%d')} 至 {parser.last_week_end.strftime('%Y-%m-%d')}
+  • 本周: {summary['current_week_start']} 至 {summary['current_week_end']}
+  • 上周: {summary['last_week_start']} 至 {summary['last_week_end']}
 
 📊 统计数据：
-  • 阳光xf登记: 本周 {data['sunshine_current']} 人，上周 {data['sunshine_last']} 人，{data['sunshine_trend']}
-  • gab上访: 本周 {data['gab_current']} 人，上周 {data['gab_last']} 人，{data['gab_trend']}
+{source_lines}
   • 本周总计: {data['total_current']} 人
+  • 重复来访: 本周登记人员中 {data['repeat_visitor_count']} 人此前登记过
 
-📄 文件已保存: {output_filename}
+📄 文件已保存: {output_filename}{cached_note}
 请查看下方预览，确认无误后点击下载。
 """
-            return output_path, final_msg, preview_content
+            quality_text = data_quality.format_summary(data.get('data_quality'))
+            if quality_text:
+                final_msg += "\n" + quality_text + "\n"
+            
+            output_files = summary_files(summary)
+            if len(output_files) > 1:
+                # 附带文件较多时另提供一个zip，一次下载全部文件
+                with ReportBundle(bundle_path(output_path)) as bundle:
+                    bundle.add_summary(summary)
+                output_files.append(bundle.path)
+            return output_files, final_msg, preview_content
         else:
-            return None, "❌ Word文档生成失败", ""
+            # 预检查未通过（如模板不存在、输出目录不可写）时显示具体原因
+            reasons = summary.get('errors') or ['Word文档生成失败']
+            return None, "❌ Word文档生成失败：\n" + "\n".join(reasons), ""
     
     except Exception as e:
         error_msg = f"❌ 生成报告时出错: {str(e)}"
@@ -379,6 +500,7 @@ def generate_report(upload_path, output_filename, password):
 # 创建Gradio界面
 def create_ui():
     """创建Gradio用户界面"""
+    import gradio as gr  # 延迟导入，仅在构建界面时加载Gradio
     
     version = get_version()
     
@@ -450,6 +572,27 @@ def create_ui():
                     placeholder="例如: 报告_20251014.docx"
                 )
                 
+                as_of_input = gr.Textbox(
+                    label="统计基准日期（可选）",
+                    value="",
+                    placeholder="YYYY-MM-DD，留空为今天；填写历史日期可补生成往期报告"
+                )
+                
+                quality_input = gr.Checkbox(
+                    label="同时生成数据质量报告（JSON）",
+                    value=False
+                )
+                
+                export_input = gr.Checkbox(
+                    label="同时导出统计数据（JSON/CSV）",
+                    value=False
+                )
+                
+                profile_input = gr.Checkbox(
+                    label="性能分析（保存本次请求的耗时与内存报告）",
+                    value=False
+                )
+                
                 generate_btn = gr.Button("🚀 4. 开始生成", variant="primary", size="lg")
             
             with gr.Column(scale=1):
@@ -469,8 +612,15 @@ def create_ui():
                     elem_id="preview"
                 )
                 
+                # 预览翻页（长文档按页渲染，翻到某页时才渲染该页）
+                with gr.Row():
+                    prev_page_btn = gr.Button("◀ 上一页", size="sm")
+                    next_page_btn = gr.Button("下一页 ▶", size="sm")
+                preview_state = gr.State(value=None)
+                
                 file_output = gr.File(
-                    label="📥 下载生成的报告"
+                    label="📥 下载生成的报告",
+                    file_count="multiple"
                 )
         
         # 使用说明
@@ -483,7 +633,7 @@ def create_ui():
                 2. **输入密码**：如果文件有密码保护，请输入密码（默认：110110）
                 3. **设置文件名**：输入生成的Word报告文件名（可选，默认自动命名）
                 4. **生成报告**：点击"开始生成"按钮
-                5. **预览文档**：生成成功后，在"文档预览"区域查看报告内容
+                5. **预览文档**：生成成功后，在"文档预览"区域查看报告内容（内容较长时分页显示，可点击"上一页"/"下一页"翻页）
                 6. **下载文档**：确认预览无误后，点击"下载生成的报告"下载Word文档
                 
                 ### Excel文件要求：
@@ -496,7 +646,8 @@ def create_ui():
                 
                 ### 注意事项：
                 
-                - 系统根据当前日期自动计算本周和上周的范围（周一到周日）
+                - 系统根据统计基准日期（默认为当前日期）自动计算本周和上周的范围（周一到周日）
+                - 填写历史基准日期即可补生成往期报告，批量回溯请使用命令行 `python cli.py backfill`
                 - 支持.xls和.xlsx格式的Excel文件
                 - 如遇到问题，请检查Excel文件格式是否正确
                 """
@@ -510,11 +661,33 @@ def create_ui():
             outputs=[uploaded_path, upload_status]
         )
         
-        # 生成报告
+        # 生成报告（按Gradio会话隔离输出目录）
+        def generate_for_session(upload_path, output_filename, password, as_of, quality_report,
+                                 export_stats, profile, request: gr.Request):
+            output_files, message, preview = generate_report(
+                upload_path, output_filename, password, as_of, quality_report, export_stats, profile,
+                session_id=getattr(request, 'session_hash', None)
+            )
+            state = {'path': output_files[0], 'page': 0} if output_files else None
+            return output_files, message, preview, state
+        
         generate_btn.click(
-            fn=generate_report,
-            inputs=[uploaded_path, output_name, password_input],
-            outputs=[file_output, status_output, preview_output]
+            fn=generate_for_session,
+            inputs=[uploaded_path, output_name, password_input, as_of_input, quality_input, export_input,
+                    profile_input],
+            outputs=[file_output, status_output, preview_output, preview_state],
+            concurrency_limit=UI_CONCURRENCY
+        )
+        
+        prev_page_btn.click(
+            fn=lambda state: preview_page(state, -1),
+            inputs=[preview_state],
+            outputs=[preview_output, preview_state]
+        )
+        next_page_btn.click(
+            fn=lambda state: preview_page(state, 1),
+            inputs=[preview_state],
+            outputs=[preview_output, preview_state]
         )
     
     return app
@@ -525,6 +698,19 @@ if __name__ == '__main__':
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     
+    # 清理上次运行留下的旧会话目录
+    removed = prune_session_dirs()
+    if removed:
+        print(f"🧹 已清理 {removed} 个旧的会话输出目录")
+    
+    # 启动生成报告的工作进程
+    worker_pool.start(WORKERS)
+    
+    # 启动性能指标服务
+    if METRICS_PORT:
+        metrics.start_metrics_server(METRICS_HOST, METRICS_PORT)
+        print(f"📈 性能指标: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+    
     # 创建并启动应用
     app = create_ui()
     app.launch(
@@ -0,0 +1,89 @@
+"""
+原子写入模块
+先写入同目录下的临时文件，完成后再重命名为目标文件名。
+并发写入同一路径时，读取方（预览、下载）只会看到完整的旧文件或完整的新文件，
+不会读到写了一半的内容；多个进程共享的缓存另可通过文件锁串行化同一条目的生成
+"""
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows本地运行时没有fcntl，退化为不加锁（仍保证原子写入）
+    fcntl = None
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    提供一个临时文件路径，退出时原子地替换目标文件；出错时删除临时文件，目标文件保持不变
+
+    用法:
+        with atomic_path(output_path) as tmp_path:
+            doc.save(tmp_path)
+
+    Args:
+        path: 目标文件路径
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # 临时文件由写入方创建（权限与普通文件一致），文件名带随机后缀，并发写入互不影响
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:12]}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_open(path, mode='w', **kwargs):
+    """
+    以原子写入方式打开文件，参数与内置open相同（仅支持写入模式）
+
+    用法:
+        with atomic_open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+    """
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+
+
+def atomic_copy(src, dst):
+    """
+    原子地复制文件
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径
+    """
+    with atomic_path(dst) as tmp_path:
+        shutil.copyfile(src, tmp_path)
+
+
+@contextmanager
+def file_lock(path):
+    """
+    进程间互斥锁（基于flock，进程退出时自动释放）
+
+    用法:
+        with file_lock(os.path.join(cache_dir, '.lock')):
+            ...
+
+    Args:
+        path: 锁文件路径（不存在时创建，使用后保留）
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
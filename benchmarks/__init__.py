@@ -0,0 +1,3 @@
+"""
+基准测试与合成数据生成
+"""
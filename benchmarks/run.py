@@ -0,0 +1,237 @@
+"""
+基准测试
+基于合成数据离线测量完整流程各环节的耗时和内存峰值，并与保存的基线对比
+
+被测环节:
+    parse_all        ExcelParser.parse_all（含解密）
+    generate         WordGenerator.generate
+    annotate         preview_layout 按模板版式渲染生成文档的全部段落
+    generate_report  app.generate_report（端到端，含预览）
+
+用法示例:
+    python -m benchmarks.run                          # 默认规模 1k/10k/100k，.xlsx
+    python -m benchmarks.run --rows 1000 1000000 --encrypt
+    python -m benchmarks.run --formats xls xlsx --rows 1000 10000
+    python -m benchmarks.run --save-baseline          # 保存为基线
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.synthetic import generate_template, generate_workbook
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BASE_DIR, "baseline.json")
+BENCH_PASSWORD = "110110"
+
+# 合成数据的统计基准日期：固定日期保证每次运行的本周/上周数据量一致
+AS_OF = date(2025, 9, 24)
+
+
+def _measure(func, repeat):
+    """
+    测量函数的耗时和内存峰值
+
+    先在未开启tracemalloc的情况下计时repeat次，再单独运行一次测量内存峰值，
+    避免内存跟踪拖慢计时结果
+
+    Returns:
+        dict: {'median': 秒, 'min': 秒, 'peak_mb': MB}
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median': round(statistics.median(timings), 6),
+        'min': round(min(timings), 6),
+        'peak_mb': round(peak / (1024 * 1024), 3),
+    }
+
+
+def _prepare_workbook(data_dir, fmt, rows, encrypt):
+    """生成（或复用已生成的）合成登记表"""
+    suffix = '_enc' if encrypt else ''
+    path = os.path.join(data_dir, f"synthetic_{rows}{suffix}.{fmt}")
+    if not os.path.exists(path):
+        print(f"  生成合成数据 {os.path.basename(path)} ...", file=sys.stderr)
+        generate_workbook(path, rows, password=BENCH_PASSWORD if encrypt else None,
+                          end_date=AS_OF + timedelta(days=4))
+    return path
+
+
+def run_case(data_dir, template_path, fmt, rows, encrypt, repeat):
+    """
+    运行单个规模的全部基准
+
+    Returns:
+        dict: {环节名: 测量结果}
+    """
+    import app
+    import parse_cache
+    from datetime import datetime
+    from excel_parser import ExcelParser
+    from word_generator import WordGenerator
+
+    excel_path = _prepare_workbook(data_dir, fmt, rows, encrypt)
+    password = BENCH_PASSWORD if encrypt else None
+    as_of = datetime(AS_OF.year, AS_OF.month, AS_OF.day)
+    output_path = os.path.join(data_dir, f"bench_{rows}.docx")
+
+    results = {}
+    data = ExcelParser(excel_path, password=password, as_of=as_of).parse_all()
+
+    results['parse_all'] = _measure(
+        lambda: ExcelParser(excel_path, password=password, as_of=as_of).parse_all(), repeat)
+
+    generator = WordGenerator(template_path)
+    results['generate'] = _measure(lambda: generator.generate(data, output_path), repeat)
+
+    from docx import Document
+    from preview_layout import layout_for
+    doc = Document(output_path)
+    lines = [(index, p.text.strip()) for index, p in enumerate(doc.paragraphs) if p.text.strip()]
+    layout = layout_for(doc, template_path)
+    results['annotate'] = _measure(
+        lambda: [layout.render(index, text) for index, text in lines], repeat)
+
+    # 端到端流程使用合成模板和临时输出目录，统计基准日期固定；不使用结果缓存和解析结果缓存，每次都完整执行
+    app.TEMPLATE_PATH = template_path
+    app.OUTPUT_DIR = data_dir
+    app.SESSION_OUTPUT_DIR = os.path.join(data_dir, "sessions")
+    app.RESULT_CACHE = None
+    parse_cache.MAX_ENTRIES = 0
+    results['generate_report'] = _measure(
+        lambda: _run_generate_report(app, excel_path, password, as_of), repeat)
+
+    return results
+
+
+def _run_generate_report(app, excel_path, password, as_of):
+    """以固定基准日期运行端到端流程"""
+    output_path, message, _ = app.generate_report(excel_path, "bench_report.docx", password or "",
+                                                  as_of=as_of)
+    if output_path is None:
+        raise RuntimeError(message)
+
+
+def compare(results, baseline, threshold):
+    """
+    与基线对比，返回退化项列表
+
+    Args:
+        results: 本次结果 {case: {stage: measurement}}
+        baseline: 基线结果（同结构）
+        threshold: 允许的相对退化比例（如0.2表示20%）
+
+    Returns:
+        list: [(case, stage, 指标, 基线值, 本次值), ...]
+    """
+    regressions = []
+    for case, stages in results.items():
+        for stage, measured in stages.items():
+            reference = baseline.get(case, {}).get(stage)
+            if not reference:
+                continue
+            for key in ('median', 'peak_mb'):
+                if reference[key] > 0 and measured[key] > reference[key] * (1 + threshold):
+                    regressions.append((case, stage, key, reference[key], measured[key]))
+    return regressions
+
+
+def _print_table(results, baseline):
+    """打印结果表格（含与基线的比值）"""
+    print(f"{'用例':<24}{'环节':<18}{'中位耗时(s)':>12}{'最小耗时(s)':>12}{'内存峰值(MB)':>14}{'耗时/基线':>10}")
+    for case, stages in results.items():
+        for stage, measured in stages.items():
+            reference = baseline.get(case, {}).get(stage)
+            ratio = f"{measured['median'] / reference['median']:.2f}x" if reference and reference['median'] else "-"
+            print(f"{case:<24}{stage:<18}{measured['median']:>12.4f}{measured['min']:>12.4f}"
+                  f"{measured['peak_mb']:>14.2f}{ratio:>10}")
+
+
+def main(argv=None):
+    """基准测试入口"""
+    parser = argparse.ArgumentParser(description="汇享易报告生成 - 基准测试")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='合成数据的总行数（可指定多个规模，1k~1M）')
+    parser.add_argument('--formats', nargs='+', choices=['xls', 'xlsx'], default=['xlsx'],
+                        help='Excel格式（.xls单个sheet最多65534行）')
+    parser.add_argument('--encrypt', action='store_true', help='对.xlsx合成数据加密')
+    parser.add_argument('--repeat', type=int, default=3, help='每个环节的计时次数')
+    parser.add_argument('--data-dir', help='合成数据目录（指定后可复用已生成的数据）')
+    parser.add_argument('--template', help='Word模板路径，默认生成合成模板')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定为退化的相对阈值')
+    parser.add_argument('--output', help='将本次结果另存为JSON')
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='reportgene_bench_')
+    os.makedirs(data_dir, exist_ok=True)
+    template_path = args.template or generate_template(os.path.join(data_dir, 'template.docx'))
+
+    results = {}
+    for fmt in args.formats:
+        for rows in args.rows:
+            encrypt = args.encrypt and fmt == 'xlsx'
+            case = f"{fmt}_{rows}{'_enc' if encrypt else ''}"
+            print(f"▶ {case}", file=sys.stderr)
+            try:
+                results[case] = run_case(data_dir, template_path, fmt, rows, encrypt, args.repeat)
+            except ValueError as e:
+                print(f"  跳过: {e}", file=sys.stderr)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+
+    _print_table(results, baseline)
+
+    document = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 基线已保存: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ 发现{len(regressions)}项退化（阈值 {args.threshold:.0%}）：")
+        for case, stage, key, reference, measured in regressions:
+            print(f"  • {case} / {stage} / {key}: {reference} -> {measured}")
+        return 1
+
+    if baseline:
+        print(f"\n✅ 未发现超过 {args.threshold:.0%} 的退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
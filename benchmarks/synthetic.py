@@ -0,0 +1,249 @@
+"""
+合成数据生成模块
+生成与真实登记表结构一致的Excel文件（两个sheet、相同列布局）和Word模板，
+供基准测试离线使用，不依赖任何真实数据
+
+用法示例:
+    python -m benchmarks.synthetic out.xlsx --rows 100000 --password 110110
+    python -m benchmarks.synthetic out.xls --rows 20000
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+SUNSHINE_SHEET = "阳光xf登记"
+GAB_SHEET = "gab上访"
+
+# 与真实登记表一致的列布局：B=登记时间，C=姓名，J=责任单位，Q=进京方式，S=群体诉求
+HEADER = [
+    "序号", "登记时间", "姓名", "性别", "身份证号", "户籍地", "联系电话", "登记机关",
+    "诉求内容", "责任单位", "问题类别", "是否在库", "是否触发平台", "稳控责任人",
+    "化解情况", "到京时间", "进京方式", "车次/车牌", "群体诉求", "备注",
+]
+UNITS = ["贾汪", "市直", "铜山", "云龙", "经开区", "丰县", "沛县", "邳州", "泉山", "新沂", "睢宁", "鼓楼"]
+TRAVEL_METHODS = ["公路", "公路", "铁路", "铁路", "铁路", "长期在京", "航空"]
+GROUP_APPEALS = ["征地拆迁", "讨薪", "拖欠工程款", "失地保险", "案件办理", "截访"]
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何林高罗"
+GIVEN_CHARS = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰"
+AGENCIES = ["国家信访局", "公安部", "市信访局"]
+CATEGORIES = ["涉法涉诉", "劳动社保", "城乡建设", "农村农业", "其他"]
+
+# .xls格式单个sheet的最大行数
+XLS_MAX_ROWS = 65536
+
+
+def _make_name_pool(rng, size):
+    """生成姓名池，池子越小重复登记的人越多"""
+    pool = set()
+    while len(pool) < size:
+        given = "".join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2, 2))))
+        pool.add(rng.choice(SURNAMES) + given)
+    return sorted(pool)
+
+
+def generate_rows(rows, end_date=None, days=365, seed=0, noise=0.001, name_pool_size=None):
+    """
+    生成登记数据行（不含标题行和表头）
+
+    Args:
+        rows: 行数
+        end_date: 最后一条登记的日期，默认为今天
+        days: 登记覆盖的天数（超过当年天数时会跨年）
+        seed: 随机种子
+        noise: 无法解析的登记时间所占比例
+        name_pool_size: 姓名池大小，默认为行数的十分之一
+
+    Yields:
+        list: 一行数据（按HEADER的列顺序）
+    """
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    names = _make_name_pool(rng, name_pool_size or max(50, rows // 10))
+    units_by_name = {name: rng.choice(UNITS) for name in names}
+
+    for i in range(rows):
+        # 按行号均匀推进日期，保持登记表按时间顺序排列
+        day = start_date + timedelta(days=i * days // max(rows, 1))
+        if rng.random() < noise:
+            registered = rng.choice(["", "待定", "13.45", "2.30"])
+        else:
+            registered = f"{day.month}.{day.day}"
+
+        name = rng.choice(names)
+        appeal = rng.choice(GROUP_APPEALS) if rng.random() < 0.3 else ""
+        yield [
+            i + 1,
+            registered,
+            name,
+            rng.choice(("男", "女")),
+            f"3203{rng.randrange(10**13, 10**14)}",
+            units_by_name[name],
+            f"1{rng.randrange(10**9, 10**10)}",
+            rng.choice(AGENCIES),
+            "反映" + rng.choice(CATEGORIES) + "问题",
+            units_by_name[name],
+            rng.choice(CATEGORIES),
+            rng.choice(("是", "否")),
+            rng.choice(("是", "否")),
+            "",
+            "",
+            f"{day.month}.{day.day}",
+            rng.choice(TRAVEL_METHODS),
+            "",
+            appeal,
+            "",
+        ]
+
+
+def _title(sheet_name, end_date=None, days=365, **_):
+    """标题行，年份与第一条登记记录一致（解析器会据此推断年份）"""
+    start_date = (end_date or date.today()) - timedelta(days=days - 1)
+    return f"{start_date.year}年复盘人员明细（{sheet_name}）"
+
+
+def _sheet_rows(rows):
+    """按约2:1的比例将总行数分配给两个sheet"""
+    gab_rows = rows // 3
+    return {SUNSHINE_SHEET: rows - gab_rows, GAB_SHEET: gab_rows}
+
+
+def _write_xlsx(path, sheet_rows, seed, **options):
+    """使用openpyxl的只写模式流式写入.xlsx"""
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    for index, (sheet_name, rows) in enumerate(sheet_rows.items()):
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append([_title(sheet_name, **options)])
+        sheet.append(HEADER)
+        for row in generate_rows(rows, seed=seed + index, **options):
+            sheet.append(row)
+    workbook.save(path)
+
+
+def _write_xls(path, sheet_rows, seed, **options):
+    """使用xlwt写入.xls（xlwt为可选依赖，仅基准测试需要）"""
+    try:
+        import xlwt
+    except ImportError:
+        raise RuntimeError("生成.xls文件需要安装xlwt: pip install xlwt")
+
+    for sheet_name, rows in sheet_rows.items():
+        if rows + 2 > XLS_MAX_ROWS:
+            raise ValueError(f".xls单个sheet最多{XLS_MAX_ROWS - 2}行数据，{sheet_name}需要{rows}行，请改用.xlsx")
+
+    workbook = xlwt.Workbook(encoding='utf-8')
+    for index, (sheet_name, rows) in enumerate(sheet_rows.items()):
+        sheet = workbook.add_sheet(sheet_name)
+        sheet.write(0, 0, _title(sheet_name, **options))
+        for col, title in enumerate(HEADER):
+            sheet.write(1, col, title)
+        for r, row in enumerate(generate_rows(rows, seed=seed + index, **options), start=2):
+            for col, value in enumerate(row):
+                if value != "":
+                    sheet.write(r, col, value)
+    workbook.save(path)
+
+
+def _encrypt_in_place(path, password):
+    """使用msoffcrypto对.xlsx加密（msoffcrypto仅支持OOXML格式加密）"""
+    from msoffcrypto.format.ooxml import OOXMLFile
+
+    plain_path = path + '.plain'
+    os.replace(path, plain_path)
+    try:
+        with open(plain_path, 'rb') as src, open(path, 'wb') as dst:
+            OOXMLFile(src).encrypt(password, dst)
+    finally:
+        os.remove(plain_path)
+
+
+def generate_workbook(path, rows, password=None, end_date=None, days=365, seed=0, noise=0.001):
+    """
+    生成合成登记表
+
+    Args:
+        path: 输出路径，根据扩展名选择.xls或.xlsx
+        rows: 两个sheet的总行数
+        password: 加密密码（仅支持.xlsx），为空则不加密
+        end_date: 最后一条登记的日期，默认为今天
+        days: 登记覆盖的天数
+        seed: 随机种子
+        noise: 无法解析的登记时间所占比例
+
+    Returns:
+        str: 输出路径
+    """
+    options = {'end_date': end_date, 'days': days, 'noise': noise}
+    sheet_rows = _sheet_rows(rows)
+
+    if path.endswith('.xls'):
+        if password:
+            raise ValueError("msoffcrypto不支持加密.xls文件，请改用.xlsx")
+        _write_xls(path, sheet_rows, seed, **options)
+    else:
+        _write_xlsx(path, sheet_rows, seed, **options)
+        if password:
+            _encrypt_in_place(path, password)
+    return path
+
+
+def generate_template(path):
+    """
+    生成结构与正式模板一致的Word模板（包含全部占位符）
+
+    Args:
+        path: 输出路径
+
+    Returns:
+        str: 输出路径
+    """
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    doc = Document()
+    for text in ('"情指行"机制复盘报告', '第X期', '阳光信访登记复盘工作周报'):
+        doc.add_paragraph(text).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph('（一）人员基本情况')
+    doc.add_paragraph(
+        '本周，我市在京信访登记{{total_count}}人，其中国家信访局登记{{sunshine_count}}人，'
+        '环比（{{last_week_sunshine}}人）{{sunshine_trend}}；公安部登记{{gab_count}}人，'
+        '环比（{{last_week_gab}}人）{{gab_trend}}。'
+    )
+    doc.add_paragraph('1、国家信访局登记人员：{{sunshine_persons}}。')
+    doc.add_paragraph('2、公安部登记人员：{{gab_persons}}。')
+    doc.add_paragraph('（二）分析研判')
+    doc.add_paragraph('从涉事地看，{{area_stats}}。')
+    doc.add_paragraph('从涉稳群体类型看，{{group_appeal}}。')
+    doc.add_paragraph('从进京交通工具看，公路{{travel_road_count}}人，{{travel_stats}}。')
+    doc.add_paragraph('（三）工作建议')
+    doc.add_paragraph('3、持续做好重点人员稳控工作。')
+    doc.save(path)
+    return path
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="生成合成登记表（用于基准测试）")
+    parser.add_argument('output', help='输出路径（.xls或.xlsx）')
+    parser.add_argument('--rows', type=int, default=1000, help='两个sheet的总行数')
+    parser.add_argument('--password', help='加密密码（仅.xlsx）')
+    parser.add_argument('--end-date', help='最后一条登记的日期（YYYY-MM-DD），默认为今天')
+    parser.add_argument('--days', type=int, default=365, help='登记覆盖的天数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--template', help='同时生成Word模板到指定路径')
+    args = parser.parse_args(argv)
+
+    end_date = date.fromisoformat(args.end_date) if args.end_date else None
+    generate_workbook(args.output, args.rows, password=args.password,
+                      end_date=end_date, days=args.days, seed=args.seed)
+    print(f"✓ 已生成 {args.output}（{args.rows}行）")
+    if args.template:
+        generate_template(args.template)
+        print(f"✓ 已生成模板 {args.template}")
+
+
+if __name__ == '__main__':
+    main()
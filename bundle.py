@@ -0,0 +1,107 @@
+"""
+报告打包模块
+将多份报告及其附带文件（数据质量报告、统计数据）打包为一个zip供一次下载。
+每份报告完成后立即追加到包中，数据按块写入磁盘，内存占用与报告数量无关；
+包在关闭时才重命名为目标文件名，下载方不会拿到不完整的zip
+"""
+import os
+import zipfile
+from contextlib import ExitStack
+
+from atomic_io import atomic_path
+
+
+def bundle_path(output_path):
+    """
+    单份报告及其附带文件的下载包路径
+
+    Args:
+        output_path: Word报告路径
+
+    Returns:
+        str: 同目录下的 <报告文件名>_全部文件.zip
+    """
+    return f"{os.path.splitext(output_path)[0]}_全部文件.zip"
+
+
+def summary_files(summary):
+    """
+    处理摘要中已生成的全部文件
+
+    Args:
+        summary: build_report / build_backfill_reports 返回的处理摘要
+
+    Returns:
+        list: Word报告在前，其后为数据质量报告和统计数据文件
+    """
+    if not summary.get('output_path'):
+        return []
+    files = [summary['output_path']]
+    if summary.get('quality_report_path'):
+        files.append(summary['quality_report_path'])
+    files.extend(summary.get('export_paths', []))
+    return files
+
+
+class ReportBundle:
+    """逐个追加文件的zip包"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: zip文件路径
+        """
+        self.path = path
+        self.count = 0
+        self._names = set()
+        self._stack = ExitStack()
+        tmp_path = self._stack.enter_context(atomic_path(path))
+        self._zip = zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._zip.close()
+        # 出错时丢弃临时文件，正常结束时重命名为目标文件
+        self._stack.__exit__(exc_type, exc_value, traceback)
+
+    def close(self):
+        """完成打包"""
+        self.__exit__(None, None, None)
+
+    def add(self, path):
+        """
+        追加一个文件（按块读取写入，不整体载入内存）
+
+        Args:
+            path: 文件路径，包内使用文件名（与已有文件重名时追加序号，如 报告_2.docx）
+
+        Returns:
+            str: 包内的文件名
+        """
+        name = os.path.basename(path)
+        stem, extension = os.path.splitext(name)
+        index = 2
+        while name in self._names:
+            name = f"{stem}_{index}{extension}"
+            index += 1
+        self._names.add(name)
+        self._zip.write(path, arcname=name)
+        self.count += 1
+        return name
+
+    def add_summary(self, summary):
+        """
+        追加一份报告及其附带文件（生成失败的报告跳过）
+
+        Args:
+            summary: 处理摘要
+
+        Returns:
+            int: 追加的文件数
+        """
+        files = summary_files(summary)
+        for path in files:
+            self.add(path)
+        return len(files)
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+命令行入口
+无需启动Gradio界面即可批量生成报告，适用于定时任务和脚本调用
+
+用法示例:
+    python cli.py generate 2025年复盘人员明细.xls --as-of 2025-09-22
+    python cli.py generate upload/ --jobs 4 --summary output/summary.json
+    python cli.py generate upload/ --export-stats --bundle output/全部报告.zip
+    python cli.py backfill 2025年复盘人员明细.xls --from 2025-01-06 --to 2025-06-30
+    python cli.py ingest archive/ --jobs 4
+    python cli.py store-report --as-of 2025-09-22
+    python cli.py watch /data/drop --schedule "30 6 * * 1"
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import datetime
+
+import data_quality
+import metrics
+import profiling
+from bundle import ReportBundle
+from date_calculator import parse_as_of_date
+from report_pipeline import build_backfill_reports, build_report, build_store_report, default_output_name
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 与app.py保持一致的默认配置
+DEFAULT_PASSWORD = "110110"
+TEMPLATE_PATH = os.path.join(BASE_DIR, "template.docx")
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+EXCEL_EXTENSIONS = ('.xls', '.xlsx')
+
+
+def collect_workbooks(paths):
+    """
+    展开命令行传入的路径（文件、目录或通配符）为Excel文件列表
+
+    Args:
+        paths: 路径列表
+
+    Returns:
+        list: 去重后的Excel文件路径列表（保持输入顺序）
+    """
+    workbooks = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith(EXCEL_EXTENSIONS)
+            )
+        else:
+            candidates = sorted(glob.glob(path)) or [path]
+
+        for candidate in candidates:
+            if candidate not in workbooks:
+                workbooks.append(candidate)
+    return workbooks
+
+
+def output_names(workbooks):
+    """
+    确定批量处理时每个Excel文件的报告文件名
+
+    文件名相同的登记表（如各区目录下的"登记表.xlsx"）加上所在目录名作为前缀，
+    仍然相同时再追加序号，避免并行生成时报告互相覆盖
+
+    Args:
+        workbooks: Excel文件路径列表
+
+    Returns:
+        dict: {Excel文件路径: 报告文件名}
+    """
+    names = {path: default_output_name(path) for path in workbooks}
+    counts = Counter(names.values())
+    used = set()
+    for path in workbooks:
+        name = names[path]
+        if counts[name] > 1:
+            name = f"{os.path.basename(os.path.dirname(os.path.abspath(path)))}_{name}"
+        stem, extension = os.path.splitext(name)
+        candidate, index = name, 2
+        while candidate in used:
+            candidate = f"{stem}_{index}{extension}"
+            index += 1
+        used.add(candidate)
+        names[path] = candidate
+    return names
+
+
+@metrics.tracked_request('cli', outcome=lambda summary: summary['success'])
+def _run_one(excel_path, template_path, output_path, password, as_of, profile=False,
+             quality_report=False, export_stats=False):
+    """在工作进程中处理单个Excel文件"""
+    with profiling.request_profiling(profile) as profiles:
+        try:
+            if not os.path.exists(excel_path):
+                raise FileNotFoundError(f"Excel文件不存在: {excel_path}")
+            summary = build_report(excel_path, template_path, output_path,
+                                   password=password, as_of=as_of, quality_report=quality_report,
+                                   export_stats=export_stats)
+        except Exception as e:
+            summary = {
+                'excel_path': excel_path,
+                'output_path': None,
+                'success': False,
+                'errors': [str(e)],
+            }
+    if profiles:
+        summary['profiles'] = list(profiles)
+    return summary
+
+
+def run_batch(workbooks, template_path, output_dir, password=None, as_of=None, jobs=None,
+              profile=False, quality_report=False, export_stats=False, on_result=None):
+    """
+    并行处理多个Excel文件（报告文件名见 output_names）
+
+    Args:
+        workbooks: Excel文件路径列表
+        template_path: Word模板路径
+        output_dir: 输出目录
+        password: Excel密码
+        as_of: 统计基准日期（datetime对象）
+        jobs: 并行进程数，默认为CPU核数
+        profile: 是否对每个文件进行性能分析
+        quality_report: 是否为每个文件保存数据质量报告（JSON）
+        export_stats: 是否为每个文件保存统计数据（JSON和CSV）
+        on_result: 每个文件处理完成后立即调用的回调函数（参数为处理摘要，按完成顺序），如追加到下载包
+
+    Returns:
+        list: 与输入顺序一致的处理摘要列表
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(workbooks)))
+    output_paths = {path: os.path.join(output_dir, name) for path, name in output_names(workbooks).items()}
+
+    if jobs == 1:
+        summaries = []
+        for path in workbooks:
+            summaries.append(_run_one(path, template_path, output_paths[path], password, as_of, profile,
+                                      quality_report, export_stats))
+            if on_result:
+                on_result(summaries[-1])
+        return summaries
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(_run_one, path, template_path, output_paths[path], password, as_of, profile,
+                            quality_report, export_stats): path
+            for path in workbooks
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_result:
+                on_result(results[futures[future]])
+    return [results[path] for path in workbooks]
+
+
+def _print_progress(summary, show_quality=True):
+    """在标准错误输出打印单个文件的处理结果（show_quality为False时不打印数据质量摘要）"""
+    name = os.path.basename(summary['excel_path'])
+    if summary['success']:
+        data = summary['data']
+        print(f"✅ {name}: 本周总计 {data['total_current']} 人 -> {summary['output_path']}",
+              file=sys.stderr)
+        if show_quality and data_quality.has_issues(data.get('data_quality')):
+            print(data_quality.format_summary(data['data_quality']), file=sys.stderr)
+    else:
+        print(f"❌ {name}: {'；'.join(summary['errors'])}", file=sys.stderr)
+
+
+def cmd_generate(args):
+    """generate子命令：批量生成报告"""
+    workbooks = collect_workbooks(args.workbooks)
+    if not workbooks:
+        print("❌ 未找到任何Excel文件", file=sys.stderr)
+        return 2
+
+    as_of = parse_as_of_date(args.as_of)
+    with _open_bundle(args.bundle) as bundle:
+        summaries = run_batch(
+            workbooks,
+            template_path=args.template,
+            output_dir=args.output_dir,
+            password=args.password,
+            as_of=as_of,
+            jobs=args.jobs,
+            profile=args.profile,
+            quality_report=args.quality_report,
+            export_stats=args.export_stats,
+            on_result=bundle.add_summary if bundle else None,
+        )
+    for summary in summaries:
+        _print_progress(summary)
+    _print_bundle(bundle)
+
+    report = {
+        'as_of': as_of.strftime('%Y-%m-%d') if as_of else None,
+        'total': len(summaries),
+        'succeeded': sum(1 for s in summaries if s['success']),
+        'results': summaries,
+    }
+    _write_report(report, args.summary)
+    return 0 if report['succeeded'] == report['total'] else 1
+
+
+def _open_bundle(path):
+    """打开下载包（每份报告完成后立即追加）；未指定路径时返回空的上下文"""
+    return ReportBundle(path) if path else nullcontext()
+
+
+def _print_bundle(bundle):
+    """打印下载包信息"""
+    if bundle and bundle.count:
+        print(f"📦 已打包 {bundle.count} 个文件 -> {bundle.path}", file=sys.stderr)
+
+
+def _write_report(report, summary_path):
+    """输出JSON摘要：写入文件或打印到标准输出"""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if summary_path:
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+@metrics.tracked_request('cli', outcome=lambda summaries: all(s['success'] for s in summaries))
+def _run_backfill(excel_path, template_path, output_dir, password, start, end, profile=False,
+                  on_result=None, quality_report=False, export_stats=False):
+    """回溯生成单个Excel文件的多周报告"""
+    with profiling.request_profiling(profile):
+        return build_backfill_reports(excel_path, template_path, output_dir, start, end,
+                                      password=password, on_result=on_result,
+                                      quality_report=quality_report, export_stats=export_stats)
+
+
+def cmd_backfill(args):
+    """backfill子命令：按日期区间逐周回溯生成报告"""
+    start = parse_as_of_date(args.start)
+    end = parse_as_of_date(args.end) or datetime.now()
+    if not os.path.exists(args.workbook):
+        print(f"❌ Excel文件不存在: {args.workbook}", file=sys.stderr)
+        return 2
+
+    with _open_bundle(args.bundle) as bundle:
+        summaries = _run_backfill(args.workbook, args.template, args.output_dir, args.password,
+                                  start, end, profile=args.profile,
+                                  on_result=bundle.add_summary if bundle else None,
+                                  quality_report=args.quality_report, export_stats=args.export_stats)
+    # 数据质量检查针对整个登记表，各周相同，只打印一次
+    for summary in summaries:
+        _print_progress(summary, show_quality=False)
+    quality = next((s['data'].get('data_quality') for s in summaries if s['data'].get('data_quality')), None)
+    if data_quality.has_issues(quality):
+        print(data_quality.format_summary(quality), file=sys.stderr)
+    _print_bundle(bundle)
+
+    report = {
+        'from': start.strftime('%Y-%m-%d'),
+        'to': end.strftime('%Y-%m-%d'),
+        'total': len(summaries),
+        'succeeded': sum(1 for s in summaries if s['success']),
+        'results': summaries,
+    }
+    _write_report(report, args.summary)
+    return 0 if report['succeeded'] == report['total'] else 1
+
+
+def cmd_ingest(args):
+    """ingest子命令：并行导入多个Excel文件到合并库"""
+    from consolidated_store import ConsolidatedStore
+
+    workbooks = collect_workbooks(args.workbooks)
+    if not workbooks:
+        print("❌ 未找到任何Excel文件", file=sys.stderr)
+        return 2
+
+    with ConsolidatedStore(args.store) as store:
+        results = store.ingest(workbooks, password=args.password, jobs=args.jobs, force=args.force)
+        store_path = store.path
+
+    icons = {'imported': '✅', 'skipped': '⏭️', 'failed': '❌'}
+    for result in results:
+        detail = f"{result['rows']} 行" if result['status'] == 'imported' else '；'.join(result['errors'])
+        print(f"{icons[result['status']]} {os.path.basename(result['source_file'])}: {detail or '未变化，跳过'}",
+              file=sys.stderr)
+
+    report = {
+        'store': store_path,
+        'total': len(results),
+        'failed': sum(1 for r in results if r['status'] == 'failed'),
+        'results': results,
+    }
+    _write_report(report, args.summary)
+    return 0 if report['failed'] == 0 else 1
+
+
+@metrics.tracked_request('cli', outcome=lambda summary: summary['success'])
+def _run_store_report(store_path, template_path, output_path, as_of, source_files, profile=False):
+    """基于合并库生成一份报告"""
+    with profiling.request_profiling(profile):
+        return build_store_report(store_path, template_path, output_path, as_of=as_of,
+                                  source_files=source_files)
+
+
+def cmd_store_report(args):
+    """store-report子命令：基于合并库生成报告"""
+    as_of = parse_as_of_date(args.as_of)
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(
+        args.output_dir, args.output_name or f"合并_报告_{(as_of or datetime.now()):%Y%m%d}.docx"
+    )
+    summary = _run_store_report(args.store, args.template, output_path, as_of,
+                                args.source_files, profile=args.profile)
+    _print_progress(summary)
+
+    data = summary.get('data') or {}
+    if data.get('has_last_year'):
+        print(f"📅 去年同期: {data['total_last_year']} 人，同比{data['total_yoy_trend']}", file=sys.stderr)
+
+    _write_report(summary, args.summary)
+    return 0 if summary['success'] else 1
+
+
+def cmd_watch(args):
+    """watch子命令：监视投放目录，提前生成报告并写入结果缓存"""
+    from watcher import CronSchedule, FolderWatcher
+
+    schedule = CronSchedule(args.schedule) if args.schedule else None
+    watcher = FolderWatcher(args.folder, args.template, args.output_dir, password=args.password,
+                            schedule=schedule, interval=args.interval, settle_seconds=args.settle)
+    if args.once:
+        summaries = watcher.run_once()
+        return 0 if all(s['success'] for s in summaries) else 1
+
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("已停止监视", file=sys.stderr)
+    return 0
+
+
+def build_arg_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="汇享易报告生成 - 命令行模式")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser('generate', help='根据Excel文件批量生成Word报告')
+    generate.add_argument('workbooks', nargs='+', help='Excel文件、目录或通配符')
+    generate.add_argument('-p', '--password', default=DEFAULT_PASSWORD, help='Excel密码')
+    generate.add_argument('-t', '--template', default=TEMPLATE_PATH, help='Word模板路径')
+    generate.add_argument('-o', '--output-dir', default=OUTPUT_DIR, help='报告输出目录')
+    generate.add_argument('--as-of', help='统计基准日期（YYYY-MM-DD），默认为今天')
+    generate.add_argument('-j', '--jobs', type=int, help='并行进程数，默认为CPU核数')
+    generate.add_argument('--summary', help='JSON摘要输出路径，默认打印到标准输出')
+    generate.add_argument('--profile', action='store_true',
+                          help='对每个文件进行性能分析（cProfile + tracemalloc），结果保存到profiles/')
+    generate.add_argument('--quality-report', action='store_true',
+                          help='在每份报告旁保存数据质量报告（<报告文件名>_数据质量.json）')
+    generate.add_argument('--export-stats', action='store_true',
+                          help='在每份报告旁保存统计数据（<报告文件名>_统计.json、_人员.csv、_分类统计.csv）')
+    generate.add_argument('--bundle', help='将全部报告及附带文件打包为zip（每份报告完成后立即追加）')
+    generate.set_defaults(func=cmd_generate)
+
+    backfill = subparsers.add_parser('backfill', help='按日期区间逐周回溯生成历史报告（Excel只读取一次）')
+    backfill.add_argument('workbook', help='Excel文件路径')
+    backfill.add_argument('--from', dest='start', required=True, help='起始日期（YYYY-MM-DD），所在周计入')
+    backfill.add_argument('--to', dest='end', help='结束日期（YYYY-MM-DD），所在周计入，默认为今天')
+    backfill.add_argument('-p', '--password', default=DEFAULT_PASSWORD, help='Excel密码')
+    backfill.add_argument('-t', '--template', default=TEMPLATE_PATH, help='Word模板路径')
+    backfill.add_argument('-o', '--output-dir', default=OUTPUT_DIR, help='报告输出目录')
+    backfill.add_argument('--summary', help='JSON摘要输出路径，默认打印到标准输出')
+    backfill.add_argument('--profile', action='store_true',
+                          help='进行性能分析（cProfile + tracemalloc），结果保存到profiles/')
+    backfill.add_argument('--quality-report', action='store_true',
+                          help='在每周报告旁保存数据质量报告（<报告文件名>_数据质量.json）')
+    backfill.add_argument('--export-stats', action='store_true',
+                          help='在每周报告旁保存统计数据（<报告文件名>_统计.json、_人员.csv、_分类统计.csv）')
+    backfill.add_argument('--bundle', help='将各周报告及附带文件打包为zip（每周报告完成后立即追加）')
+    backfill.set_defaults(func=cmd_backfill)
+
+    ingest = subparsers.add_parser('ingest', help='并行导入多个Excel文件（多年度、多区县）到合并库')
+    ingest.add_argument('workbooks', nargs='+', help='Excel文件、目录或通配符')
+    ingest.add_argument('-p', '--password', default=DEFAULT_PASSWORD, help='Excel密码')
+    ingest.add_argument('--store', help='合并库路径，默认为 REPORTGENE_STORE 或 store/registrations.sqlite3')
+    ingest.add_argument('-j', '--jobs', type=int, help='并行进程数，默认为CPU核数')
+    ingest.add_argument('--force', action='store_true', help='重新导入未变化的文件')
+    ingest.add_argument('--summary', help='JSON摘要输出路径，默认打印到标准输出')
+    ingest.set_defaults(func=cmd_ingest)
+
+    store_report = subparsers.add_parser('store-report', help='基于合并库生成报告（含去年同期对比）')
+    store_report.add_argument('--store', help='合并库路径，默认为 REPORTGENE_STORE 或 store/registrations.sqlite3')
+    store_report.add_argument('--as-of', help='统计基准日期（YYYY-MM-DD），默认为今天')
+    store_report.add_argument('--source-files', nargs='+', help='只统计这些已导入文件的数据')
+    store_report.add_argument('-t', '--template', default=TEMPLATE_PATH, help='Word模板路径')
+    store_report.add_argument('-o', '--output-dir', default=OUTPUT_DIR, help='报告输出目录')
+    store_report.add_argument('--output-name', help='报告文件名，默认为 合并_报告_<基准日期>.docx')
+    store_report.add_argument('--summary', help='JSON摘要输出路径，默认打印到标准输出')
+    store_report.add_argument('--profile', action='store_true',
+                              help='进行性能分析（cProfile + tracemalloc），结果保存到profiles/')
+    store_report.set_defaults(func=cmd_store_report)
+
+    watch = subparsers.add_parser('watch', help='监视投放目录，新增或修改的登记表提前生成报告（供界面直接使用）')
+    watch.add_argument('folder', help='投放目录')
+    watch.add_argument('-p', '--password', default=DEFAULT_PASSWORD, help='Excel密码')
+    watch.add_argument('-t', '--template', default=TEMPLATE_PATH, help='Word模板路径')
+    watch.add_argument('-o', '--output-dir', default=OUTPUT_DIR, help='报告输出目录')
+    watch.add_argument('--interval', type=int, default=60, help='轮询间隔（秒），默认为60')
+    watch.add_argument('--settle', type=int, default=10, help='文件最后修改后至少等待的秒数，默认为10')
+    watch.add_argument('--schedule', help='定时重新生成全部报告的cron表达式（分 时 日 月 星期），如 "30 6 * * 1"')
+    watch.add_argument('--once', action='store_true', help='只检查一次后退出（可由系统定时任务调用）')
+    watch.set_defaults(func=cmd_watch)
+
+    return parser
+
+
+def main(argv=None):
+    """命令行主函数"""
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
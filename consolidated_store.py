@@ -0,0 +1,256 @@
+"""
+登记数据合并存储模块
+将多个年度、多个区县的登记表并行解析后写入同一个本地SQLite库（每行标注来源文件），
+之后的周期统计和报告直接基于合并数据，跨年同比等查询无需再逐个打开Excel
+
+环境变量:
+    REPORTGENE_STORE: 合并库路径，默认为项目下的 store/registrations.sqlite3
+"""
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from date_calculator import week_numbers
+from excel_parser import ExcelParser
+from source_schema import FIELD_DEFAULTS, load_sources
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.environ.get("REPORTGENE_STORE", os.path.join(BASE_DIR, "store", "registrations.sqlite3"))
+
+# 人员字段在合并库中的列名（与 FIELD_DEFAULTS 一致）
+FIELDS = tuple(FIELD_DEFAULTS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS workbooks (
+    source_file TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    rows INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registrations (
+    source_file TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    row_number INTEGER NOT NULL,
+    ordinal INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    {", ".join(f"{field} TEXT NOT NULL" for field in FIELDS)}
+);
+CREATE INDEX IF NOT EXISTS idx_registrations_week ON registrations (week);
+CREATE INDEX IF NOT EXISTS idx_registrations_source ON registrations (source_file);
+"""
+
+
+def extract_rows(excel_path, password=None, sources=None):
+    """
+    解析单个登记表为规范化的数据行（在工作进程中运行）
+
+    Args:
+        excel_path: Excel文件路径
+        password: Excel密码
+        sources: 登记来源配置列表
+
+    Returns:
+        tuple: (数据行列表, 错误信息列表)；数据行为
+               (前缀, sheet名称, Excel行号, 公历序数, 周序号, 责任单位, 姓名, 进京方式, 群体诉求)
+    """
+    parser = ExcelParser(excel_path, password=password, sources=sources)
+    sheets = parser.load()
+
+    rows, errors = [], []
+    for source in parser.sources:
+        sheet = sheets[source['prefix']]
+        if 'error' in sheet:
+            errors.append(f"{source['sheet']}: {sheet['error']}")
+            continue
+        data = sheet['data']
+        # 空值存为空字符串，读取时再按字段补默认值
+        fields = [parser._column_text(data, sheet['columns'].get(field), "") for field in FIELDS]
+        rows.extend(zip(
+            [source['prefix']] * len(data),
+            [source['sheet']] * len(data),
+            (data.index.to_numpy() + 1).tolist(),
+            sheet['ordinals'].tolist(),
+            sheet['weeks'].tolist(),
+            *fields,
+        ))
+    return rows, errors
+
+
+class ConsolidatedStore:
+    """多个登记表合并后的本地存储"""
+
+    def __init__(self, path=None):
+        """
+        打开（不存在时创建）合并库
+
+        Args:
+            path: SQLite文件路径，默认为 STORE_PATH
+        """
+        self.path = path or STORE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+
+    def ingest(self, workbooks, password=None, jobs=None, force=False):
+        """
+        并行解析多个登记表并写入合并库，同一文件重复导入时替换原有数据
+
+        解析在多个进程中进行，写入由当前进程在单个事务中完成；
+        大小和修改时间未变化的文件直接跳过
+
+        Args:
+            workbooks: Excel文件路径列表
+            password: Excel密码
+            jobs: 并行进程数，默认为CPU核数
+            force: 是否忽略未变化检查，全部重新导入
+
+        Returns:
+            list: 每个文件一项 {'source_file', 'status': imported/skipped/failed, 'rows', 'errors'}
+        """
+        sources = load_sources()
+        pending, results = [], {}
+        for path in workbooks:
+            source_file = os.path.abspath(path)
+            if not force and self._unchanged(source_file):
+                results[source_file] = {'source_file': source_file, 'status': 'skipped',
+                                        'rows': 0, 'errors': []}
+            else:
+                pending.append(source_file)
+
+        jobs = max(1, min(jobs or os.cpu_count() or 1, len(pending) or 1))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(extract_rows, path, password, sources): path for path in pending
+            }
+            for future in as_completed(futures):
+                source_file = futures[future]
+                try:
+                    rows, errors = future.result()
+                except Exception as e:
+                    rows, errors = [], [str(e)]
+                if errors and not rows:
+                    results[source_file] = {'source_file': source_file, 'status': 'failed',
+                                            'rows': 0, 'errors': errors}
+                    continue
+                self._replace(source_file, rows)
+                results[source_file] = {'source_file': source_file, 'status': 'imported',
+                                        'rows': len(rows), 'errors': errors}
+
+        return [results[os.path.abspath(path)] for path in workbooks]
+
+    def _unchanged(self, source_file):
+        """文件大小和修改时间与上次导入时一致"""
+        row = self._conn.execute(
+            "SELECT size, mtime FROM workbooks WHERE source_file = ?", (source_file,)
+        ).fetchone()
+        if row is None or not os.path.exists(source_file):
+            return False
+        stat = os.stat(source_file)
+        return row == (stat.st_size, stat.st_mtime)
+
+    def _replace(self, source_file, rows):
+        """在一个事务中替换某个文件的全部数据行"""
+        stat = os.stat(source_file)
+        placeholders = ", ".join("?" * (6 + len(FIELDS)))
+        with self._conn:
+            self._conn.execute("DELETE FROM registrations WHERE source_file = ?", (source_file,))
+            self._conn.executemany(
+                f"INSERT INTO registrations VALUES ({placeholders})",
+                ((source_file, *row) for row in rows)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workbooks VALUES (?, ?, ?, ?, ?)",
+                (source_file, stat.st_size, stat.st_mtime, len(rows), time.strftime('%Y-%m-%d %H:%M:%S'))
+            )
+
+    def workbooks(self):
+        """
+        已导入的文件列表
+
+        Returns:
+            list: [{'source_file', 'rows', 'ingested_at'}, ...]
+        """
+        return [
+            {'source_file': source_file, 'rows': rows, 'ingested_at': ingested_at}
+            for source_file, rows, ingested_at in self._conn.execute(
+                "SELECT source_file, rows, ingested_at FROM workbooks ORDER BY source_file"
+            )
+        ]
+
+    def frame(self, prefix, source_files=None):
+        """
+        读取某个来源的全部数据行
+
+        Args:
+            prefix: 来源前缀
+            source_files: 只读取这些文件的数据，默认为全部文件
+
+        Returns:
+            pandas.DataFrame: 包含 source_file、row_number、ordinal 及人员字段的数据行
+        """
+        import pandas as pd
+
+        query = f"SELECT source_file, row_number, ordinal, {', '.join(FIELDS)} FROM registrations WHERE prefix = ?"
+        params = [prefix]
+        if source_files:
+            files = [os.path.abspath(path) for path in source_files]
+            query += f" AND source_file IN ({', '.join('?' * len(files))})"
+            params += files
+        return pd.read_sql_query(query + " ORDER BY ordinal", self._conn, params=params)
+
+
+class StoreParser(ExcelParser):
+    """基于合并库的解析器：统计与报告逻辑与ExcelParser相同，数据来自合并库"""
+
+    def __init__(self, store, as_of=None, sources=None, source_files=None):
+        """
+        Args:
+            store: ConsolidatedStore对象
+            as_of: 统计基准日期（datetime对象），默认为当前日期
+            sources: 登记来源配置列表，默认由 source_schema.load_sources 读取
+            source_files: 只统计这些文件的数据，默认为全部文件
+        """
+        super().__init__(store.path, as_of=as_of, sources=sources)
+        self.store = store
+        self.source_files = source_files
+
+    def load(self):
+        """
+        从合并库读取各来源的数据行（结构与ExcelParser.load相同）
+
+        Returns:
+            dict: {来源前缀: 数据行信息}
+        """
+        if self._sheets is not None:
+            return self._sheets
+
+        import numpy as np
+
+        columns = {field: field for field in FIELDS}
+        sheets = {}
+        for source in self.sources:
+            data = self.store.frame(source['prefix'], self.source_files)
+            data[list(FIELDS)] = data[list(FIELDS)].replace("", np.nan)
+            ordinals = data['ordinal'].to_numpy()
+            weeks = week_numbers(ordinals)
+            sheets[source['prefix']] = {
+                'data': data, 'ordinals': ordinals, 'weeks': weeks, 'columns': columns,
+                'first_week': self._first_week(weeks),
+            }
+
+        self.visitors = self._build_visitor_index(sheets)
+        self._sheets = sheets
+        return sheets
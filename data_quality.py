@@ -0,0 +1,149 @@
+"""
+数据质量检查模块
+在解析登记表的同一次向量化处理中找出登记时间无法解析或晚于今天、
+缺少姓名或责任单位以及重复登记的行，生成状态摘要和可选的JSON质量报告
+"""
+import json
+import time
+from datetime import datetime
+
+from atomic_io import atomic_open
+
+# 检查项及其显示名称（按显示顺序）
+CHECKS = (
+    ('unparseable_dates', '登记时间无法解析'),
+    ('future_dates', '登记时间晚于今天'),
+    ('missing_names', '缺少姓名'),
+    ('missing_units', '缺少责任单位'),
+    ('duplicate_rows', '重复登记'),
+)
+
+# 状态摘要中每类问题最多列出的行号数
+MAX_LISTED_ROWS = 10
+
+
+def check_rows(data, ordinals, columns, today=None):
+    """
+    检查登记数据行，全部为整列运算
+
+    整行为空的行（如表尾空行）不参与检查；重复登记指登记日期、姓名、
+    责任单位均相同的行，第一次出现的行不计入
+
+    Args:
+        data: 数据行DataFrame（索引为sheet中的行索引，从0开始）
+        ordinals: 登记时间的公历序数数组（无法解析为0）
+        columns: 按表头定位的 {字段: 列索引}
+        today: 判断未来日期的基准（datetime对象），默认为当前时间
+
+    Returns:
+        dict: {'rows': 非空行数, 检查项: [Excel行号, ...]}
+    """
+    import pandas as pd
+
+    filled = data.notna().to_numpy().any(axis=1)
+    row_numbers = data.index.to_numpy() + 1
+
+    def text_column(field):
+        index = columns.get(field)
+        if index is None or index not in data.columns:
+            return pd.Series("", index=data.index)
+        return data[index].where(data[index].notna(), "").astype(str).str.strip()
+
+    names = text_column('name')
+    units = text_column('unit')
+    parsed = ordinals > 0
+
+    duplicated = pd.DataFrame({
+        'date': ordinals, 'name': names.to_numpy(), 'unit': units.to_numpy()
+    }).duplicated(keep='first').to_numpy()
+
+    masks = {
+        'unparseable_dates': filled & ~parsed,
+        'future_dates': filled & future_date_mask(ordinals, today),
+        'missing_names': filled & (names == "").to_numpy(),
+        'missing_units': filled & (units == "").to_numpy(),
+        'duplicate_rows': filled & parsed & duplicated,
+    }
+
+    report = {'rows': int(filled.sum())}
+    for key, mask in masks.items():
+        report[key] = row_numbers[mask].tolist()
+    return report
+
+
+def future_date_mask(ordinals, today=None):
+    """
+    登记时间晚于今天的行（单独计算，缓存的解析结果按当天重新检查，见 parse_cache）
+
+    Args:
+        ordinals: 登记时间的公历序数数组（无法解析为0）
+        today: 判断未来日期的基准（datetime对象），默认为当前时间
+
+    Returns:
+        numpy.ndarray: 布尔数组（能解析出日期的行必然非空，无需再判断整行是否为空）
+    """
+    return ordinals > (today or datetime.now()).toordinal()
+
+
+def has_issues(quality):
+    """
+    是否存在任何数据质量问题
+
+    Args:
+        quality: 解析结果中的 data_quality 列表
+
+    Returns:
+        bool: 任一sheet任一检查项不为空时为True
+    """
+    return any(sheet.get(key) for sheet in quality or [] for key, _ in CHECKS)
+
+
+def format_summary(quality):
+    """
+    生成状态面板中显示的数据质量摘要
+
+    Args:
+        quality: 解析结果中的 data_quality 列表
+
+    Returns:
+        str: 多行摘要文本
+    """
+    if not quality:
+        return ""
+    if not has_issues(quality):
+        total = sum(sheet['rows'] for sheet in quality)
+        return f"🔍 数据质量：共检查 {total} 行，未发现问题"
+
+    lines = ["🔍 数据质量："]
+    for sheet in quality:
+        for key, label in CHECKS:
+            rows = sheet.get(key) or []
+            if not rows:
+                continue
+            listed = "、".join(str(row) for row in rows[:MAX_LISTED_ROWS])
+            more = "等" if len(rows) > MAX_LISTED_ROWS else ""
+            lines.append(f"  • {sheet['sheet']} {label} {len(rows)} 行（第{listed}行{more}）")
+    return "\n".join(lines)
+
+
+def write_report(path, quality, excel_path=None):
+    """
+    将数据质量检查结果保存为JSON文件
+
+    Args:
+        path: 输出路径
+        quality: 解析结果中的 data_quality 列表
+        excel_path: 被检查的Excel文件路径
+
+    Returns:
+        str: 输出路径
+    """
+    document = {
+        'excel_path': excel_path,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'checks': dict(CHECKS),
+        'sheets': quality,
+    }
+    with atomic_open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    return path
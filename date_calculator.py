@@ -2,7 +2,22 @@
 日期计算模块
 用于计算本周和上周的日期范围（周一到周日）
 """
-from datetime import datetime, timedelta
+import re
+from datetime import date, datetime, timedelta
+
+# datetime64[D] 纪元（1970-01-01）对应的公历序数，用于与 date.toordinal() 互转
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# 按登记顺序相邻两条记录的月份回退达到该值时（如12月 -> 1月），视为跨入下一年
+MONTH_ROLLBACK_THRESHOLD = 6
+
+# 登记时间晚于基准日期超过该天数时，认为最后一条记录属于上一年
+FUTURE_TOLERANCE_DAYS = 31
+
+_YEAR_HINT_PATTERN = re.compile(r'(20\d{2})年')
+
+# 同比使用的周数差：52周（364天）保持周一对齐，"去年同期"即52周前的同一周
+WEEKS_PER_YEAR = 52
 
 
 def get_week_range(date=None):
@@ -33,30 +48,84 @@ def get_week_range(date=None):
     return monday, sunday
 
 
-def get_current_week_range():
+def get_current_week_range(as_of=None):
     """
     获取本周的日期范围（周一到周日）
     
+    Args:
+        as_of: 统计基准日期（datetime对象），默认为当前日期
+    
     Returns:
         tuple: (本周一, 本周日) 的datetime对象
     """
-    return get_week_range()
+    return get_week_range(as_of)
 
 
-def get_last_week_range():
+def get_last_week_range(as_of=None):
     """
     获取上周的日期范围（上周一到上周日）
     
+    Args:
+        as_of: 统计基准日期（datetime对象），默认为当前日期
+    
     Returns:
         tuple: (上周一, 上周日) 的datetime对象
     """
     # 获取上周的任意一天（本周一减7天）
-    this_monday, _ = get_current_week_range()
+    this_monday, _ = get_current_week_range(as_of)
     last_week_date = this_monday - timedelta(days=7)
     
     return get_week_range(last_week_date)
 
 
+def parse_as_of_date(value):
+    """
+    解析统计基准日期
+    
+    Args:
+        value: "YYYY-MM-DD"格式的字符串、date/datetime对象或空值
+    
+    Returns:
+        datetime: 基准日期，空值返回None（表示使用当前日期）
+    
+    Raises:
+        ValueError: 日期格式不正确
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.strptime(str(value).strip(), '%Y-%m-%d')
+
+
+def iter_week_starts(start, end):
+    """
+    列出日期区间内每一周的周一（用于历史回溯）
+    
+    Args:
+        start: 起始日期（datetime对象），所在周计入
+        end: 结束日期（datetime对象），所在周计入
+    
+    Returns:
+        list: 按时间顺序排列的周一datetime对象列表
+    
+    Raises:
+        ValueError: 起始日期晚于结束日期
+    """
+    if start > end:
+        raise ValueError(f"起始日期 {start:%Y-%m-%d} 晚于结束日期 {end:%Y-%m-%d}")
+    
+    monday, _ = get_week_range(start)
+    last_monday, _ = get_week_range(end)
+    weeks = []
+    while monday <= last_monday:
+        weeks.append(monday)
+        monday += timedelta(days=7)
+    return weeks
+
+
 def is_date_in_range(date, start_date, end_date):
     """
     判断日期是否在指定范围内
@@ -76,6 +145,8 @@ def parse_excel_date(date_str, year=2025):
     """
     解析Excel中的日期格式（月.日）为完整日期
     
+    单个值无法判断年份，批量解析整列时请使用 infer_date_ordinals（按 year_hint/as_of 推断年份）
+    
     Args:
         date_str: 日期字符串，格式为 "月.日"，例如 "1.2", "2.5"
         year: 年份，默认为2025
@@ -104,6 +175,171 @@ def parse_excel_date(date_str, year=2025):
         return None
 
 
+def extract_year_hint(text):
+    """
+    从文件名或标题中提取年份提示，例如 "2025年复盘人员明细9.22.xls" -> 2025
+    
+    Args:
+        text: 文件名或标题文本
+    
+    Returns:
+        int: 年份，未找到返回None
+    """
+    if not text:
+        return None
+    match = _YEAR_HINT_PATTERN.search(str(text))
+    return int(match.group(1)) if match else None
+
+
+def infer_date_ordinals(values, year_hint=None, as_of=None):
+    """
+    批量解析登记时间列，按行顺序推断年份，返回公历序数（date.toordinal()）
+    
+    登记表按时间顺序记录，"月.日"格式不含年份：相邻有效记录的月份回退
+    达到 MONTH_ROLLBACK_THRESHOLD 时视为跨年；月份前跳达到同样幅度时
+    （只会出现在个别录错的行之后）撤销一次跨年，避免单行错误使后续年份整体偏移。起始年份取 year_hint；
+    没有提示时以基准日期为锚点，使最后一条记录落在基准日期所在年份
+    （若因此晚于基准日期超过 FUTURE_TOLERANCE_DAYS 天，则归入上一年）。
+    单元格本身是日期类型时直接使用其日期。
+    
+    Args:
+        values: 登记时间列（可迭代对象）
+        year_hint: 第一条记录的年份（如从文件名"2025年..."中提取）
+        as_of: 统计基准日期（datetime对象），默认为当前日期
+    
+    Returns:
+        numpy.ndarray: int64公历序数数组，无法解析的行为0
+    """
+    import numpy as np
+    import pandas as pd
+    
+    column = pd.Series(values, dtype=object)
+    ordinals = np.zeros(len(column), dtype=np.int64)
+    if column.empty:
+        return ordinals
+    
+    # 日期类型的单元格直接取日期
+    is_datetime = column.map(lambda v: isinstance(v, (datetime, date))).to_numpy(dtype=bool)
+    if is_datetime.any():
+        stamps = pd.to_datetime(column[is_datetime], errors='coerce')
+        ordinals[is_datetime] = _datetime64_to_ordinals(stamps.to_numpy(dtype='datetime64[D]'))
+    
+    # "月.日"格式一次性拆分为月、日两列
+    parts = column.astype(str).str.extract(r'^\s*(\d{1,2})\.(\d{1,2})\s*$')
+    months = pd.to_numeric(parts[0], errors='coerce').to_numpy(dtype=float)
+    days = pd.to_numeric(parts[1], errors='coerce').to_numpy(dtype=float)
+    valid = ~is_datetime & (months >= 1) & (months <= 12) & (days >= 1) & (days <= 31)
+    if not valid.any():
+        return ordinals
+    
+    # 按行顺序检测月份回退（+1）和前跳（-1），累计得到每行相对第一条记录的年份偏移
+    valid_months = months[valid].astype(np.int64)
+    month_drops = valid_months[:-1] - valid_months[1:]
+    rollback = np.zeros(len(valid_months), dtype=np.int64)
+    rollback[1:] = (
+        (month_drops >= MONTH_ROLLBACK_THRESHOLD).astype(np.int64)
+        - (month_drops <= -MONTH_ROLLBACK_THRESHOLD).astype(np.int64)
+    )
+    year_offsets = np.cumsum(rollback)
+    
+    if year_hint:
+        base_year = int(year_hint)
+    else:
+        as_of = as_of or datetime.now()
+        base_year = as_of.year - int(year_offsets[-1])
+        last_month, last_day = int(valid_months[-1]), int(days[valid][-1])
+        try:
+            last_date = date(as_of.year, last_month, last_day)
+        except ValueError:
+            last_date = date(as_of.year, last_month, 1)
+        if (last_date - as_of.date()).days > FUTURE_TOLERANCE_DAYS:
+            base_year -= 1
+    
+    # 一次性组装完整日期，2.30之类的无效日期得到NaT
+    stamps = pd.to_datetime(
+        pd.DataFrame({
+            'year': base_year + year_offsets,
+            'month': valid_months,
+            'day': days[valid].astype(np.int64),
+        }),
+        errors='coerce'
+    )
+    ordinals[valid] = _datetime64_to_ordinals(stamps.to_numpy(dtype='datetime64[D]'))
+    return ordinals
+
+
+def _datetime64_to_ordinals(values):
+    """datetime64[D]数组转公历序数，NaT转为0"""
+    import numpy as np
+    
+    result = values.astype(np.int64) + EPOCH_ORDINAL
+    result[np.isnat(values)] = 0
+    return result
+
+
+def week_number(value):
+    """
+    日期所在周的整数周序号（周一到周日为一周，0001-01-01是周一，其所在周为0）
+    
+    Args:
+        value: date/datetime对象或公历序数
+    
+    Returns:
+        int: 周序号，相邻两周相差1
+    """
+    ordinal = value.toordinal() if isinstance(value, date) else int(value)
+    return (ordinal - 1) // 7
+
+
+def week_numbers(ordinals):
+    """
+    公历序数数组批量转周序号，一次整数除法完成分周
+    
+    Args:
+        ordinals: infer_date_ordinals 返回的公历序数数组
+    
+    Returns:
+        numpy.ndarray: int64周序号数组，无法解析的行（序数为0）为-1
+    """
+    import numpy as np
+    
+    return (np.asarray(ordinals, dtype=np.int64) - 1) // 7
+
+
+def same_week_last_year(week):
+    """
+    去年同期（52周前）的周序号
+    
+    Args:
+        week: 周序号
+    
+    Returns:
+        int: 去年同期的周序号
+    """
+    return week - WEEKS_PER_YEAR
+
+
+def week_histogram(weeks, first_week, last_week):
+    """
+    统计连续多周每周的记录数
+    
+    Args:
+        weeks: week_numbers 返回的周序号数组
+        first_week: 起始周序号（含）
+        last_week: 结束周序号（含）
+    
+    Returns:
+        numpy.ndarray: 长度为 last_week - first_week + 1 的计数数组，
+                       下标i对应周序号 first_week + i
+    """
+    import numpy as np
+    
+    size = last_week - first_week + 1
+    offsets = np.asarray(weeks, dtype=np.int64) - first_week
+    offsets = offsets[(offsets >= 0) & (offsets < size)]
+    return np.bincount(offsets, minlength=size)
+
+
 if __name__ == '__main__':
     # 测试代码
     print("=== 日期计算模块测试 ===\n")
@@ -2,125 +2,380 @@
 Excel解析模块
 用于读取和解析Excel中的信访登记数据
 """
-import pandas as pd
-import io
-import msoffcrypto
+import mmap
+import os
+import tempfile
+import metrics
+import profiling
+from datetime import datetime
+from data_quality import check_rows
+from person_table import PersonTable
+from source_schema import FIELD_DEFAULTS, load_sources, normalize_source, resolve_columns
+from visitor_index import VisitorIndex
 from date_calculator import (
-    parse_excel_date, 
+    extract_year_hint,
+    infer_date_ordinals,
     get_current_week_range, 
     get_last_week_range,
-    is_date_in_range
+    same_week_last_year,
+    week_histogram,
+    week_number,
+    week_numbers
 )
 
+# 解密后的工作簿超过该大小（字节）时转存到私有临时文件，避免占用大量内存
+DECRYPT_SPOOL_THRESHOLD = int(os.environ.get("REPORTGENE_DECRYPT_SPOOL_MB", "16")) * 1024 * 1024
+
+# 统计重复来访人员的周数（含本周）及列出的人数
+REPEAT_WINDOW_WEEKS = 8
+TOP_REPEAT_VISITORS = 10
+
 
 class ExcelParser:
     """Excel数据解析器"""
     
-    def __init__(self, excel_path, password=None):
+    def __init__(self, excel_path, password=None, as_of=None, year_hint=None, sources=None,
+                 repeat_window_weeks=REPEAT_WINDOW_WEEKS, parse_cache=None, excel_digest=None):
         """
         初始化Excel解析器
         
         Args:
             excel_path: Excel文件路径
             password: Excel文件密码（如果文件有密码保护）
+            as_of: 统计基准日期（datetime对象），默认为当前日期
+            year_hint: 登记表第一条记录的年份，默认从文件名或标题行（如"2025年..."）中提取
+            sources: 登记来源配置列表，默认由 source_schema.load_sources 读取
+            repeat_window_weeks: 统计登记次数最多人员的周数（含本周）
+            parse_cache: 解析结果缓存（parse_cache.ParseCache），同一登记表再次解析时不再解密和读取
+            excel_digest: 已计算的Excel内容摘要（如结果缓存已计算），供解析结果缓存使用，避免重复读取文件
         """
         self.excel_path = excel_path
         self.password = password
-        self.sunshine_sheet_name = "阳光xf登记"
-        self.gab_sheet_name = "gab上访"
+        self.as_of = as_of or datetime.now()
+        self.year_hint = year_hint or extract_year_hint(os.path.basename(excel_path))
+        self.sources = sources or load_sources()
+        self.repeat_window_weeks = repeat_window_weeks
+        self.parse_cache = parse_cache
+        self.excel_digest = excel_digest
+        self.visitors = None
         self.decrypted_file = None
+        self._decrypted_size = 0
+        self._decrypted_map = None
+        self._workbook = None
+        self._sheets = None
         
-        # 获取本周和上周的日期范围
-        self.current_week_start, self.current_week_end = get_current_week_range()
-        self.last_week_start, self.last_week_end = get_last_week_range()
+        # 推断登记年份的锚点：登记表中不会出现晚于当前时间的记录
+        self.reference_date = max(self.as_of, datetime.now())
         
-        # 如果提供了密码，先解密文件
-        if self.password:
-            self._decrypt_file()
+        # 获取本周和上周的日期范围
+        self.current_week_start, self.current_week_end = get_current_week_range(self.as_of)
+        self.last_week_start, self.last_week_end = get_last_week_range(self.as_of)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def _decrypt_file(self):
-        """解密Excel文件"""
+        """
+        解密Excel文件
+        
+        解密结果写入SpooledTemporaryFile：小文件留在内存中，
+        超过 DECRYPT_SPOOL_THRESHOLD 时自动转存到私有临时文件（创建后即删除目录项）
+        """
+        import msoffcrypto  # 延迟导入，仅在需要解密时加载
+        
         try:
-            with open(self.excel_path, 'rb') as f:
+            with metrics.stage('decrypt'), open(self.excel_path, 'rb') as f:
                 file = msoffcrypto.OfficeFile(f)
                 file.load_key(password=self.password)
                 
-                # 将解密后的内容存储在内存中
-                self.decrypted_file = io.BytesIO()
+                self.decrypted_file = tempfile.SpooledTemporaryFile(
+                    max_size=DECRYPT_SPOOL_THRESHOLD, prefix='reportgene_'
+                )
                 file.decrypt(self.decrypted_file)
+                self._decrypted_size = self.decrypted_file.tell()
                 self.decrypted_file.seek(0)
         except Exception as e:
             print(f"解密文件失败: {e}")
+            self.close()
+    
+    def _open_workbook(self):
+        """
+        打开工作簿，返回pandas.ExcelFile
+        
+        解密后的数据不再复制：.xlsx直接通过文件句柄读取；
+        .xls在数据已转存到磁盘时通过内存映射交给xlrd
+        """
+        import pandas as pd  # 延迟导入，避免模块加载时引入pandas
+        
+        if self.password and self.decrypted_file is None:
+            self._decrypt_file()
+        
+        is_xls = self.excel_path.endswith('.xls')
+        engine = 'xlrd' if is_xls else 'openpyxl'
+        source = self.excel_path
+        
+        if self.decrypted_file is not None:
+            self.decrypted_file.seek(0)
+            source = self.decrypted_file
+            if is_xls and self._decrypted_size > DECRYPT_SPOOL_THRESHOLD:
+                import xlrd
+                
+                self._decrypted_map = mmap.mmap(
+                    self.decrypted_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+                source = xlrd.open_workbook(file_contents=self._decrypted_map)
+        
+        return pd.ExcelFile(source, engine=engine)
+    
+    def _read_sheet(self, sheet_name):
+        """读取指定sheet的原始数据（不使用header）"""
+        if self._workbook is not None:
+            return self._workbook.parse(sheet_name, header=None)
+        
+        try:
+            self._workbook = self._open_workbook()
+            return self._workbook.parse(sheet_name, header=None)
+        finally:
+            self.close()
+    
+    def close(self):
+        """释放工作簿、内存映射和解密后的临时数据"""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        if self._decrypted_map is not None:
+            self._decrypted_map.close()
+            self._decrypted_map = None
+        if self.decrypted_file is not None:
+            self.decrypted_file.close()
             self.decrypted_file = None
+            self._decrypted_size = 0
     
-    def parse_sheet(self, sheet_name):
+    def _load_sheet(self, source, frames=None):
         """
-        解析指定sheet的数据
+        读取来源对应的sheet并整列推断登记日期所在周
         
         Args:
-            sheet_name: sheet名称
+            source: 登记来源配置
+            frames: {sheet名称: 已读取的DataFrame}，多个来源共用同一sheet时只读取一次
         
         Returns:
-            dict: 包含本周和上周人数及详细信息的字典
+            dict: {'data': 数据行（只保留人员字段，见 _normalize_rows）,
+                   'ordinals': 登记日期的公历序数（无法解析为0）,
+                   'weeks': 登记日期的周序号（无法解析为-1）, 'first_week': 最早的周序号,
+                   'columns': {字段: 字段}, 'quality': 数据质量检查结果,
+                   'anchored': 登记年份是否以统计基准日期为锚点推断（没有年份提示）}，
+                  失败时为 {'error': 错误信息}
         """
         try:
             # 读取Excel的指定sheet（不使用header，原始读取）
-            excel_source = self.decrypted_file if self.decrypted_file else self.excel_path
+            frames = {} if frames is None else frames
+            if source['sheet'] not in frames:
+                with metrics.stage('read'):
+                    frames[source['sheet']] = self._read_sheet(source['sheet'])
+            df = frames[source['sheet']]
             
-            if self.excel_path.endswith('.xls'):
-                df = pd.read_excel(excel_source, sheet_name=sheet_name, engine='xlrd', header=None)
-            else:
-                df = pd.read_excel(excel_source, sheet_name=sheet_name, engine='openpyxl', header=None)
+            # 按表头文字定位各字段所在列（相同布局的结果已缓存）
+            header_row = source['header_row']
+            header = df.iloc[header_row].tolist() if len(df) > header_row else []
+            columns = resolve_columns(header, source)
             
             # 检查表格格式
-            if len(df.columns) < 2:
-                return {'current_week': 0, 'last_week': 0, 'error': '表格格式不正确'}
+            if columns['date'] not in df.columns:
+                return {'error': '表格格式不正确'}
             
-            current_week_count = 0
-            last_week_count = 0
-            current_week_persons = []  # 本周人员详细信息
-            
-            # 从第3行开始遍历数据（跳过标题和空行，索引从0开始，实际第3行是索引2）
-            for idx in range(2, len(df)):
-                date_value = df.iloc[idx, 1]  # B列（登记时间）
+            with metrics.stage('classify'):
+                # 表头之后为数据（默认跳过标题和表头，从第3行开始）
+                data = df.iloc[header_row + 1:]
+                year_hint = self.year_hint or extract_year_hint(df.iloc[0, 0] if len(df) else None)
                 
-                # 解析日期
-                parsed_date = parse_excel_date(date_value)
+                # 以当前时间为锚点推断年份，保证不同统计基准日期下的日期一致
+                ordinals = infer_date_ordinals(
+                    data[columns['date']].to_numpy(), year_hint=year_hint, as_of=self.reference_date
+                )
+                # 分周只需一次整数除法，后续按周统计都是整数比较
+                weeks = week_numbers(ordinals)
                 
-                if parsed_date:
-                    # 提取行数据
-                    unit = df.iloc[idx, 9] if pd.notna(df.iloc[idx, 9]) else ""  # 责任单位（J列，索引9）
-                    name = df.iloc[idx, 2] if pd.notna(df.iloc[idx, 2]) else "XX"  # 姓名（C列，索引2）
-                    travel_method = df.iloc[idx, 16] if pd.notna(df.iloc[idx, 16]) else ""  # 进京方式（Q列，索引16）
-                    group_appeal = df.iloc[idx, 18] if pd.notna(df.iloc[idx, 18]) else ""  # 群体诉求（S列，索引18）
-                    
-                    # 判断是否在本周
-                    if is_date_in_range(parsed_date, self.current_week_start, self.current_week_end):
-                        current_week_count += 1
-                        current_week_persons.append({
-                            'unit': str(unit),
-                            'name': str(name),
-                            'travel_method': str(travel_method),
-                            'group_appeal': str(group_appeal)
-                        })
-                    # 判断是否在上周
-                    elif is_date_in_range(parsed_date, self.last_week_start, self.last_week_end):
-                        last_week_count += 1
+                # 同一批整列数据上完成数据质量检查
+                quality = check_rows(data, ordinals, columns)
+                data = self._normalize_rows(data, columns)
             
-            return {
-                'current_week': current_week_count,
-                'last_week': last_week_count,
-                'persons': current_week_persons
-            }
+            metrics.count('rows_scanned', len(data))
+            return {'data': data, 'ordinals': ordinals, 'weeks': weeks,
+                    'columns': {field: field for field in FIELD_DEFAULTS},
+                    'first_week': self._first_week(weeks), 'quality': quality, 'anchored': year_hint is None}
             
         except Exception as e:
-            return {
-                'current_week': 0,
-                'last_week': 0,
-                'persons': [],
-                'error': str(e)
-            }
+            return {'error': str(e)}
+    
+    def _read_sheets(self):
+        """解密、打开工作簿并读取全部来源的sheet，完成后立即释放解密数据"""
+        try:
+            self._workbook = self._open_workbook()
+            frames = {}
+            return {source['prefix']: self._load_sheet(source, frames) for source in self.sources}
+        except Exception as e:
+            return {source['prefix']: {'error': str(e)} for source in self.sources}
+        finally:
+            self.close()
+    
+    @staticmethod
+    def _normalize_rows(data, columns):
+        """
+        只保留人员字段的数据行：列名为字段名，非空值转为字符串，空值保持为空，
+        列不存在时整列为空（与 _column_text 的取值一致）；行索引保持为sheet中的行索引
+        """
+        import pandas as pd
+        
+        return pd.DataFrame({
+            field: data[columns[field]].astype(str).where(data[columns[field]].notna())
+            if columns.get(field) is not None and columns[field] in data.columns
+            else pd.Series(None, index=data.index, dtype=object)
+            for field in FIELD_DEFAULTS
+        }, index=data.index)
+    
+    def load(self):
+        """
+        读取全部来源的sheet，结果缓存在实例上供多个统计周期复用
+        
+        工作簿只解密、打开一次，读取完成后立即释放解密数据；
+        同时建立跨全部来源的重复来访索引（self.visitors）。
+        指定解析结果缓存时，相同的登记表（内容、密码和来源配置均相同）直接使用缓存的数据行
+        
+        Returns:
+            dict: {来源前缀: _load_sheet的结果}
+        """
+        if self._sheets is not None:
+            return self._sheets
+        
+        if self.parse_cache is None:
+            sheets = self._read_sheets()
+        else:
+            cache = self.parse_cache
+            with metrics.stage('parse_cache'):
+                cache_key = cache.key(self.excel_path, self.sources, self.year_hint,
+                                      excel_digest=self.excel_digest)
+            # 多个工作进程同时解析同一份登记表时只读取一次，其余进程等锁释放后直接命中
+            with cache.lock(cache_key):
+                with metrics.stage('parse_cache'):
+                    sheets = cache.get(cache_key, self.reference_date, password=self.password)
+                if sheets is None:
+                    sheets = self._read_sheets()
+                    # 读取失败（如密码错误）的结果不缓存
+                    if not any('error' in sheet for sheet in sheets.values()):
+                        cache.put(cache_key, sheets, self.reference_date, password=self.password)
+        
+        with metrics.stage('index'):
+            self.visitors = self._build_visitor_index(sheets)
+        
+        self._sheets = sheets
+        return sheets
+    
+    def _build_visitor_index(self, sheets):
+        """建立 (责任单位, 姓名) -> 全部登记日期 的索引，同一人在不同来源的登记合并计算"""
+        import numpy as np
+        
+        units, names, ordinals = [], [], []
+        for sheet in sheets.values():
+            if 'error' in sheet:
+                continue
+            data, columns = sheet['data'], sheet['columns']
+            units += self._column_text(data, columns.get('unit'), "")
+            names += self._column_text(data, columns.get('name'), "")
+            ordinals.append(sheet['ordinals'])
+        
+        return VisitorIndex(
+            units, names, np.concatenate(ordinals) if ordinals else np.zeros(0, dtype=np.int64)
+        )
+    
+    @staticmethod
+    def _first_week(weeks):
+        """有效登记中最早的周序号，没有有效登记时为None"""
+        valid = weeks[weeks >= 0]
+        return int(valid.min()) if len(valid) else None
     
+    def _summarize_sheet(self, sheet, current_week, histogram=None):
+        """
+        统计单个sheet在指定周、上一周和去年同期的人数，以及该周人员详细信息
+        
+        Args:
+            sheet: _load_sheet的结果
+            current_week: 本周的周序号
+            histogram: (起始周序号, 每周人数数组)，需覆盖去年同期到本周；为空时现场统计
+        
+        Returns:
+            dict: 包含本周、上周、去年同期人数及本周人员（PersonTable）的字典；
+                  has_last_year 表示登记数据是否覆盖去年同期
+        """
+        last_year_week = same_week_last_year(current_week)
+        if 'error' in sheet:
+            return {'current_week': 0, 'last_week': 0, 'last_year': 0, 'has_last_year': False,
+                    'persons': PersonTable.empty(), 'error': sheet['error']}
+        
+        data, weeks = sheet['data'], sheet['weeks']
+        
+        with metrics.stage('classify'):
+            first_week, counts = histogram or (
+                last_year_week, week_histogram(weeks, last_year_week, current_week)
+            )
+            current_week_count = int(counts[current_week - first_week])
+            last_week_count = int(counts[current_week - 1 - first_week])
+            last_year_count = int(counts[last_year_week - first_week])
+            
+            # 提取本周人员详细信息（按列保存，分类字段编码）
+            current_mask = weeks == current_week
+            current_rows = data[current_mask]
+            current_week_persons = PersonTable.from_columns({
+                field: self._column_text(current_rows, sheet['columns'].get(field), default)
+                for field, default in FIELD_DEFAULTS.items()
+            })
+        
+        metrics.count('persons_matched', current_week_count)
+        
+        return {
+            'current_week': current_week_count,
+            'last_week': last_week_count,
+            'last_year': last_year_count,
+            'has_last_year': sheet['first_week'] is not None and sheet['first_week'] <= last_year_week,
+            'persons': current_week_persons
+        }
+    
+    def parse_sheet(self, sheet_name):
+        """
+        解析指定sheet的数据
+        
+        Args:
+            sheet_name: sheet名称
+        
+        Returns:
+            dict: 包含本周和上周人数及详细信息的字典
+        """
+        source = self._source_for_sheet(sheet_name)
+        if self._sheets is not None and source['prefix'] in self._sheets:
+            sheet = self._sheets[source['prefix']]
+        else:
+            sheet = self._load_sheet(source)
+        return self._summarize_sheet(sheet, week_number(self.as_of))
+    
+    def _source_for_sheet(self, sheet_name):
+        """按sheet名称查找来源配置，未配置的sheet使用默认列布局"""
+        for source in self.sources:
+            if source['sheet'] == sheet_name:
+                return source
+        return normalize_source({'prefix': 'adhoc', 'sheet': sheet_name})
+    
+    @staticmethod
+    def _column_text(rows, index, default):
+        """取出指定列并转为字符串列表，空值替换为默认值；列不存在时全部为默认值"""
+        if index is None or index not in rows.columns:
+            return [default] * len(rows)
+        column = rows[index]
+        return column.where(column.notna(), default).astype(str).tolist()
+    
+    @profiling.profiled('parse_all')
     def parse_all(self):
         """
         解析所有sheet的数据
@@ -128,93 +383,275 @@ class ExcelParser:
         Returns:
             dict: 包含所有统计数据的字典
         """
-        # 解析"阳光xf登记"sheet
-        sunshine_data = self.parse_sheet(self.sunshine_sheet_name)
+        return self._aggregate(self.load(), week_number(self.as_of))
+    
+    def weekly_counts(self, first_week, last_week):
+        """
+        统计各sheet连续多周的每周登记人数（一次bincount完成）
         
-        # 解析"gab上访"sheet
-        gab_data = self.parse_sheet(self.gab_sheet_name)
+        Args:
+            first_week: 起始周序号（含），见 date_calculator.week_number
+            last_week: 结束周序号（含）
         
-        # 合并本周所有人员
-        all_persons = sunshine_data.get('persons', []) + gab_data.get('persons', [])
+        Returns:
+            dict: {来源前缀: 每周人数数组（下标i对应周序号 first_week + i）}，
+                  读取失败的来源不包含在内
+        """
+        return {
+            prefix: week_histogram(sheet['weeks'], first_week, last_week)
+            for prefix, sheet in self.load().items() if 'error' not in sheet
+        }
+    
+    def window_fingerprint(self, current_week=None):
+        """
+        统计窗口内数据的指纹，只覆盖报告用到的行和列
+
+        包括本周至近N周（重复来访统计窗口，至少含上周）和去年同期的登记行的周序号及人员字段，
+        以及本周人员此前的登记次数（依赖全部历史登记）。只修改了更早的行或报告不用的列时指纹不变
+
+        Args:
+            current_week: 本周的周序号，默认为统计基准日期所在周
+
+        Returns:
+            str: 十六进制指纹
+        """
+        import hashlib
+
+        sheets = self.load()
+        current_week = week_number(self.as_of) if current_week is None else current_week
+        last_year_week = same_week_last_year(current_week)
+        first_window_week = current_week - max(self.repeat_window_weeks, 2) + 1
+
+        digest = hashlib.sha256()
+        current_keys = []
+        for source in self.sources:
+            sheet = sheets[source['prefix']]
+            digest.update(f"\x1e{source['prefix']}\x1e".encode('utf-8'))
+            if 'error' in sheet:
+                digest.update(sheet['error'].encode('utf-8'))
+                continue
+
+            weeks = sheet['weeks']
+            mask = ((weeks >= first_window_week) & (weeks <= current_week)) | (weeks == last_year_week)
+            rows = sheet['data'][mask]
+            has_last_year = sheet['first_week'] is not None and sheet['first_week'] <= last_year_week
+            digest.update(weeks[mask].tobytes())
+            digest.update(b'1' if has_last_year else b'0')
+
+            columns = {
+                field: self._column_text(rows, sheet['columns'].get(field), default)
+                for field, default in FIELD_DEFAULTS.items()
+            }
+            for values in columns.values():
+                digest.update('\x1f'.join(values).encode('utf-8'))
+            current_keys += [
+                (unit, name)
+                for unit, name, week in zip(columns['unit'], columns['name'], weeks[mask])
+                if week == current_week
+            ]
+
+        if self.visitors is not None:
+            repeat = self.visitors.repeat_visitors(current_keys, current_week * 7 + 1)
+            digest.update(repr(repeat).encode('utf-8'))
+        return digest.hexdigest()
+
+    @profiling.profiled('parse_weeks')
+    def parse_weeks(self, as_of_dates):
+        """
+        按多个统计基准日期分别汇总（历史回溯），工作簿只解密、读取一次
         
-        # 汇总数据
-        result = {
-            # 阳光xf登记数据
-            'sunshine_current': sunshine_data['current_week'],
-            'sunshine_last': sunshine_data['last_week'],
-            
-            # gab上访数据
-            'gab_current': gab_data['current_week'],
-            'gab_last': gab_data['last_week'],
-            
-            # 总计
-            'total_current': sunshine_data['current_week'] + gab_data['current_week'],
-            
-            # 环比趋势
-            'sunshine_trend': self._calculate_trend(
-                sunshine_data['current_week'], 
-                sunshine_data['last_week']
-            ),
-            'gab_trend': self._calculate_trend(
-                gab_data['current_week'], 
-                gab_data['last_week']
-            ),
+        Args:
+            as_of_dates: 统计基准日期列表（datetime对象）
+        
+        Returns:
+            list: 每个基准日期一项，包含 as_of、current_week_start/end、
+                  last_week_start/end 和 data（与parse_all结果相同）
+        """
+        sheets = self.load()
+        if not as_of_dates:
+            return []
+        
+        # 所有周（含最早一周的去年同期）的人数一次统计完成
+        current_weeks = [week_number(as_of) for as_of in as_of_dates]
+        first_week = same_week_last_year(min(current_weeks))
+        histograms = {
+            name: (first_week, counts)
+            for name, counts in self.weekly_counts(first_week, max(current_weeks)).items()
+        }
+        
+        results = []
+        for as_of, current_week in zip(as_of_dates, current_weeks):
+            current_start, current_end = get_current_week_range(as_of)
+            last_start, last_end = get_last_week_range(as_of)
+            results.append({
+                'as_of': as_of,
+                'current_week_start': current_start,
+                'current_week_end': current_end,
+                'last_week_start': last_start,
+                'last_week_end': last_end,
+                'data': self._aggregate(sheets, current_week, histograms),
+            })
+        return results
+    
+    def _aggregate(self, sheets, current_week, histograms=None):
+        """
+        汇总全部来源在指定周及其上一周的统计数据
+        
+        每个来源生成 <前缀>_current、<前缀>_last、<前缀>_trend、<前缀>_persons_text，
+        地区、诉求和进京方式统计基于全部来源的本周人员
+        
+        Args:
+            sheets: load的结果
+            current_week: 本周的周序号
+            histograms: {来源前缀: (起始周序号, 每周人数数组)}，为空时现场统计
+        
+        Returns:
+            dict: 包含所有统计数据的字典
+        """
+        histograms = histograms or {}
+        summaries = [
+            (source, self._summarize_sheet(
+                sheets[source['prefix']], current_week, histograms.get(source['prefix'])
+            ))
+            for source in self.sources
+        ]
+        
+        with metrics.stage('aggregate'):
+            # 合并本周所有人员（按来源标注），各类人数统计都是对分类编码的bincount
+            all_persons = PersonTable.concat(
+                [summary['persons'] for _, summary in summaries],
+                sources=[source['prefix'] for source, _ in summaries]
+            )
+            counters = {
+                field: all_persons.counts(field) for field in ('unit', 'group_appeal', 'travel_method')
+            }
             
-            # 格式化的人员信息
-            'sunshine_persons_text': self._format_persons_list(sunshine_data.get('persons', [])),
-            'gab_persons_text': self._format_persons_list(gab_data.get('persons', [])),
+            # 本周人员（姓名脱敏，与报告中一致），供统计数据导出
+            persons = all_persons.with_names([self._mask_name(name) for name in all_persons.names])
             
-            # 地区统计
-            'area_stats_text': self._format_area_stats(all_persons),
+            result = {
+                # 来源列表（顺序与配置一致）
+                'sources': [
+                    {'prefix': source['prefix'], 'sheet': source['sheet'], 'label': source['label']}
+                    for source in self.sources
+                ],
+                
+                # 总计
+                'total_current': sum(summary['current_week'] for _, summary in summaries),
+                
+                # 去年同期（52周前的同一周）
+                'total_last_year': sum(summary['last_year'] for _, summary in summaries),
+                'has_last_year': any(summary['has_last_year'] for _, summary in summaries),
+                
+                # 地区统计
+                'area_stats_text': self._format_area_stats(counters['unit']),
+                
+                # 群体诉求统计
+                'group_appeal_text': self._format_group_appeal_stats(counters['group_appeal']),
+                
+                # 进京方式统计
+                'travel_road_count': all_persons.count_containing('travel_method', '公路'),
+                'travel_stats_text': self._format_travel_stats(counters['travel_method']),
+                
+                # 分类计数（按人数从多到少）和本周人员列表（列式，见 person_table）
+                'counters': counters,
+                'persons': persons.to_dict(),
+                
+                # 数据质量（与统计周期无关，每个sheet读取时检查一次）
+                'data_quality': [
+                    dict(prefix=source['prefix'], sheet=source['sheet'], **sheets[source['prefix']]['quality'])
+                    for source in self.sources if 'quality' in sheets[source['prefix']]
+                ],
+                
+                # 错误信息
+                'errors': []
+            }
             
-            # 群体诉求统计
-            'group_appeal_text': self._format_group_appeal_stats(all_persons),
+            # 重复来访：本周登记人员中此前登记过的人，以及近N周登记次数最多的人
+            result.update(self._repeat_visitor_stats(
+                zip(all_persons.column('unit'), all_persons.names), current_week
+            ))
             
-            # 进京方式统计
-            'travel_road_count': self._count_travel_method(all_persons, '公路'),
-            'travel_stats_text': self._format_travel_stats(all_persons),
+            # 各来源的本周、上周人数，环比趋势和格式化的人员信息
+            for source, summary in summaries:
+                prefix = source['prefix']
+                result[f'{prefix}_current'] = summary['current_week']
+                result[f'{prefix}_last'] = summary['last_week']
+                result[f'{prefix}_trend'] = self._calculate_trend(
+                    summary['current_week'], summary['last_week']
+                )
+                result[f'{prefix}_persons_text'] = self._format_persons_list(summary['persons'])
+                result[f'{prefix}_last_year'] = summary['last_year']
+                result[f'{prefix}_yoy_trend'] = self._yoy_trend(
+                    summary['current_week'], summary['last_year'], summary['has_last_year']
+                )
             
-            # 错误信息
-            'errors': []
-        }
+            result['total_yoy_trend'] = self._yoy_trend(
+                result['total_current'], result['total_last_year'], result['has_last_year']
+            )
         
         # 收集错误信息
-        if 'error' in sunshine_data:
-            result['errors'].append(f"阳光xf登记: {sunshine_data['error']}")
-        if 'error' in gab_data:
-            result['errors'].append(f"gab上访: {gab_data['error']}")
+        for source, summary in summaries:
+            if 'error' in summary:
+                result['errors'].append(f"{source['sheet']}: {summary['error']}")
         
         return result
     
+    def _repeat_visitor_stats(self, persons, current_week):
+        """
+        统计重复来访人员
+        
+        Args:
+            persons: 本周登记人员的 (责任单位, 姓名)
+            current_week: 本周的周序号
+        
+        Returns:
+            dict: repeat_visitor_count、repeat_visitors_text、top_repeat_visitors_text、repeat_window_weeks
+        """
+        if self.visitors is None:
+            return {'repeat_visitor_count': 0, 'repeat_visitors_text': "",
+                    'top_repeat_visitors_text': "", 'repeat_window_weeks': self.repeat_window_weeks}
+        
+        week_first_ordinal = current_week * 7 + 1
+        repeat = self.visitors.repeat_visitors(persons, week_first_ordinal)
+        top = self.visitors.top_visitors(
+            (current_week - self.repeat_window_weeks + 1) * 7 + 1,
+            week_first_ordinal + 6,
+            limit=TOP_REPEAT_VISITORS
+        )
+        
+        return {
+            'repeat_visitor_count': len(repeat),
+            'repeat_visitors_text': "、".join(
+                f"{unit}{self._mask_name(name)}（此前登记{count}次）" for unit, name, count in repeat
+            ),
+            'top_repeat_visitors_text': "、".join(
+                f"{unit}{self._mask_name(name)}{count}次" for unit, name, count in top
+            ),
+            'repeat_window_weeks': self.repeat_window_weeks,
+        }
+    
+    @staticmethod
+    def _mask_name(name):
+        """隐藏姓名的最后一个字"""
+        return name[:-1] + 'X' if len(name) > 1 else name
+    
     def _format_persons_list(self, persons):
-        """格式化人员列表为：单位+姓名 格式"""
-        if not persons:
+        """格式化人员列表（PersonTable）为：单位+姓名 格式"""
+        if not len(persons):
             return ""
         
         formatted = []
-        for p in persons:
-            unit = p.get('unit', '')
-            name = p.get('name', 'XX')
-            # 隐藏姓名的最后一个字
-            if len(name) > 1:
-                name = name[:-1] + 'X'
-            formatted.append(f"{unit}{name}")
+        for unit, name in zip(persons.column('unit'), persons.names):
+            formatted.append(f"{unit}{self._mask_name(name)}")
         
         return "、".join(formatted)
     
-    def _format_area_stats(self, persons):
-        """统计各地区人数"""
-        from collections import Counter
-        
-        area_counter = Counter()
-        for p in persons:
-            unit = p.get('unit', '')
-            if unit:
-                area_counter[unit] += 1
-        
+    def _format_area_stats(self, area_counter):
+        """格式化各地区人数（{地区: 人数}，按人数从多到少）"""
         # 格式化输出
         stats_parts = []
-        for area, count in sorted(area_counter.items(), key=lambda x: -x[1]):
+        for area, count in area_counter.items():
             if count > 1:
                 stats_parts.append(f"{area}{count}人")
             else:
@@ -222,49 +659,30 @@ class ExcelParser:
         
         return "，".join(stats_parts) if stats_parts else ""
     
-    def _format_group_appeal_stats(self, persons):
-        """统计群体诉求类型及人数"""
-        from collections import Counter
-        
-        appeal_counter = Counter()
-        for p in persons:
-            appeal = p.get('group_appeal', '').strip()
-            if appeal and appeal not in ['nan', '']:
-                appeal_counter[appeal] += 1
-        
+    def _format_group_appeal_stats(self, appeal_counter):
+        """格式化群体诉求类型及人数（{诉求: 人数}，按人数从多到少）"""
         # 格式化输出
         stats_parts = []
-        for appeal, count in sorted(appeal_counter.items(), key=lambda x: -x[1]):
+        for appeal, count in appeal_counter.items():
             stats_parts.append(f"{appeal}{count}人")
         
         return "、".join(stats_parts) if stats_parts else "无"
     
-    def _count_travel_method(self, persons, method):
-        """统计特定进京方式的人数"""
-        count = 0
-        for p in persons:
-            travel = p.get('travel_method', '').strip()
-            if method in travel:
-                count += 1
-        return count
-    
-    def _format_travel_stats(self, persons):
-        """统计所有进京方式及人数"""
-        from collections import Counter
-        
-        travel_counter = Counter()
-        for p in persons:
-            travel = p.get('travel_method', '').strip()
-            if travel and travel not in ['nan', '']:
-                travel_counter[travel] += 1
-        
+    def _format_travel_stats(self, travel_counter):
+        """格式化所有进京方式及人数（{进京方式: 人数}，按人数从多到少）"""
         # 格式化输出
         stats_parts = []
-        for travel, count in sorted(travel_counter.items(), key=lambda x: -x[1]):
+        for travel, count in travel_counter.items():
             stats_parts.append(f"{travel}{count}人")
         
         return "、".join(stats_parts) if stats_parts else "无"
     
+    def _yoy_trend(self, current, last_year, has_last_year):
+        """同比趋势，登记数据未覆盖去年同期时不做比较"""
+        if not has_last_year:
+            return "无去年同期数据"
+        return self._calculate_trend(current, last_year)
+    
     def _calculate_trend(self, current, last):
         """
         计算环比趋势
@@ -302,8 +720,9 @@ def test_parser():
         print(f"上周日期范围: {parser.last_week_start.strftime('%Y-%m-%d')} 到 {parser.last_week_end.strftime('%Y-%m-%d')}\n")
         
         print("统计结果:")
-        print(f"  阳光xf登记 - 本周: {result['sunshine_current']}人, 上周: {result['sunshine_last']}人, 环比: {result['sunshine_trend']}")
-        print(f"  gab上访 - 本周: {result['gab_current']}人, 上周: {result['gab_last']}人, 环比: {result['gab_trend']}")
+        for source in result['sources']:
+            prefix = source['prefix']
+            print(f"  {source['sheet']} - 本周: {result[prefix + '_current']}人, 上周: {result[prefix + '_last']}人, 环比: {result[prefix + '_trend']}")
         print(f"  总计 - 本周: {result['total_current']}人")
         
         if result['errors']:
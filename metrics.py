@@ -0,0 +1,273 @@
+"""
+性能指标模块
+记录报告生成各阶段的耗时分布和吞吐量计数，
+以Prometheus文本格式对外提供，并可选输出结构化JSON日志
+
+环境变量:
+    REPORTGENE_METRICS_LOG: JSON日志文件路径（每个请求一行），为空则不输出
+"""
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 耗时分布的桶边界（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 单次请求计数量的桶边界（行数/人数/字节数）
+SIZE_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+# 每个请求统计的计数项
+COUNTERS = ('rows_scanned', 'persons_matched', 'bytes_processed')
+
+_current_request = ContextVar('reportgene_current_request', default=None)
+
+
+class Histogram:
+    """带标签的累积直方图"""
+
+    def __init__(self, name, help_text, buckets, label_name):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_name = label_name
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label, value):
+        """记录一个观测值"""
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        """输出Prometheus文本格式"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label in sorted(self._series):
+                series = self._series[label]
+                prefix = f'{self.label_name}="{label}"'
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{prefix},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{prefix},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{prefix}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{prefix}}} {series["count"]}')
+        return lines
+
+
+class Counter:
+    """带标签的单调递增计数器"""
+
+    def __init__(self, name, help_text, label_name):
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label, amount=1):
+        """计数器增加指定数值"""
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def render(self):
+        """输出Prometheus文本格式"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label in sorted(self._values):
+                lines.append(f'{self.name}{{{self.label_name}="{label}"}} {self._values[label]}')
+        return lines
+
+
+stage_duration = Histogram(
+    'reportgene_stage_duration_seconds', '各处理阶段耗时（秒）', DURATION_BUCKETS, 'stage')
+request_duration = Histogram(
+    'reportgene_request_duration_seconds', '单次请求总耗时（秒）', DURATION_BUCKETS, 'kind')
+request_size = Histogram(
+    'reportgene_request_size', '单次请求的扫描行数、匹配人数和处理字节数', SIZE_BUCKETS, 'counter')
+totals = Counter('reportgene_processed_total', '累计扫描行数、匹配人数和处理字节数', 'counter')
+requests_total = Counter('reportgene_requests_total', '按结果统计的请求数', 'status')
+
+
+@contextmanager
+def stage(name):
+    """
+    记录一个处理阶段的耗时
+
+    用法:
+        with metrics.stage('decrypt'):
+            ...
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_duration.observe(name, elapsed)
+        record = _current_request.get()
+        if record is not None:
+            record['stages'][name] = round(record['stages'].get(name, 0.0) + elapsed, 6)
+
+
+def count(name, amount):
+    """
+    累加一个计数项（rows_scanned / persons_matched / bytes_processed）
+
+    Args:
+        name: 计数项名称
+        amount: 增加的数值
+    """
+    totals.inc(name, amount)
+    record = _current_request.get()
+    if record is not None:
+        record['counts'][name] = record['counts'].get(name, 0) + amount
+
+
+@contextmanager
+def collect():
+    """
+    在独立的记录中收集阶段耗时和计数（不计为一次请求）
+
+    用于工作进程：把明细带回主进程后由 merge 合并到发起请求的记录中
+
+    Yields:
+        dict: {'stages': {阶段名: 耗时}, 'counts': {计数项: 数值}}
+    """
+    record = {'stages': {}, 'counts': {}}
+    token = _current_request.set(record)
+    try:
+        yield record
+    finally:
+        _current_request.reset(token)
+
+
+def merge(collected):
+    """
+    将其他进程收集（见 collect）的阶段耗时和计数合并到当前进程的指标和当前请求中
+
+    Args:
+        collected: collect 产生的记录
+    """
+    record = _current_request.get()
+    for name, elapsed in collected['stages'].items():
+        stage_duration.observe(name, elapsed)
+        if record is not None:
+            record['stages'][name] = round(record['stages'].get(name, 0.0) + elapsed, 6)
+    for name, amount in collected['counts'].items():
+        count(name, amount)
+
+
+def current_request_id():
+    """返回当前请求ID，不在请求中时返回None"""
+    record = _current_request.get()
+    return record['request_id'] if record is not None else None
+
+
+def tracked_request(kind, outcome=None):
+    """
+    装饰器：将函数调用作为一次请求统计
+
+    Args:
+        kind: 请求类型（如 ui、cli）
+        outcome: 可选，根据返回值判断是否成功的函数
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            record = {
+                'request_id': uuid.uuid4().hex[:12],
+                'kind': kind,
+                'stages': {},
+                'counts': {},
+            }
+            token = _current_request.set(record)
+            started = time.perf_counter()
+            status = 'error'
+            try:
+                result = func(*args, **kwargs)
+                status = 'ok' if outcome is None or outcome(result) else 'failed'
+                return result
+            finally:
+                _current_request.reset(token)
+                record['status'] = status
+                record['duration'] = round(time.perf_counter() - started, 6)
+                _finish_request(record)
+        return wrapper
+    return decorator
+
+
+def _finish_request(record):
+    """请求结束时汇总指标并写入JSON日志"""
+    request_duration.observe(record['kind'], record['duration'])
+    requests_total.inc(record['status'])
+    for name in COUNTERS:
+        request_size.observe(name, record['counts'].get(name, 0))
+
+    log_path = os.environ.get('REPORTGENE_METRICS_LOG')
+    if log_path:
+        record['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            print(f"写入指标日志失败: {e}")
+
+
+def render_prometheus():
+    """
+    生成Prometheus文本格式的全部指标
+
+    Returns:
+        str: 指标文本
+    """
+    lines = []
+    for metric in (stage_duration, request_duration, request_size, totals, requests_total):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """/metrics 请求处理器"""
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 抓取请求频繁，不输出访问日志
+        pass
+
+
+def start_metrics_server(host='127.0.0.1', port=9861):
+    """
+    在后台线程启动指标HTTP服务
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+
+    Returns:
+        ThreadingHTTPServer: 服务实例
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    return server
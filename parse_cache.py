@@ -0,0 +1,300 @@
+"""
+解析结果缓存模块
+缓存登记表解析后的规范化数据行（各来源的登记日期序数、人员字段和数据质量检查结果），
+与最终报告的结果缓存（见 result_cache）相互独立：同一份登记表只换模板、统计周或输出文件名时，
+不再解密和读取Excel，直接进入统计和生成
+
+按"登记表内容 + 解析规则版本 + 来源配置 + 年份提示"区分（持久化的文件名中不含密码），不随日期失效：
+"登记时间晚于今天"的检查在每次取出时按当天重新计算；只有既无年份提示、
+登记年份以统计基准日期为锚点推断的sheet，才要求锚点日期相同。
+在进程内按最近使用淘汰；指定缓存目录时另以列式压缩文件（.npz，不含pickle）保存，
+重启后或多个工作进程之间也能复用。有密码的登记表只保存以密码派生的密钥加密后的文件，
+缓存目录中不会出现受保护数据的明文，密码错误时无法解密、视为未命中；进程内的条目另按密码的
+HMAC（密钥只在内存中，每个进程随机生成）区分
+
+环境变量:
+    REPORTGENE_PARSE_CACHE_ENTRIES: 进程内最多缓存的登记表数，默认为8，0表示不缓存
+    REPORTGENE_PARSE_CACHE_DIR: 持久化目录，为空（默认）时只在内存中缓存
+"""
+import base64
+import hashlib
+import hmac
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+
+from atomic_io import atomic_open, file_lock
+from data_quality import future_date_mask
+from result_cache import file_digest
+from source_schema import FIELD_DEFAULTS
+
+MAX_ENTRIES = int(os.environ.get("REPORTGENE_PARSE_CACHE_ENTRIES", "8"))
+CACHE_DIR = os.environ.get("REPORTGENE_PARSE_CACHE_DIR") or None
+
+# 持久化目录中最多保留的文件数
+MAX_FILES = 100
+
+# 解析规则（日期推断、字段规范化、数据质量检查）变化时递增，旧的缓存条目随之失效
+SCHEMA_VERSION = 2
+
+# 由Excel密码派生加密密钥的迭代次数
+KDF_ITERATIONS = 200_000
+
+_PLAIN_SUFFIX = ".npz"
+_ENCRYPTED_SUFFIX = ".npz.enc"
+_SALT_SIZE = 16
+
+# 区分进程内条目密码的HMAC密钥，只在内存中（不随缓存保存）
+_MEMORY_SECRET = os.urandom(32)
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared():
+    """
+    进程内共享的解析结果缓存
+
+    Returns:
+        ParseCache: 进程内缓存条目数为0时返回None（不缓存）
+    """
+    global _shared
+    if MAX_ENTRIES <= 0:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = ParseCache()
+        return _shared
+
+
+def _fernet(password, salt):
+    """由Excel密码和随机盐派生的加密器（PBKDF2-SHA256）"""
+    from cryptography.fernet import Fernet  # msoffcrypto-tool的依赖，延迟导入
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=KDF_ITERATIONS)
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(password.encode('utf-8'))))
+
+
+class ParseCache:
+    """规范化数据行的缓存（进程内LRU，可选持久化）"""
+
+    def __init__(self, max_entries=None, directory=None):
+        """
+        Args:
+            max_entries: 进程内最多缓存的登记表数，默认为 MAX_ENTRIES
+            directory: 持久化目录，默认为 CACHE_DIR（为空时不持久化）
+        """
+        self.max_entries = max_entries or MAX_ENTRIES
+        self.directory = directory or CACHE_DIR
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, excel_path, sources, year_hint, excel_digest=None):
+        """
+        计算缓存键（用作持久化的文件名，不含密码：密码由加密文件能否解密来验证）
+
+        Args:
+            excel_path: Excel文件路径
+            sources: 登记来源配置列表
+            year_hint: 从文件名中提取的年份（不在文件内容中，需单独参与计算）
+            excel_digest: 已计算的Excel内容摘要（如结果缓存已计算），为空时读取文件计算
+
+        Returns:
+            str: 十六进制缓存键
+        """
+        parts = {
+            'excel': excel_digest or file_digest(excel_path),
+            'schema': SCHEMA_VERSION,
+            'sources': [
+                (source['prefix'], source['sheet'], source['header_row'], source['layout_spec'])
+                for source in sources
+            ],
+            'year_hint': year_hint,
+        }
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def lock(self, key):
+        """
+        缓存条目的进程间锁：多个工作进程同时解析同一份登记表时只有一个进程读取，其余进程等待后直接命中
+
+        锁按缓存键前两位分片（最多256个锁文件）；只在内存中缓存时各进程互不共享，不加锁
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            上下文管理器
+        """
+        if self.directory is None:
+            return nullcontext()
+        return file_lock(os.path.join(self.directory, f".lock-{key[:2]}"))
+
+    def get(self, key, reference_date, password=None):
+        """
+        查找缓存条目（先查内存，再查持久化目录）
+
+        Args:
+            key: 缓存键
+            reference_date: 推断登记年份的锚点（datetime对象），以锚点推断年份的sheet要求锚点日期相同
+            password: Excel密码，有密码时持久化的条目为加密文件
+
+        Returns:
+            dict: {来源前缀: 规范化的sheet数据}（与 ExcelParser.load 的结果结构相同，
+                  "登记时间晚于今天"已按当天重新检查），未命中时返回None
+        """
+        reference = reference_date.strftime('%Y-%m-%d')
+        memory_key = self._memory_key(key, password)
+        with self._lock:
+            entry = self._entries.get(memory_key)
+            if entry is not None:
+                self._entries.move_to_end(memory_key)
+
+        if entry is None and self.directory is not None:
+            try:
+                entry = self._read(self._path(key, password), password)
+            except Exception:  # 文件不存在、已损坏或无法解密时视为未命中
+                entry = None
+            if entry is not None:
+                self._remember(self._memory_key(key, password), entry)
+
+        if entry is None:
+            return None
+        sheets, cached_reference = entry
+        if cached_reference != reference and any(sheet['anchored'] for sheet in sheets.values()):
+            return None
+        return {prefix: self._recheck(sheet) for prefix, sheet in sheets.items()}
+
+    def put(self, key, sheets, reference_date, password=None):
+        """
+        写入缓存条目
+
+        Args:
+            key: 缓存键
+            sheets: ExcelParser.load 的结果（已规范化）
+            reference_date: 推断登记年份的锚点（datetime对象）
+            password: Excel密码，有密码时持久化的文件以密码派生的密钥加密
+        """
+        entry = (sheets, reference_date.strftime('%Y-%m-%d'))
+        self._remember(self._memory_key(key, password), entry)
+        if self.directory is None:
+            return
+        try:
+            self._write(self._path(key, password), entry, password)
+        except OSError as e:
+            print(f"写入解析结果缓存失败: {e}")
+            return
+        self.prune()
+
+    def prune(self):
+        """持久化文件超过 MAX_FILES 时按最近使用时间删除旧文件"""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        paths = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith((_PLAIN_SUFFIX, _ENCRYPTED_SUFFIX)) and not name.startswith('.')
+        ]
+        if len(paths) <= MAX_FILES:
+            return
+        paths.sort(key=lambda path: os.path.getmtime(path), reverse=True)
+        for path in paths[MAX_FILES:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _recheck(sheet):
+        """按当天重新检查"登记时间晚于今天"的行（返回新的字典，缓存中的条目不变）"""
+        row_numbers = sheet['data'].index.to_numpy() + 1
+        future_dates = row_numbers[future_date_mask(sheet['ordinals'])].tolist()
+        return dict(sheet, quality=dict(sheet['quality'], future_dates=future_dates))
+
+    @staticmethod
+    def _memory_key(key, password):
+        """进程内条目的键：缓存键 + 密码的HMAC（密码不同不会命中同一条目）"""
+        tag = hmac.new(_MEMORY_SECRET, (password or "").encode('utf-8'), hashlib.sha256).hexdigest()
+        return key, tag
+
+    def _remember(self, memory_key, entry):
+        with self._lock:
+            self._entries[memory_key] = entry
+            self._entries.move_to_end(memory_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key, password=None):
+        return os.path.join(self.directory, key + (_ENCRYPTED_SUFFIX if password else _PLAIN_SUFFIX))
+
+    @staticmethod
+    def _write(path, entry, password=None):
+        """
+        按列保存：行号、登记日期序数为整数数组，人员字段为文本数组加空值标记；
+        有密码时整个文件以 盐 + Fernet密文 保存
+        """
+        import numpy as np
+
+        sheets, reference = entry
+        arrays, meta = {}, {}
+        for prefix, sheet in sheets.items():
+            data = sheet['data']
+            arrays[f'{prefix}/index'] = data.index.to_numpy(dtype=np.int64)
+            arrays[f'{prefix}/ordinals'] = np.asarray(sheet['ordinals'], dtype=np.int64)
+            for field in FIELD_DEFAULTS:
+                column = data[field]
+                arrays[f'{prefix}/{field}'] = np.asarray(column.where(column.notna(), "").tolist(), dtype=str)
+                arrays[f'{prefix}/{field}.missing'] = column.isna().to_numpy()
+            meta[prefix] = {'first_week': sheet['first_week'], 'quality': sheet['quality'],
+                            'anchored': sheet['anchored']}
+        arrays['meta'] = np.asarray(json.dumps(
+            {'schema': SCHEMA_VERSION, 'reference': reference, 'sheets': meta}, ensure_ascii=False
+        ))
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        payload = buffer.getvalue()
+        if password:
+            salt = os.urandom(_SALT_SIZE)
+            payload = salt + _fernet(password, salt).encrypt(payload)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with atomic_open(path, 'wb') as f:
+            f.write(payload)
+
+    @staticmethod
+    def _read(path, password=None):
+        import numpy as np
+        import pandas as pd
+        from date_calculator import week_numbers
+
+        with open(path, 'rb') as f:
+            payload = f.read()
+        if password:
+            payload = _fernet(password, payload[:_SALT_SIZE]).decrypt(payload[_SALT_SIZE:])
+
+        with np.load(io.BytesIO(payload), allow_pickle=False) as arrays:
+            meta = json.loads(str(arrays['meta']))
+            if meta['schema'] != SCHEMA_VERSION:
+                raise ValueError(f"解析规则版本不一致: {meta['schema']}")
+            sheets = {}
+            for prefix, info in meta['sheets'].items():
+                index = arrays[f'{prefix}/index']
+                data = pd.DataFrame({
+                    field: pd.Series(arrays[f'{prefix}/{field}'], index=index, dtype=object).mask(
+                        arrays[f'{prefix}/{field}.missing'])
+                    for field in FIELD_DEFAULTS
+                }, index=index)
+                ordinals = arrays[f'{prefix}/ordinals']
+                sheets[prefix] = {
+                    'data': data, 'ordinals': ordinals, 'weeks': week_numbers(ordinals),
+                    'columns': {field: field for field in FIELD_DEFAULTS},
+                    'first_week': info['first_week'], 'quality': info['quality'],
+                    'anchored': info['anchored'],
+                }
+        # 更新修改时间，淘汰时保留最近使用的文件
+        os.utime(path)
+        return sheets, meta['reference']
@@ -0,0 +1,200 @@
+"""
+人员列式存储模块
+本周登记人员按列保存：来源、责任单位、进京方式、群体诉求存为分类编码（每个取值只保存一次），
+姓名单独保存一列。各分类的人数统计是对编码的一次bincount，不再为每行构造字典、反复哈希相同的字符串
+"""
+
+# 按分类编码保存的字段
+CATEGORY_FIELDS = ('source', 'unit', 'travel_method', 'group_appeal')
+
+
+def _factorize(values):
+    """将取值序列转为 (编码数组, 取值列表)，取值按首次出现的顺序排列"""
+    import numpy as np
+    import pandas as pd
+
+    if not len(values):
+        return np.zeros(0, dtype=np.int64), []
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return codes.astype(np.int64), list(uniques)
+
+
+class PersonTable:
+    """人员列表的列式存储"""
+
+    def __init__(self, names, codes, categories):
+        """
+        Args:
+            names: 每人的姓名
+            codes: {字段: 编码数组}，编码为该字段取值列表中的下标
+            categories: {字段: 取值列表}
+        """
+        self.names = list(names)
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_columns(cls, columns, source=""):
+        """
+        由按列取出的人员字段建立
+
+        Args:
+            columns: {字段: 取值序列}，包含 name 及各分类字段（缺少的字段为空字符串）
+            source: 来源前缀
+
+        Returns:
+            PersonTable
+        """
+        import numpy as np
+
+        names = list(columns.get('name', []))
+        codes, categories = {}, {}
+        for field in CATEGORY_FIELDS:
+            if field == 'source':
+                codes[field], categories[field] = np.zeros(len(names), dtype=np.int64), [source]
+            elif field in columns:
+                codes[field], categories[field] = _factorize(columns[field])
+            else:
+                codes[field], categories[field] = np.zeros(len(names), dtype=np.int64), [""]
+        return cls(names, codes, categories)
+
+    @classmethod
+    def empty(cls, source=""):
+        """没有人员的表"""
+        return cls.from_columns({'name': []}, source)
+
+    @classmethod
+    def concat(cls, tables, sources=None):
+        """
+        按顺序合并多个表（各字段的取值列表合并，编码重新映射）
+
+        Args:
+            tables: PersonTable列表
+            sources: 与tables对应的来源前缀，为空时保留各表原有的来源
+
+        Returns:
+            PersonTable
+        """
+        import numpy as np
+
+        tables = list(tables)
+        codes, categories = {}, {}
+        for field in CATEGORY_FIELDS:
+            merged = {}
+            parts = []
+            for i, table in enumerate(tables):
+                if field == 'source' and sources is not None:
+                    code = merged.setdefault(sources[i], len(merged))
+                    parts.append(np.full(len(table), code, dtype=np.int64))
+                    continue
+                mapping = np.array(
+                    [merged.setdefault(value, len(merged)) for value in table.categories[field]], dtype=np.int64
+                )
+                parts.append(mapping[table.codes[field]] if len(table) else np.zeros(0, dtype=np.int64))
+            codes[field] = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+            categories[field] = list(merged)
+        return cls([name for table in tables for name in table.names], codes, categories)
+
+    def __len__(self):
+        return len(self.names)
+
+    def column(self, field):
+        """
+        取出某个字段的全部取值
+
+        Returns:
+            list: 每人一项
+        """
+        if field == 'name':
+            return list(self.names)
+        categories = self.categories[field]
+        return [categories[code] for code in self.codes[field]]
+
+    def with_names(self, names):
+        """替换姓名列（如脱敏后的姓名），分类编码共用"""
+        return PersonTable(names, self.codes, self.categories)
+
+    def counts(self, field):
+        """
+        统计某个分类字段各取值的人数（取值去除首尾空白后合并，忽略空值）
+
+        Returns:
+            dict: {取值: 人数}，按人数从多到少排列，人数相同时按首次出现的顺序
+        """
+        import numpy as np
+
+        keys = {}
+        groups = np.array(
+            [keys.setdefault(str(value).strip(), len(keys)) for value in self.categories[field]], dtype=np.int64
+        )
+        if not len(self) or not len(groups):
+            return {}
+        totals = np.bincount(groups[self.codes[field]], minlength=len(keys))
+        keys = list(keys)
+        return {
+            keys[i]: int(totals[i]) for i in np.argsort(-totals, kind='stable')
+            if totals[i] and keys[i] and keys[i] != 'nan'
+        }
+
+    def count_containing(self, field, text):
+        """
+        统计某个分类字段包含指定文字的人数（如进京方式中包含"公路"）
+
+        Returns:
+            int: 人数
+        """
+        import numpy as np
+
+        matches = np.array([text in str(value).strip() for value in self.categories[field]], dtype=bool)
+        return int(matches[self.codes[field]].sum()) if len(self) and len(matches) else 0
+
+    def records(self):
+        """
+        展开为逐人的字典列表（供导出）
+
+        Returns:
+            list: [{'source': ..., 'unit': ..., 'name': ..., 'travel_method': ..., 'group_appeal': ...}, ...]
+        """
+        columns = {field: self.column(field) for field in ('source', 'unit', 'name', 'travel_method', 'group_appeal')}
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def to_dict(self):
+        """
+        转为可JSON序列化的字典（取值列表 + 整数编码）
+
+        Returns:
+            dict: {'names': [...], 'categories': {字段: [...]}, 'codes': {字段: [...]}}
+        """
+        return {
+            'names': list(self.names),
+            'categories': {field: list(values) for field, values in self.categories.items()},
+            'codes': {field: codes.tolist() for field, codes in self.codes.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, document):
+        """由 to_dict 的结果还原"""
+        import numpy as np
+
+        return cls(
+            document['names'],
+            {field: np.asarray(codes, dtype=np.int64) for field, codes in document['codes'].items()},
+            document['categories'],
+        )
+
+
+def person_records(persons):
+    """
+    解析结果中的 persons 展开为逐人的字典列表
+
+    Args:
+        persons: PersonTable.to_dict 的结果（早期缓存的结果中为字典列表，原样返回）
+
+    Returns:
+        list: 逐人的字典列表
+    """
+    if not persons:
+        return []
+    if isinstance(persons, dict):
+        return PersonTable.from_dict(persons).records()
+    return list(persons)
@@ -0,0 +1,227 @@
+"""
+文档预览版式模块
+按模板各段落的样式（标题级别、对齐方式、编号缩进）确定预览样式，
+并把段落中的占位符编译为匹配表达式，用于在生成的报告中准确标出动态内容。
+版式每个模板只编译一次（按模板路径、修改时间和大小缓存），生成的报告与模板段落一一对应，
+预览时每个段落只需按下标查表
+"""
+import functools
+import html
+import os
+import re
+
+# 缓存的已编译模板数
+LAYOUT_CACHE_SIZE = 8
+
+# 各类段落的预览HTML
+PARAGRAPH_HTML = {
+    'title': '<h3 style="color: #8e44ad; text-align: center; margin: 10px 0;">{}</h3>',
+    'subtitle': '<h4 style="color: #8e44ad; text-align: center; margin: 5px 0;">{}</h4>',
+    'heading': '<h4 style="color: #2c3e50; margin: 15px 0 8px 0; font-size: 16px;">{}</h4>',
+    'item': '<p style="margin: 8px 0; padding-left: 20px; color: #34495e;">{}</p>',
+    'lead': '<p style="margin: 10px 0; font-weight: 500; color: #2980b9;">{}</p>',
+    'body': '<p style="margin: 8px 0; color: #2c3e50;">{}</p>',
+}
+
+# 动态内容的标注
+HIGHLIGHT_HTML = ('<span style="background-color: #ffc107; color: #856404; padding: 1px 3px; '
+                  'border-radius: 2px; font-weight: bold;">{}</span>')
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*\w+\s*\}\}')
+
+# 未使用正式样式的模板按段首编号判断：（一）为小标题，1、为条目
+_HEADING_NUMBER = re.compile(r'^[（(][一二三四五六七八九十]+[）)]')
+_ITEM_NUMBER = re.compile(r'^\d+[、.．]')
+_HEADING_STYLE = re.compile(r'^(?:Heading|标题)\s*\d$', re.IGNORECASE)
+
+# 无法与模板对应的段落（如其他模板生成的文档）按内容特征标注动态内容，表达式只编译一次
+_UNIT_CHARS = '贾汪市直铜山云龙经开区丰县沛县邳州泉山新沂睢宁鼓楼'
+_FALLBACK_PATTERNS = [
+    re.compile(pattern) for pattern in (
+        r'(\d+人)',                                            # 统计数据
+        rf'([{_UNIT_CHARS}])([A-Za-z\u4e00-\u9fa5]{{1,3}}XX?)',  # 人员信息（责任单位+姓名）
+        r'(上升\d+人|下降\d+人|持平)',                          # 趋势变化
+        rf'([{_UNIT_CHARS}])(\d+人)',                           # 地区统计
+        r'(征地拆迁|讨薪|拖欠工程款|失地保险|案件办理|截访)(\d+人)?',  # 诉求类型
+        r'(公路|铁路|长期在京)(\d+人)?',                        # 进京方式
+        r'(环比（\d+人）)',                                     # 环比数据
+        r'(\d+\.\d+%)',                                        # 百分比
+        r'(本周登记\d+人中)',
+        r'(在库\d+人中)',
+        r'(\d+人触发平台)',
+        r'(\d+人未触发)',
+        r'(\d+车\d+人)',                                       # 车辆数据
+        r'([A-Za-z\u4e00-\u9fa5]{1,2}XX)',                     # 脱敏后的姓名
+    )
+]
+
+
+def annotate_by_pattern(text):
+    """
+    按内容特征标注动态内容（无法与模板段落对应时使用）
+
+    Args:
+        text: 段落文本
+
+    Returns:
+        str: 标注后的HTML文本
+    """
+    annotated = html.escape(text, quote=False)
+    for pattern in _FALLBACK_PATTERNS:
+        annotated = pattern.sub(lambda m: HIGHLIGHT_HTML.format("".join(g or "" for g in m.groups())), annotated)
+    return annotated
+
+
+def paragraph_kind(paragraph, text=None):
+    """
+    由段落样式确定预览样式
+
+    优先使用段落样式（标题、副标题、Heading N、列表）和对齐方式；
+    使用"正文"样式的模板再按段首编号和是否包含占位符判断
+
+    Args:
+        paragraph: python-docx段落对象
+        text: 段落文本，默认为 paragraph.text
+
+    Returns:
+        str: PARAGRAPH_HTML 中的段落类型
+    """
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    text = (paragraph.text if text is None else text).strip()
+    style = paragraph.style.name if paragraph.style is not None else ""
+    if style in ('Title', '标题'):
+        return 'title'
+    if style in ('Subtitle', '副标题'):
+        return 'subtitle'
+    if _HEADING_STYLE.match(style):
+        return 'heading'
+    if paragraph.alignment == WD_ALIGN_PARAGRAPH.CENTER:
+        # 居中的短段落（如"第X期"）为副标题
+        return 'subtitle' if len(text) <= 8 else 'title'
+    if _HEADING_NUMBER.match(text):
+        return 'heading'
+    if style.startswith(('List', '列表')) or _ITEM_NUMBER.match(text):
+        return 'item'
+    if PLACEHOLDER_PATTERN.search(text):
+        return 'lead'
+    return 'body'
+
+
+def _placeholder_matcher(text):
+    """将含占位符的模板段落编译为匹配表达式，每个占位符对应一个分组；不含占位符时返回None"""
+    parts = PLACEHOLDER_PATTERN.split(text)
+    if len(parts) == 1:
+        return None
+    return re.compile('(.*?)'.join(re.escape(part) for part in parts) + '$', re.DOTALL)
+
+
+class PreviewLayout:
+    """文档各段落（含空段落，按下标）的预览样式和动态内容匹配表达式"""
+
+    def __init__(self, kinds, matchers=None):
+        """
+        Args:
+            kinds: 每个段落的类型（见 PARAGRAPH_HTML）
+            matchers: 每个段落的占位符匹配表达式（见 _placeholder_matcher），为空时按内容特征标注
+        """
+        self.kinds = kinds
+        self.matchers = matchers
+
+    @classmethod
+    def from_document(cls, doc, placeholders=True):
+        """
+        编译文档的预览版式
+
+        Args:
+            doc: python-docx文档对象
+            placeholders: 是否为含占位符的段落编译匹配表达式（模板为True，已生成的报告为False）
+
+        Returns:
+            PreviewLayout
+        """
+        texts = [paragraph.text.strip() for paragraph in doc.paragraphs]
+        kinds = [paragraph_kind(paragraph, text) for paragraph, text in zip(doc.paragraphs, texts)]
+        matchers = [_placeholder_matcher(text) for text in texts] if placeholders else None
+        return cls(kinds, matchers)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def render(self, index, text):
+        """
+        单个段落的预览HTML
+
+        Args:
+            index: 段落在文档中的下标
+            text: 段落文本（已去除首尾空白）
+
+        Returns:
+            str: 该段落的HTML
+        """
+        matcher = self.matchers[index] if self.matchers else None
+        match = matcher.match(text) if matcher else None
+        if match:
+            annotated = self._highlight(text, match)
+        elif matcher is None and self.matchers:
+            annotated = html.escape(text, quote=False)  # 模板中的固定文字
+        else:
+            annotated = annotate_by_pattern(text)
+        return PARAGRAPH_HTML[self.kinds[index]].format(annotated)
+
+    @staticmethod
+    def _highlight(text, match):
+        """按占位符分组标注动态内容，其余部分为模板中的固定文字"""
+        pieces, position = [], 0
+        for group in range(1, match.re.groups + 1):
+            start, end = match.span(group)
+            pieces.append(html.escape(text[position:start], quote=False))
+            if end > start:
+                pieces.append(HIGHLIGHT_HTML.format(html.escape(text[start:end], quote=False)))
+            position = end
+        pieces.append(html.escape(text[position:], quote=False))
+        return "".join(pieces)
+
+
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _compile_template(template_path, mtime_ns, size):
+    """编译模板的预览版式（按路径、修改时间和大小缓存，模板被替换后自动重新编译）"""
+    from docx import Document  # 延迟导入，避免模块加载时引入python-docx
+
+    with open(template_path, 'rb') as f:
+        return PreviewLayout.from_document(Document(f))
+
+
+def load_layout(template_path):
+    """
+    读取模板的预览版式（每个模板只编译一次）
+
+    Args:
+        template_path: Word模板路径
+
+    Returns:
+        PreviewLayout: 模板不存在时返回None
+    """
+    try:
+        stat = os.stat(template_path)
+    except OSError:
+        return None
+    return _compile_template(template_path, stat.st_mtime_ns, stat.st_size)
+
+
+def layout_for(doc, template_path):
+    """
+    已生成报告的预览版式：段落数与模板一致时使用模板的版式，
+    否则（如其他模板生成的文档）由文档自身的段落样式编译，动态内容按内容特征标注
+
+    Args:
+        doc: 已生成报告的python-docx文档对象
+        template_path: 生成报告所用的Word模板路径
+
+    Returns:
+        PreviewLayout
+    """
+    layout = load_layout(template_path) if template_path else None
+    if layout is not None and len(layout) == len(doc.paragraphs):
+        return layout
+    return PreviewLayout.from_document(doc, placeholders=False)
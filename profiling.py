@@ -0,0 +1,149 @@
+"""
+性能分析模块
+按需对单个报告请求进行cProfile和tracemalloc分析，
+将调用耗时和内存峰值报告保存到profiles目录，默认关闭且不产生额外开销
+
+环境变量:
+    REPORTGENE_PROFILE: 设为1时对所有请求开启分析
+    REPORTGENE_PROFILE_DIR: 分析结果目录，默认为项目下的profiles/
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import metrics
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.environ.get("REPORTGENE_PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILE_ALL = os.environ.get("REPORTGENE_PROFILE", "").lower() in ("1", "true", "yes")
+
+# 报告中展示的函数数和内存分配位置数
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 20
+
+# 当前请求的分析结果文件列表，None表示未开启
+_request_profiles = ContextVar('reportgene_request_profiles', default=None)
+# cProfile和tracemalloc都是进程级的，同一时间只允许一个分析在进行
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def request_profiling(enabled=False):
+    """
+    为当前请求开启（或不开启）性能分析
+
+    Args:
+        enabled: 是否开启；设置了 REPORTGENE_PROFILE 时始终开启
+
+    Yields:
+        list: 本次请求保存的分析结果文件路径（未开启时为空列表）
+    """
+    if not (enabled or PROFILE_ALL):
+        yield []
+        return
+
+    saved = []
+    token = _request_profiles.set(saved)
+    try:
+        yield saved
+    finally:
+        _request_profiles.reset(token)
+
+
+def is_active():
+    """当前请求是否开启了性能分析"""
+    return PROFILE_ALL or _request_profiles.get() is not None
+
+
+def profiled(label):
+    """
+    装饰器：在开启分析的请求中，对函数调用做cProfile和tracemalloc分析
+
+    Args:
+        label: 分析结果文件名中的函数标识
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            saved = _request_profiles.get()
+            if saved is None and not PROFILE_ALL:
+                return func(*args, **kwargs)
+            if not _profile_lock.acquire(blocking=False):
+                # 已有分析在进行（嵌套调用或并发请求），直接执行
+                return func(*args, **kwargs)
+            try:
+                return _run_profiled(label, saved, func, args, kwargs)
+            finally:
+                _profile_lock.release()
+        return wrapper
+    return decorator
+
+
+def _run_profiled(label, saved, func, args, kwargs):
+    """执行函数并保存分析结果"""
+    import cProfile
+    import tracemalloc
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(10)
+    tracemalloc.reset_peak()
+    base_memory, _ = tracemalloc.get_traced_memory()
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak_memory = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+
+        try:
+            paths = _save_report(label, profiler, snapshot, elapsed, peak_memory - base_memory)
+            if saved is not None:
+                saved.extend(paths)
+        except OSError as e:
+            print(f"保存性能分析结果失败: {e}")
+
+
+def _save_report(label, profiler, snapshot, elapsed, peak_bytes):
+    """
+    保存cProfile原始数据和文本报告
+
+    Returns:
+        list: [原始数据路径(.prof), 文本报告路径(.txt)]
+    """
+    import io
+    import pstats
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    tag = metrics.current_request_id() or 'adhoc'
+    stem = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{tag}_{label}")
+
+    prof_path = stem + '.prof'
+    profiler.dump_stats(prof_path)
+
+    stream = io.StringIO()
+    stream.write(f"函数: {label}\n请求: {tag}\n")
+    stream.write(f"耗时: {elapsed:.3f} 秒\n")
+    stream.write(f"内存峰值增量: {peak_bytes / (1024 * 1024):.2f} MB\n\n")
+
+    stream.write(f"=== 内存分配位置（前{TOP_ALLOCATIONS}） ===\n")
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        stream.write(f"{stat}\n")
+
+    stream.write(f"\n=== 调用耗时（按累计时间，前{TOP_FUNCTIONS}） ===\n")
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+
+    text_path = stem + '.txt'
+    with open(text_path, 'w', encoding='utf-8') as f:
+        f.write(stream.getvalue())
+
+    return [prof_path, text_path]
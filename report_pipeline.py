@@ -0,0 +1,370 @@
+"""
+报告生成流程模块
+封装"解析Excel -> 生成Word"的完整流程，不依赖Gradio，
+供命令行批处理和Web界面共同使用
+
+流程按阶段及其依赖关系执行：预检查（模板、输出目录）最先执行，未通过时不再解析；
+互不依赖的阶段（读取模板、解密解析Excel）在线程池中并行，关键路径上只剩真正有先后关系的步骤
+
+环境变量:
+    REPORTGENE_PIPELINE_WORKERS: 流水线线程池大小，默认为4
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import data_quality
+import metrics
+import parse_cache
+import stats_export
+from date_calculator import iter_week_starts
+from excel_parser import ExcelParser
+from result_cache import file_digest
+from word_generator import WordGenerator
+
+DATE_FORMAT = '%Y-%m-%d'
+
+PIPELINE_WORKERS = int(os.environ.get("REPORTGENE_PIPELINE_WORKERS", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _stage_executor():
+    """进程内共享的流水线线程池（首次使用时创建）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix='pipeline')
+        return _executor
+
+
+def run_stages(stages):
+    """
+    按依赖关系并发执行流水线阶段
+
+    阶段在其全部依赖完成后才提交到线程池（不会有线程空等依赖），
+    每个阶段在提交时当前上下文的副本中运行，性能指标和性能分析仍归属于当前请求
+
+    Args:
+        stages: {阶段名: (函数, (依赖阶段名, ...))}，函数按依赖顺序接收依赖阶段的结果
+
+    Returns:
+        dict: {阶段名: 结果}
+
+    Raises:
+        Exception: 某个阶段出错时，等其余已开始的阶段结束后抛出该异常
+        ValueError: 依赖的阶段不存在或存在循环依赖
+    """
+    executor = _stage_executor()
+    remaining = dict(stages)
+    results, running = {}, {}
+    while remaining or running:
+        ready = [name for name, (_, deps) in remaining.items() if all(dep in results for dep in deps)]
+        for name in ready:
+            func, deps = remaining.pop(name)
+            context = contextvars.copy_context()
+            running[executor.submit(context.run, func, *(results[dep] for dep in deps))] = name
+        if not running:
+            raise ValueError(f"流水线阶段的依赖无法满足: {', '.join(remaining)}")
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            error = future.exception()
+            if error is not None:
+                wait(running)
+                raise error
+            results[name] = future.result()
+    return results
+
+
+def default_output_name(excel_path, suffix='报告'):
+    """
+    根据Excel文件名生成默认的输出文件名
+
+    Args:
+        excel_path: Excel文件路径
+        suffix: 文件名后缀
+
+    Returns:
+        str: 输出文件名（.docx）
+    """
+    stem = os.path.splitext(os.path.basename(excel_path))[0]
+    return f"{stem}_{suffix}.docx"
+
+
+def quality_report_path(output_path):
+    """
+    数据质量报告的路径（与Word报告同目录）
+
+    Args:
+        output_path: Word报告路径
+
+    Returns:
+        str: <报告文件名>_数据质量.json
+    """
+    return os.path.splitext(output_path)[0] + '_数据质量.json'
+
+
+def build_report(excel_path, template_path, output_path, password=None, as_of=None,
+                 quality_report=False, export_stats=False, cache=None):
+    """
+    解析Excel并生成Word报告
+
+    Args:
+        excel_path: Excel文件路径
+        template_path: Word模板路径
+        output_path: 输出文件路径
+        password: Excel密码
+        as_of: 统计基准日期（datetime对象），默认为当前日期
+        quality_report: 是否在报告旁保存数据质量报告（JSON）
+        export_stats: 是否在报告旁保存统计数据（JSON和CSV，见 stats_export）
+        cache: 结果缓存（result_cache.ResultCache），命中时直接复用已生成的报告，
+               未命中时生成成功后写入缓存；为空则不使用缓存
+
+    Returns:
+        dict: 处理摘要，包含统计数据、日期范围、输出路径和错误信息；命中缓存时cached为True，
+              登记表有改动但统计窗口内数据未变、沿用上次的报告时reused为True
+    """
+    started = time.perf_counter()
+    # 模板不存在时无法计算缓存键，不使用缓存，由预检查报告具体原因
+    if cache is None or not os.path.isfile(template_path):
+        summary = _generate(excel_path, template_path, output_path, password, as_of)
+    else:
+        with metrics.stage('result_cache'):
+            # 登记表只读取一次计算摘要，结果缓存和解析结果缓存共用
+            excel_digest = file_digest(excel_path)
+            cache_key = cache.key(excel_path, template_path, password=password, as_of=as_of,
+                                  excel_digest=excel_digest)
+        # 多个进程同时请求同一份报告时只生成一次，其余进程等锁释放后直接命中缓存
+        with cache.lock(cache_key):
+            summary = cache.get(cache_key, output_path)
+            if summary is None:
+                summary = _generate(excel_path, template_path, output_path, password, as_of, cache,
+                                    excel_digest=excel_digest)
+                if summary['success']:
+                    cache.put(cache_key, summary)
+            else:
+                summary['excel_path'] = excel_path
+
+    _write_sidecars(summary, excel_path, output_path, quality_report, export_stats)
+    summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def _generate(excel_path, template_path, output_path, password, as_of, cache=None, excel_digest=None):
+    """
+    解析Excel并生成Word文档，返回处理摘要
+
+    指定结果缓存时，统计窗口内数据的指纹与以前某次生成相同则直接沿用那次的报告，不再渲染；
+    excel_digest 为已计算的Excel内容摘要，解析结果缓存不再重复读取文件
+    """
+    summary = {
+        'excel_path': excel_path,
+        'output_path': None,
+        'success': False,
+        'errors': [],
+    }
+
+    metrics.count('bytes_processed', os.path.getsize(excel_path))
+    # 同一登记表只换模板、统计周或输出文件名时，直接使用缓存的解析结果
+    parser = ExcelParser(excel_path, password=password, as_of=as_of, parse_cache=parse_cache.shared(),
+                         excel_digest=excel_digest)
+    generator = WordGenerator(template_path)
+
+    summary.update({
+        'current_week_start': parser.current_week_start.strftime(DATE_FORMAT),
+        'current_week_end': parser.current_week_end.strftime(DATE_FORMAT),
+        'last_week_start': parser.last_week_start.strftime(DATE_FORMAT),
+        'last_week_end': parser.last_week_end.strftime(DATE_FORMAT),
+        'data': {},
+    })
+
+    # 预检查只检查文件和目录，先于解析执行：模板不存在或输出目录不可写时立即返回，不再解密解析Excel
+    with metrics.stage('preflight'):
+        errors = _preflight(template_path, output_path)
+    if errors:
+        summary['errors'] = errors
+        return summary
+
+    # 读取模板与解密解析Excel互不依赖，并行执行；生成Word文档依赖两者
+    results = run_stages({
+        'template': (lambda: _preload_template(generator), ()),
+        'parse': (parser.parse_all, ()),
+    })
+    data = summary['data'] = results['parse']
+
+    window_key = None
+    if cache is not None and not data.get('errors'):
+        with metrics.stage('fingerprint'):
+            window_key = cache.window_key(parser.window_fingerprint(), template_path, as_of=as_of)
+        if cache.get(window_key, output_path) is not None:
+            summary.update(success=True, output_path=output_path, reused=True)
+            return summary
+
+    _write_document(summary, data, template_path, output_path, doc=results['template'],
+                    generator=generator)
+    if window_key and summary['success']:
+        cache.put(window_key, summary)
+    return summary
+
+
+def _write_sidecars(summary, excel_path, output_path, quality_report, export_stats):
+    """按需在报告旁保存数据质量报告和统计数据"""
+    data = summary['data']
+    if quality_report and data.get('data_quality'):
+        path = quality_report_path(output_path)
+        data_quality.write_report(path, data['data_quality'], excel_path)
+        summary['quality_report_path'] = path
+
+    if export_stats and summary['success']:
+        summary['export_paths'] = stats_export.write_exports(output_path, summary)
+
+
+def build_store_report(store_path, template_path, output_path, as_of=None, source_files=None):
+    """
+    基于合并库（见 consolidated_store）生成Word报告
+
+    Args:
+        store_path: 合并库路径，为空时使用默认路径
+        template_path: Word模板路径
+        output_path: 输出文件路径
+        as_of: 统计基准日期（datetime对象），默认为当前日期
+        source_files: 只统计这些文件的数据，默认为合并库中的全部文件
+
+    Returns:
+        dict: 处理摘要，结构与build_report相同（excel_path为合并库路径）
+    """
+    from consolidated_store import ConsolidatedStore, StoreParser
+
+    started = time.perf_counter()
+    with ConsolidatedStore(store_path) as store:
+        summary = {
+            'excel_path': store.path,
+            'output_path': None,
+            'success': False,
+            'errors': [],
+        }
+        parser = StoreParser(store, as_of=as_of, source_files=source_files)
+        data = parser.parse_all()
+
+    summary.update({
+        'current_week_start': parser.current_week_start.strftime(DATE_FORMAT),
+        'current_week_end': parser.current_week_end.strftime(DATE_FORMAT),
+        'last_week_start': parser.last_week_start.strftime(DATE_FORMAT),
+        'last_week_end': parser.last_week_end.strftime(DATE_FORMAT),
+        'data': data,
+    })
+    _write_document(summary, data, template_path, output_path)
+
+    summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def _preflight(template_path, output_path):
+    """
+    生成前的预检查：模板是否存在，输出目录是否可写（不存在时创建）
+
+    Returns:
+        list: 错误信息，全部通过时为空列表
+    """
+    errors = []
+    if not os.path.isfile(template_path):
+        errors.append(f"Word模板不存在: {template_path}")
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        errors.append(f"无法创建输出目录: {e}")
+    else:
+        if not os.access(output_dir, os.W_OK):
+            errors.append(f"输出目录不可写: {output_dir}")
+    return errors
+
+
+def _preload_template(generator):
+    """提前读取模板，失败时返回None（由生成步骤重新读取并报告错误）"""
+    try:
+        return generator.load_template()
+    except Exception:
+        return None
+
+
+def _write_document(summary, data, template_path, output_path, doc=None, generator=None):
+    """统计没有错误时生成Word文档，并将结果记录到处理摘要中"""
+    if data.get('errors'):
+        summary['errors'] = list(data['errors'])
+        return
+
+    generator = generator or WordGenerator(template_path)
+    if generator.generate(data, output_path, doc=doc):
+        summary['success'] = True
+        summary['output_path'] = output_path
+    else:
+        summary['errors'].append('Word文档生成失败')
+
+
+def build_backfill_reports(excel_path, template_path, output_dir, start, end, password=None, on_result=None,
+                           quality_report=False, export_stats=False):
+    """
+    历史回溯：为日期区间内的每一周生成一份报告
+
+    Excel只解密、读取一次，各周的统计在内存中完成
+
+    Args:
+        excel_path: Excel文件路径
+        template_path: Word模板路径
+        output_dir: 输出目录
+        start: 起始日期（datetime对象），所在周计入
+        end: 结束日期（datetime对象），所在周计入
+        password: Excel密码
+        on_result: 每周报告完成后立即调用的回调函数（参数为该周的处理摘要），如追加到下载包
+        quality_report: 是否在每周报告旁保存数据质量报告（JSON）
+        export_stats: 是否在每周报告旁保存统计数据（JSON和CSV，见 stats_export）
+
+    Returns:
+        list: 每周一项的处理摘要（结构与build_report相同，另含as_of）
+    """
+    weeks = iter_week_starts(start, end)
+    os.makedirs(output_dir, exist_ok=True)
+
+    metrics.count('bytes_processed', os.path.getsize(excel_path))
+    parser = ExcelParser(excel_path, password=password, as_of=max(weeks), parse_cache=parse_cache.shared())
+    generator = WordGenerator(template_path)
+
+    summaries = []
+    for week in parser.parse_weeks(weeks):
+        started = time.perf_counter()
+        data = week['data']
+        week_start = week['current_week_start']
+        summary = {
+            'excel_path': excel_path,
+            'output_path': None,
+            'success': False,
+            'errors': list(data.get('errors') or []),
+            'as_of': week['as_of'].strftime(DATE_FORMAT),
+            'current_week_start': week_start.strftime(DATE_FORMAT),
+            'current_week_end': week['current_week_end'].strftime(DATE_FORMAT),
+            'last_week_start': week['last_week_start'].strftime(DATE_FORMAT),
+            'last_week_end': week['last_week_end'].strftime(DATE_FORMAT),
+            'data': data,
+        }
+
+        output_path = os.path.join(output_dir, default_output_name(excel_path, f"报告_{week_start:%Y%m%d}"))
+        if not summary['errors']:
+            if generator.generate(data, output_path):
+                summary['success'] = True
+                summary['output_path'] = output_path
+            else:
+                summary['errors'].append('Word文档生成失败')
+
+        # 附带文件在回调之前写入，下载包中与 build_report 一样包含这些文件
+        _write_sidecars(summary, excel_path, output_path, quality_report, export_stats)
+        summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        summaries.append(summary)
+        if on_result:
+            on_result(summary)
+    return summaries
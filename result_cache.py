@@ -0,0 +1,204 @@
+"""
+报告结果缓存模块
+按"Excel内容 + 密码 + 年份提示 + 统计周 + 模板 + 来源配置"缓存已生成的Word报告和统计结果，
+同一周内再次为相同的登记表生成报告时直接复用，不再解析Excel
+
+预生成服务（见 watcher）提前把结果写入缓存，界面中生成报告时即可直接命中
+
+登记表有改动时，另按统计窗口内数据的指纹（见 ExcelParser.window_fingerprint）查找：
+只修改了更早的行或报告不用的列时，沿用上次生成的Word报告，不再重新渲染
+
+环境变量:
+    REPORTGENE_RESULT_CACHE: 缓存目录，默认为项目下的 cache/results
+    REPORTGENE_RESULT_CACHE_ENTRIES: 最多保留的缓存条目数，默认为200
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from atomic_io import atomic_copy, file_lock
+from date_calculator import extract_year_hint, get_current_week_range
+from source_schema import load_sources
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("REPORTGENE_RESULT_CACHE", os.path.join(BASE_DIR, "cache", "results"))
+MAX_ENTRIES = int(os.environ.get("REPORTGENE_RESULT_CACHE_ENTRIES", "200"))
+
+# 计算文件摘要时每次读取的字节数
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+_REPORT_NAME = "report.docx"
+_SUMMARY_NAME = "summary.json"
+
+# 与输出路径、单次请求相关，不写入缓存的摘要字段
+_TRANSIENT_KEYS = ('output_path', 'elapsed_seconds', 'profiles', 'quality_report_path', 'export_paths',
+                   'reused')
+
+
+def file_digest(path):
+    """
+    计算文件内容的SHA-256摘要
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """已生成报告的磁盘缓存（每个条目一个目录，写入时整体重命名，读取方不会看到写了一半的条目）"""
+
+    def __init__(self, directory=None, max_entries=None):
+        """
+        Args:
+            directory: 缓存目录，默认为 CACHE_DIR
+            max_entries: 最多保留的条目数，默认为 MAX_ENTRIES
+        """
+        self.directory = directory or CACHE_DIR
+        self.max_entries = max_entries or MAX_ENTRIES
+
+    def key(self, excel_path, template_path, password=None, as_of=None, excel_digest=None, year_hint=None):
+        """
+        计算缓存键
+
+        同一周内任意基准日期的统计结果相同，因此按本周一计算；
+        登记年份的提示来自文件名（不在文件内容中），内容相同、文件名年份不同的登记表不会命中
+
+        Args:
+            excel_path: Excel文件路径
+            template_path: Word模板路径
+            password: Excel密码（参与计算，密码不同不会命中）
+            as_of: 统计基准日期（datetime对象），默认为当前日期
+            excel_digest: 已计算的Excel内容摘要，为空时读取文件计算
+            year_hint: 登记表第一条记录的年份，默认与 ExcelParser 相同，从文件名中提取
+
+        Returns:
+            str: 十六进制缓存键
+        """
+        return self._digest(template_path, as_of, excel=excel_digest or file_digest(excel_path),
+                            password=password or "",
+                            year_hint=year_hint or extract_year_hint(os.path.basename(excel_path)))
+
+    def window_key(self, fingerprint, template_path, as_of=None):
+        """
+        按统计窗口内数据的指纹计算缓存键（登记表有改动但报告用到的数据未变时命中）
+
+        Args:
+            fingerprint: ExcelParser.window_fingerprint 的结果
+            template_path: Word模板路径
+            as_of: 统计基准日期（datetime对象），默认为当前日期
+
+        Returns:
+            str: 十六进制缓存键
+        """
+        return self._digest(template_path, as_of, window=fingerprint)
+
+    @staticmethod
+    def _digest(template_path, as_of, **parts):
+        """按统计周、模板和来源配置以及其他组成部分计算摘要"""
+        week_start, _ = get_current_week_range(as_of)
+        parts.update({
+            'week': week_start.strftime('%Y-%m-%d'),
+            'template': file_digest(template_path),
+            'sources': [
+                (source['prefix'], source['sheet'], source['label'], source['header_row'], source['layout_spec'])
+                for source in load_sources()
+            ],
+        })
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def lock(self, key):
+        """
+        缓存条目的进程间锁：多个进程同时请求同一份报告时只有一个进程生成，其余进程等待后直接命中
+
+        锁按缓存键前两位分片（最多256个锁文件），不随条目数增长
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            上下文管理器
+        """
+        return file_lock(os.path.join(self.directory, key[:2], '.lock'))
+
+    def get(self, key, output_path):
+        """
+        查找缓存条目，命中时将报告复制到输出路径
+
+        Args:
+            key: 缓存键
+            output_path: 报告输出路径
+
+        Returns:
+            dict: 缓存的处理摘要（output_path为输出路径，cached为True），未命中时返回None
+        """
+        entry = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry, _SUMMARY_NAME), 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+            atomic_copy(os.path.join(entry, _REPORT_NAME), output_path)
+        except (OSError, ValueError):
+            return None
+
+        # 更新访问时间，淘汰时保留最近使用的条目
+        os.utime(entry)
+        summary.update(output_path=output_path, cached=True)
+        return summary
+
+    def put(self, key, summary):
+        """
+        写入缓存条目（报告文件取自 summary['output_path']）
+
+        Args:
+            key: 缓存键
+            summary: 生成成功的处理摘要
+        """
+        entry = self._entry_dir(key)
+        parent = os.path.dirname(entry)
+        os.makedirs(parent, exist_ok=True)
+
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+        try:
+            shutil.copyfile(summary['output_path'], os.path.join(staging, _REPORT_NAME))
+            cached = {k: v for k, v in summary.items() if k not in _TRANSIENT_KEYS}
+            with open(os.path.join(staging, _SUMMARY_NAME), 'w', encoding='utf-8') as f:
+                json.dump(cached, f, ensure_ascii=False)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            os.rename(staging, entry)
+        except OSError as e:
+            # 其他进程同时写入了同一条目，保留对方的结果即可
+            print(f"写入结果缓存失败: {e}")
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.prune()
+
+    def prune(self):
+        """超过最大条目数时按最近使用时间淘汰旧条目"""
+        if not os.path.isdir(self.directory):
+            return
+        entries = [
+            os.path.join(self.directory, shard, name)
+            for shard in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, shard))
+            for name in os.listdir(os.path.join(self.directory, shard))
+            if not name.startswith('.')
+        ]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda path: os.path.getmtime(path), reverse=True)
+        for path in entries[self.max_entries:]:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,192 @@
+"""
+登记来源配置模块
+描述工作簿中各登记来源（sheet）的位置、列布局和统计结果的键名前缀，
+新增来源只需修改配置，无需改动解析代码
+
+环境变量:
+    REPORTGENE_SOURCES: 来源配置JSON文件路径，为空时使用内置的两个来源
+
+配置文件格式（JSON数组，每项一个来源；#后为说明，实际文件中不能包含）:
+    [
+      {
+        "prefix": "sunshine",          # 结果键名前缀，如 sunshine_current、{{sunshine_count}}
+        "sheet": "阳光xf登记",          # sheet名称
+        "label": "国家信访局",          # 显示名称（可选，默认为sheet名称）
+        "header_row": 1,               # 表头所在行索引（可选，默认为第2行，其后为数据）
+        "headers": {"name": ["姓名", "上访人"]},  # 按表头定位列时的表头文字（可选，补充默认值）
+        "date_column": 1,              # 表头中找不到"登记时间"时使用的列索引（可选，默认为B列）
+        "columns": {"unit": 9, "name": 2, "travel_method": 16, "group_appeal": 18}  # 同上，人员字段
+      }
+    ]
+
+列位置优先按表头文字定位（插入、删除列不影响统计），表头中找不到时才使用配置的列索引；
+同一表头布局的定位结果按表头指纹缓存，重复上传相同布局的文件时不再重新定位
+"""
+import functools
+import json
+import os
+import re
+
+SOURCES_PATH = os.environ.get("REPORTGENE_SOURCES", "")
+
+# 人员字段及其空值时的默认值
+FIELD_DEFAULTS = {
+    'unit': "",           # 责任单位
+    'name': "XX",         # 姓名
+    'travel_method': "",  # 进京方式
+    'group_appeal': "",   # 群体诉求
+}
+
+# 登记时间及人员字段对应的表头文字
+DEFAULT_HEADERS = {
+    'date': ("登记时间",),
+    'unit': ("责任单位",),
+    'name': ("姓名",),
+    'travel_method': ("进京方式",),
+    'group_appeal': ("群体诉求",),
+}
+
+# 与原有登记表一致的列布局：B=登记时间，C=姓名，J=责任单位，Q=进京方式，S=群体诉求
+# 仅在表头中找不到对应文字时使用
+DEFAULT_HEADER_ROW = 1
+DEFAULT_DATE_COLUMN = 1
+DEFAULT_COLUMNS = {'unit': 9, 'name': 2, 'travel_method': 16, 'group_appeal': 18}
+
+# 缓存的表头布局数量
+LAYOUT_CACHE_SIZE = 64
+
+DEFAULT_SOURCES = [
+    {'prefix': 'sunshine', 'sheet': "阳光xf登记", 'label': "国家信访局"},
+    {'prefix': 'gab', 'sheet': "gab上访", 'label': "公安部"},
+]
+
+_PREFIX_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9]*$')
+
+
+def normalize_source(source):
+    """
+    补全单个来源配置的默认值并校验
+
+    Args:
+        source: 来源配置字典
+
+    Returns:
+        dict: 包含 prefix、sheet、label、header_row、date_column、columns、headers
+              以及 layout_spec（列定位规则，用作布局缓存的键）的完整配置
+
+    Raises:
+        ValueError: 配置不正确
+    """
+    prefix = source.get('prefix')
+    sheet = source.get('sheet')
+    if not prefix or not _PREFIX_PATTERN.match(str(prefix)):
+        raise ValueError(f"来源前缀不正确（须为字母开头的字母数字组合）: {prefix!r}")
+    if not sheet:
+        raise ValueError(f"来源 {prefix} 未指定sheet名称")
+
+    columns = dict(DEFAULT_COLUMNS)
+    columns.update(source.get('columns') or {})
+    headers = dict(DEFAULT_HEADERS)
+    for field, names in (source.get('headers') or {}).items():
+        headers[field] = (names,) if isinstance(names, str) else tuple(names)
+    unknown = (set(columns) | set(headers)) - set(FIELD_DEFAULTS) - {'date'}
+    if unknown:
+        raise ValueError(f"来源 {prefix} 包含未知字段: {'、'.join(sorted(unknown))}")
+
+    date_column = source.get('date_column', DEFAULT_DATE_COLUMN)
+    fallbacks = dict(columns, date=date_column)
+    return {
+        'prefix': prefix,
+        'sheet': sheet,
+        'label': source.get('label') or sheet,
+        'header_row': source.get('header_row', DEFAULT_HEADER_ROW),
+        'date_column': date_column,
+        'columns': columns,
+        'headers': headers,
+        'layout_spec': tuple(
+            (field, tuple(_normalize_header(name) for name in headers[field]), fallbacks.get(field))
+            for field in ('date',) + tuple(FIELD_DEFAULTS)
+        ),
+    }
+
+
+def load_sources(path=None):
+    """
+    读取登记来源配置
+
+    Args:
+        path: 配置文件路径，默认为 REPORTGENE_SOURCES；均为空时使用内置来源
+
+    Returns:
+        list: 补全后的来源配置列表
+
+    Raises:
+        ValueError: 配置不正确或前缀重复
+    """
+    path = path or SOURCES_PATH
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw_sources = json.load(f)
+    else:
+        raw_sources = DEFAULT_SOURCES
+
+    if not raw_sources:
+        raise ValueError("至少需要配置一个登记来源")
+
+    sources = [normalize_source(source) for source in raw_sources]
+    prefixes = [source['prefix'] for source in sources]
+    if len(set(prefixes)) != len(prefixes):
+        raise ValueError(f"来源前缀重复: {prefixes}")
+    return sources
+
+
+def _normalize_header(value):
+    """表头文字去除空白（含单元格内换行），空单元格为空字符串"""
+    if value is None or value != value:  # None 或 NaN
+        return ""
+    return re.sub(r'\s+', '', str(value))
+
+
+def header_fingerprint(cells):
+    """
+    表头行指纹：规范化后的表头文字元组，相同布局的文件指纹相同
+
+    Args:
+        cells: 表头行的单元格值
+
+    Returns:
+        tuple: 规范化后的表头文字
+    """
+    return tuple(_normalize_header(cell) for cell in cells)
+
+
+def resolve_columns(header_cells, source):
+    """
+    按表头文字定位登记时间和人员字段所在列
+
+    Args:
+        header_cells: 表头行的单元格值（按列顺序）
+        source: normalize_source 返回的来源配置
+
+    Returns:
+        dict: {'date': 列索引, 'unit': 列索引, ...}，表头中找不到的字段为配置的列索引（可能为None）
+    """
+    return dict(_resolve_layout(header_fingerprint(header_cells), source['layout_spec']))
+
+
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _resolve_layout(fingerprint, layout_spec):
+    """
+    按表头指纹定位各字段所在列（结果缓存，相同布局只定位一次）
+
+    先找文字完全一致的表头，再找包含该文字的表头（如"登记时间（月.日）"），均取最左一列
+    """
+    resolved = []
+    for field, names, fallback in layout_spec:
+        index = next((i for name in names for i, cell in enumerate(fingerprint) if cell == name), None)
+        if index is None:
+            index = next(
+                (i for name in names for i, cell in enumerate(fingerprint) if name and name in cell), None
+            )
+        resolved.append((field, fallback if index is None else index))
+    return tuple(resolved)
@@ -15,7 +15,7 @@ fi
 
 # 检查依赖
 echo "✓ 检查依赖..."
-python -c "import gradio, pandas, docx" 2>/dev/null
+python -c "import importlib.util, sys; sys.exit(any(importlib.util.find_spec(m) is None for m in ('gradio', 'pandas', 'docx')))" 2>/dev/null
 if [ $? -ne 0 ]; then
     echo "⚠️  依赖缺失，正在安装..."
     pip install -r requirements.txt -q
@@ -0,0 +1,142 @@
+"""
+统计数据导出模块
+将解析结果（各来源人数、环比同比、分类计数和本周人员列表）保存为JSON和CSV，
+与Word报告放在同一目录，便于在表格软件或其他系统中继续加工
+
+人员列表中的姓名与报告一致，均为脱敏后的姓名
+"""
+import csv
+import json
+import os
+import time
+
+from atomic_io import atomic_open
+from person_table import person_records
+
+# 分类计数的字段及显示名称
+COUNTER_LABELS = {
+    'unit': '责任单位',
+    'group_appeal': '群体诉求',
+    'travel_method': '进京方式',
+}
+
+# 人员列表CSV的列及表头
+PERSON_COLUMNS = (
+    ('source', '来源'),
+    ('unit', '责任单位'),
+    ('name', '姓名'),
+    ('travel_method', '进京方式'),
+    ('group_appeal', '群体诉求'),
+)
+
+# 在JSON中单独列出、不重复写入 result 的结果键
+_SEPARATE_KEYS = ('counters', 'persons')
+
+
+def export_paths(output_path):
+    """
+    统计数据文件的路径（与Word报告同目录）
+
+    Args:
+        output_path: Word报告路径
+
+    Returns:
+        dict: {'json': <报告文件名>_统计.json,
+               'persons_csv': <报告文件名>_人员.csv,
+               'counters_csv': <报告文件名>_分类统计.csv}
+    """
+    stem = os.path.splitext(output_path)[0]
+    return {
+        'json': stem + '_统计.json',
+        'persons_csv': stem + '_人员.csv',
+        'counters_csv': stem + '_分类统计.csv',
+    }
+
+
+def write_json(path, summary):
+    """
+    将完整的统计结果保存为JSON
+
+    Args:
+        path: 输出路径
+        summary: build_report 返回的处理摘要（包含 data 和日期范围）
+
+    Returns:
+        str: 输出路径
+    """
+    data = summary.get('data') or {}
+    document = {
+        'excel_path': summary.get('excel_path'),
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'current_week': [summary.get('current_week_start'), summary.get('current_week_end')],
+        'last_week': [summary.get('last_week_start'), summary.get('last_week_end')],
+        'result': {key: value for key, value in data.items() if key not in _SEPARATE_KEYS},
+        'counters': data.get('counters', {}),
+        'persons': person_records(data.get('persons')),
+    }
+    with atomic_open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def write_persons_csv(path, persons, labels=None):
+    """
+    将本周人员列表保存为CSV（UTF-8 BOM，Excel可直接打开）
+
+    Args:
+        path: 输出路径
+        persons: 逐人的字典列表（见 person_table.person_records）
+        labels: {来源前缀: 显示名称}，来源列显示为该名称
+
+    Returns:
+        str: 输出路径
+    """
+    labels = labels or {}
+    with atomic_open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(title for _, title in PERSON_COLUMNS)
+        for person in persons:
+            row = dict(person, source=labels.get(person.get('source'), person.get('source', '')))
+            writer.writerow(row.get(key, '') for key, _ in PERSON_COLUMNS)
+    return path
+
+
+def write_counters_csv(path, counters):
+    """
+    将分类计数保存为CSV，每行一个（分类、取值、人数）
+
+    Args:
+        path: 输出路径
+        counters: 解析结果中的 counters 字典
+
+    Returns:
+        str: 输出路径
+    """
+    with atomic_open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('分类', '取值', '人数'))
+        for field, label in COUNTER_LABELS.items():
+            for value, count in (counters.get(field) or {}).items():
+                writer.writerow((label, value, count))
+    return path
+
+
+def write_exports(output_path, summary):
+    """
+    在Word报告旁保存全部统计数据文件
+
+    Args:
+        output_path: Word报告路径
+        summary: build_report 返回的处理摘要
+
+    Returns:
+        list: 已写入的文件路径（JSON、人员CSV、分类统计CSV）
+    """
+    data = summary.get('data') or {}
+    labels = {source['prefix']: source['label'] for source in data.get('sources', [])}
+    paths = export_paths(output_path)
+    return [
+        write_json(paths['json'], summary),
+        write_persons_csv(paths['persons_csv'], person_records(data.get('persons')), labels),
+        write_counters_csv(paths['counters_csv'], data.get('counters', {})),
+    ]
@@ -0,0 +1,29 @@
+"""
+命令行模式单元测试
+历史回溯与generate一样保存附带文件并打包，数据质量摘要只打印一次
+"""
+import zipfile
+from datetime import date
+
+import cli
+from benchmarks.synthetic import generate_template, generate_workbook
+
+
+def test_backfill_writes_sidecars_and_prints_quality_once(tmp_path, capsys):
+    """每周报告旁保存数据质量报告和统计数据，下载包中包含这些文件；数据质量摘要只打印一次"""
+    workbook = generate_workbook(str(tmp_path / "2025年登记表.xlsx"), 300, end_date=date(2025, 9, 24), days=60)
+    template = generate_template(str(tmp_path / "template.docx"))
+    bundle = tmp_path / "backfill.zip"
+
+    code = cli.main(['backfill', workbook, '--from', '2025-09-08', '--to', '2025-09-24',
+                     '-t', template, '-o', str(tmp_path / "out"), '--summary', str(tmp_path / "summary.json"),
+                     '--quality-report', '--export-stats', '--bundle', str(bundle)])
+    assert code == 0
+
+    with zipfile.ZipFile(bundle) as archive:
+        names = archive.namelist()
+    assert sum(name.endswith('.docx') for name in names) == 3
+    assert sum(name.endswith('_数据质量.json') for name in names) == 3
+    assert sum(name.endswith('_人员.csv') for name in names) == 3
+
+    assert capsys.readouterr().err.count("🔍 数据质量") == 1
@@ -0,0 +1,72 @@
+"""
+日期计算单元测试
+覆盖登记年份推断（跨年、锚点、录错的行）和按周分组，使用构造的数据，不依赖真实登记表
+"""
+from datetime import date, datetime
+
+from date_calculator import (
+    infer_date_ordinals,
+    parse_excel_date,
+    same_week_last_year,
+    week_histogram,
+    week_number,
+    week_numbers,
+)
+
+
+def _dates(ordinals):
+    return [date.fromordinal(int(value)) if value else None for value in ordinals]
+
+
+def test_year_hint_rolls_over_new_year():
+    """有年份提示时，月份回退视为跨年"""
+    ordinals = infer_date_ordinals(["12.30", "12.31", "1.1", "1.2"], year_hint=2024)
+    assert _dates(ordinals) == [date(2024, 12, 30), date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 2)]
+
+
+def test_anchor_places_last_record_in_reference_year():
+    """没有年份提示时，最后一条记录落在基准日期所在年份，之前跨年的记录归入上一年"""
+    ordinals = infer_date_ordinals(["12.30", "1.2"], as_of=datetime(2025, 1, 5))
+    assert _dates(ordinals) == [date(2024, 12, 30), date(2025, 1, 2)]
+
+
+def test_anchor_moves_future_records_to_previous_year():
+    """按基准日期所在年份会晚于基准日期超过容忍天数时，归入上一年"""
+    ordinals = infer_date_ordinals(["11.20", "12.28"], as_of=datetime(2025, 1, 3))
+    assert _dates(ordinals) == [date(2024, 11, 20), date(2024, 12, 28)]
+
+
+def test_single_mistyped_month_does_not_shift_later_rows():
+    """个别录错月份的行（12月中间夹着1月）之后撤销跨年，后续记录年份不变"""
+    ordinals = infer_date_ordinals(["12.20", "1.3", "12.21"], year_hint=2024)
+    assert _dates(ordinals) == [date(2024, 12, 20), date(2025, 1, 3), date(2024, 12, 21)]
+
+
+def test_unparseable_and_datetime_cells():
+    """无法解析的值为0，日期类型的单元格直接使用其日期"""
+    values = ["", "待定", "2.30", "13.45", None, datetime(2025, 3, 4, 15, 30), "3.5"]
+    ordinals = infer_date_ordinals(values, year_hint=2025)
+    assert _dates(ordinals) == [None, None, None, None, None, date(2025, 3, 4), date(2025, 3, 5)]
+
+
+def test_parse_excel_date_default_year():
+    """单个值解析默认年份为2025，与早期版本一致"""
+    assert parse_excel_date("1.17") == datetime(2025, 1, 17)
+    assert parse_excel_date("1.17", year=2026) == datetime(2026, 1, 17)
+    assert parse_excel_date("待定") is None
+
+
+def test_week_numbers_split_on_monday():
+    """周一到周日为一周，无法解析的行（序数为0）周序号为-1"""
+    sunday, monday = date(2025, 9, 21), date(2025, 9, 22)
+    weeks = week_numbers([sunday.toordinal(), monday.toordinal(), date(2025, 9, 28).toordinal(), 0])
+    assert weeks.tolist() == [week_number(sunday), week_number(monday), week_number(monday), -1]
+    assert week_number(monday) == week_number(sunday) + 1
+    assert same_week_last_year(week_number(monday)) == week_number(date(2024, 9, 23))
+
+
+def test_week_histogram_counts_each_week():
+    """按周统计记录数，范围外和无法解析的行不计入"""
+    first = week_number(date(2025, 9, 1))
+    weeks = week_numbers([date(2025, 9, d).toordinal() for d in (1, 2, 8, 20)] + [0])
+    assert week_histogram(weeks, first, first + 2).tolist() == [2, 1, 1]
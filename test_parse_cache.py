@@ -0,0 +1,125 @@
+"""
+解析结果缓存单元测试
+缓存（内存和持久化）的解析结果与直接解析一致；有密码的登记表只保存加密后的文件
+"""
+import json
+import os
+from datetime import date, datetime
+
+import pytest
+
+from benchmarks.synthetic import generate_workbook
+from excel_parser import ExcelParser
+from parse_cache import ParseCache
+from person_table import person_records
+
+AS_OF = datetime(2025, 9, 24)
+PASSWORD = "110110"
+
+
+@pytest.fixture(scope='module')
+def workbook(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("parse_cache") / "登记表.xlsx")
+    return generate_workbook(path, 300, password=PASSWORD, end_date=date(2025, 9, 24), days=120)
+
+
+def _parse(path, cache=None, as_of=AS_OF, password=PASSWORD):
+    parser = ExcelParser(path, password=password, as_of=as_of, parse_cache=cache)
+    data = parser.parse_all()
+    data['persons'] = person_records(data['persons'])
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, default=str), parser
+
+
+def _no_reading(monkeypatch):
+    """命中缓存时不应再读取登记表"""
+    def fail(self):
+        raise AssertionError("命中缓存时不应读取登记表")
+    monkeypatch.setattr(ExcelParser, '_read_sheets', fail)
+
+
+def test_cached_results_match_direct_parse(workbook, tmp_path, monkeypatch):
+    """内存中和持久化的缓存结果与直接解析一致，其他统计周也直接使用缓存"""
+    expected, _ = _parse(workbook)
+    other_week, _ = _parse(workbook, as_of=datetime(2025, 8, 11))
+
+    cache = ParseCache(2, str(tmp_path))
+    assert _parse(workbook, cache)[0] == expected
+
+    _no_reading(monkeypatch)
+    assert _parse(workbook, cache)[0] == expected
+    assert _parse(workbook, cache, as_of=datetime(2025, 8, 11))[0] == other_week
+    # 新的缓存实例（如重启后、其他工作进程）从持久化文件读取
+    assert _parse(workbook, ParseCache(2, str(tmp_path)))[0] == expected
+
+
+def test_protected_workbooks_are_persisted_encrypted(workbook, tmp_path):
+    """有密码的登记表只保存加密后的文件，文件中没有明文"""
+    _, parser = _parse(workbook, ParseCache(2, str(tmp_path)))
+    name = next(iter(parser.load().values()))['data']['name'].iloc[-1]
+
+    files = [entry for entry in os.listdir(tmp_path) if not entry.startswith('.')]
+    assert len(files) == 1 and files[0].endswith('.npz.enc')
+    with open(tmp_path / files[0], 'rb') as f:
+        payload = f.read()
+    assert not payload.startswith(b'PK')
+    assert name.encode('utf-8') not in payload
+
+
+def test_wrong_password_misses(workbook, tmp_path):
+    """缓存键和文件名不含密码；密码错误时内存中的条目不命中，加密文件无法解密，视为未命中"""
+    cache = ParseCache(2, str(tmp_path))
+    _, parser = _parse(workbook, cache)
+    key = cache.key(workbook, parser.sources, parser.year_hint)
+    assert os.path.exists(tmp_path / (key + ".npz.enc"))
+
+    assert cache.get(key, parser.reference_date, password="wrong") is None
+    assert ParseCache(2, str(tmp_path)).get(key, parser.reference_date, password="wrong") is None
+    assert ParseCache(2, str(tmp_path)).get(key, parser.reference_date, password=PASSWORD) is not None
+
+
+def test_failed_reads_are_not_cached(workbook, tmp_path):
+    """读取失败（如密码错误）的结果不缓存"""
+    cache = ParseCache(2, str(tmp_path))
+    _parse(workbook, cache, password="wrong")
+    assert not [entry for entry in os.listdir(tmp_path) if not entry.startswith('.')]
+    assert not cache._entries
+
+
+def test_future_dates_are_rechecked(workbook):
+    """"登记时间晚于今天"在每次取出时按当天重新检查"""
+    cache = ParseCache(2)
+    _, parser = _parse(workbook, cache)
+    memory_key = next(iter(cache._entries))
+    sheets, reference = cache._entries[memory_key]
+    expected = {prefix: sheet['quality']['future_dates'] for prefix, sheet in sheets.items()}
+    stale = {prefix: dict(sheet, quality=dict(sheet['quality'], future_dates=[-1])) for prefix, sheet in sheets.items()}
+    cache._entries[memory_key] = (stale, reference)
+    key, _ = memory_key
+
+    cached = cache.get(key, parser.reference_date, password=PASSWORD)
+    assert {prefix: sheet['quality']['future_dates'] for prefix, sheet in cached.items()} == expected
+
+
+def test_anchored_years_require_same_reference_date(tmp_path):
+    """没有年份提示、按基准日期推断年份的登记表，只在锚点日期相同时复用"""
+    import openpyxl
+
+    path = str(tmp_path / "登记表.xlsx")
+    book = openpyxl.Workbook()
+    book.remove(book.active)
+    for sheet_name in ("阳光xf登记", "gab上访"):
+        sheet = book.create_sheet(sheet_name)
+        sheet.append(["登记表"])
+        sheet.append(["序号", "登记时间", "姓名", "责任单位"])
+        for i, registered in enumerate(["11.3", "12.20", "1.3"]):
+            sheet.append([i + 1, registered, f"张{i}", "丰县"])
+    book.save(path)
+
+    cache = ParseCache(2)
+    future = datetime(2031, 1, 5)
+    parser = ExcelParser(path, as_of=future, parse_cache=cache)
+    assert all(sheet['anchored'] for sheet in parser.load().values())
+
+    key, _ = next(iter(cache._entries))
+    assert cache.get(key, datetime(2031, 1, 5, 18)) is not None
+    assert cache.get(key, datetime(2031, 1, 6)) is None
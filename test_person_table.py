@@ -0,0 +1,96 @@
+"""
+人员列式存储单元测试
+覆盖分类编码的统计、合并和序列化，并与逐行统计的结果对照
+"""
+from collections import Counter
+from datetime import date, datetime
+
+from benchmarks.synthetic import generate_rows, generate_workbook
+from date_calculator import week_number
+from excel_parser import ExcelParser
+from person_table import PersonTable, person_records
+
+
+def _table(source="sunshine"):
+    return PersonTable.from_columns({
+        'name': ["张三", "李四", "王五", "赵六"],
+        'unit': ["丰县", " 丰县 ", "沛县", ""],
+        'travel_method': ["公路", "铁路", "公路（自驾）", "nan"],
+        'group_appeal': ["讨薪", "", "讨薪", ""],
+    }, source)
+
+
+def test_counts_merge_stripped_values_and_skip_empty():
+    """取值去除首尾空白后合并，忽略空值和nan，按人数从多到少排列"""
+    table = _table()
+    assert table.counts('unit') == {"丰县": 2, "沛县": 1}
+    assert list(table.counts('travel_method')) == ["公路", "铁路", "公路（自驾）"]
+    assert table.counts('group_appeal') == {"讨薪": 2}
+    assert table.count_containing('travel_method', "公路") == 2
+
+
+def test_ties_keep_first_appearance_order():
+    """人数相同时按首次出现的顺序"""
+    table = PersonTable.from_columns({'name': ["a", "b", "c", "d"], 'unit': ["沛县", "丰县", "丰县", "沛县"]})
+    assert list(table.counts('unit')) == ["沛县", "丰县"]
+
+
+def test_concat_remaps_codes():
+    """合并后各字段的取值列表合并，编码重新映射，来源按表区分"""
+    other = PersonTable.from_columns({'name': ["孙七"], 'unit': ["沛县"], 'travel_method': ["航空"]}, "gab")
+    merged = PersonTable.concat([_table(), other], sources=["sunshine", "gab"])
+    assert len(merged) == 5
+    assert merged.counts('unit') == {"丰县": 2, "沛县": 2}
+    assert merged.counts('source') == {"sunshine": 4, "gab": 1}
+    assert merged.column('travel_method')[-1] == "航空"
+    assert merged.column('group_appeal')[-1] == ""
+
+
+def test_empty_table():
+    """没有人员时统计结果为空"""
+    table = PersonTable.concat([PersonTable.empty("sunshine"), PersonTable.empty("gab")])
+    assert len(table) == 0
+    assert table.counts('unit') == {}
+    assert table.count_containing('travel_method', "公路") == 0
+    assert table.records() == []
+
+
+def test_records_and_round_trip():
+    """展开为逐人字典，to_dict/from_dict 可还原"""
+    table = _table().with_names(["张X", "李X", "王X", "赵X"])
+    records = person_records(table.to_dict())
+    assert records[0] == {'source': "sunshine", 'unit': "丰县", 'name': "张X",
+                          'travel_method': "公路", 'group_appeal': "讨薪"}
+    assert PersonTable.from_dict(table.to_dict()).records() == table.records() == records
+    # 早期缓存的结果中为字典列表，原样返回
+    assert person_records(records) == records
+    assert person_records(None) == []
+
+
+def test_parser_counts_match_row_by_row_counts(tmp_path):
+    """解析结果的本周人数和各责任单位人数与逐行统计一致"""
+    end_date = date(2025, 9, 24)
+    path = generate_workbook(str(tmp_path / "登记表.xlsx"), 900, end_date=end_date, days=90, noise=0)
+    data = ExcelParser(path, as_of=datetime(2025, 9, 24)).parse_all()
+
+    # 与合成数据的生成方式一致：两个sheet约2:1，各自的随机种子为0和1
+    current_week = week_number(end_date)
+    start_date = date.fromordinal(end_date.toordinal() - 89)
+    units = Counter()
+    totals = {}
+    for prefix, rows, seed in (('sunshine', 600, 0), ('gab', 300, 1)):
+        current = [
+            row for i, row in enumerate(generate_rows(rows, end_date=end_date, days=90, seed=seed, noise=0))
+            if week_number(date.fromordinal(start_date.toordinal() + i * 90 // rows)) == current_week
+        ]
+        totals[prefix] = len(current)
+        units.update(row[9] for row in current)
+
+    assert data['sunshine_current'] == totals['sunshine']
+    assert data['gab_current'] == totals['gab']
+    assert data['total_current'] == sum(totals.values())
+    persons = PersonTable.from_dict(data['persons'])
+    assert len(persons) == sum(totals.values())
+    counts = persons.counts('unit')
+    assert counts == dict(units)
+    assert list(counts.values()) == sorted(counts.values(), reverse=True)
@@ -0,0 +1,77 @@
+"""
+报告生成流程单元测试
+覆盖流水线阶段的依赖顺序、出错时的处理以及预检查失败时的处理摘要
+"""
+import threading
+import time
+
+import pytest
+
+from report_pipeline import build_report, run_stages
+
+
+def test_stages_receive_dependency_results():
+    """阶段按依赖顺序接收依赖阶段的结果"""
+    results = run_stages({
+        'sum': (lambda a, b: a + b, ('a', 'b')),
+        'a': (lambda: 1, ()),
+        'b': (lambda: 2, ()),
+        'double': (lambda total: total * 2, ('sum',)),
+    })
+    assert results == {'a': 1, 'b': 2, 'sum': 3, 'double': 6}
+
+
+def test_independent_stages_run_concurrently():
+    """互不依赖的阶段同时执行"""
+    barrier = threading.Barrier(2, timeout=5)
+    results = run_stages({
+        'left': (lambda: barrier.wait() is not None, ()),
+        'right': (lambda: barrier.wait() is not None, ()),
+    })
+    assert results == {'left': True, 'right': True}
+
+
+def test_error_is_raised_after_running_stages_finish():
+    """某个阶段出错时，等其余已开始的阶段结束后抛出该异常，依赖它的阶段不再执行"""
+    finished, skipped = threading.Event(), []
+
+    def slow():
+        time.sleep(0.2)
+        finished.set()
+
+    def fail():
+        raise RuntimeError("解析失败")
+
+    with pytest.raises(RuntimeError, match="解析失败"):
+        run_stages({
+            'slow': (slow, ()),
+            'fail': (fail, ()),
+            'after': (lambda _: skipped.append(True), ('fail',)),
+        })
+    assert finished.is_set()
+    assert not skipped
+
+
+@pytest.mark.parametrize('stages', [
+    {'a': (lambda missing: missing, ('missing',))},
+    {'a': (lambda b: b, ('b',)), 'b': (lambda a: a, ('a',))},
+])
+def test_unsatisfiable_dependencies(stages):
+    """依赖的阶段不存在或存在循环依赖时抛出ValueError"""
+    with pytest.raises(ValueError):
+        run_stages(stages)
+
+
+def test_preflight_errors_are_reported(tmp_path, monkeypatch):
+    """模板不存在时不解析Excel、不生成报告，处理摘要中给出具体原因"""
+    from benchmarks.synthetic import generate_workbook
+    from excel_parser import ExcelParser
+
+    def fail(self):
+        raise AssertionError("预检查未通过时不应解析Excel")
+    monkeypatch.setattr(ExcelParser, 'parse_all', fail)
+
+    excel_path = generate_workbook(str(tmp_path / "登记表.xlsx"), 60, days=30)
+    summary = build_report(excel_path, str(tmp_path / "missing.docx"), str(tmp_path / "报告.docx"))
+    assert not summary['success']
+    assert any("Word模板不存在" in error for error in summary['errors'])
@@ -0,0 +1,43 @@
+"""
+报告结果缓存单元测试
+内容相同但文件名中年份不同的登记表不共用缓存的报告
+"""
+import shutil
+from datetime import date, datetime
+
+from benchmarks.synthetic import generate_template, generate_workbook
+from excel_parser import ExcelParser
+from report_pipeline import build_report
+from result_cache import ResultCache
+
+AS_OF = datetime(2025, 9, 24)
+
+
+def test_key_depends_on_year_hint(tmp_path):
+    """缓存键包含文件名中的年份提示"""
+    cache = ResultCache(str(tmp_path / "cache"))
+    template = generate_template(str(tmp_path / "template.docx"))
+    workbook = generate_workbook(str(tmp_path / "2025年登记表.xlsx"), 60, end_date=date(2025, 9, 24), days=30)
+    renamed = shutil.copy(workbook, tmp_path / "2024年登记表.xlsx")
+
+    key = cache.key(workbook, template, as_of=AS_OF)
+    assert cache.key(str(renamed), template, as_of=AS_OF) != key
+    assert cache.key(str(renamed), template, as_of=AS_OF, year_hint=2025) == key
+
+
+def test_year_named_copy_is_not_served_cached_report(tmp_path):
+    """内容相同、文件名年份不同的登记表重新统计，结果与直接解析一致"""
+    cache = ResultCache(str(tmp_path / "cache"))
+    template = generate_template(str(tmp_path / "template.docx"))
+    workbook = generate_workbook(str(tmp_path / "2025年登记表.xlsx"), 300, end_date=date(2025, 9, 24),
+                                 days=120, noise=0)
+    renamed = str(shutil.copy(workbook, tmp_path / "2024年登记表.xlsx"))
+
+    first = build_report(workbook, template, str(tmp_path / "2025.docx"), as_of=AS_OF, cache=cache)
+    assert first['success'], first['errors']
+    assert first['data']['total_current'] > 0
+
+    second = build_report(renamed, template, str(tmp_path / "2024.docx"), as_of=AS_OF, cache=cache)
+    assert not second.get('cached') and not second.get('reused')
+    expected = ExcelParser(renamed, as_of=AS_OF).parse_all()['total_current']
+    assert second['data']['total_current'] == expected != first['data']['total_current']
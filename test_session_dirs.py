@@ -0,0 +1,39 @@
+"""
+会话输出目录清理单元测试
+超过保留时长或超出保留个数的旧会话目录被删除，当前会话的目录保留
+"""
+import os
+import time
+
+import app
+
+
+def _make_sessions(root, ages_hours):
+    now = time.time()
+    for i, age in enumerate(ages_hours):
+        path = root / f"s{i}"
+        path.mkdir()
+        (path / "报告.docx").write_bytes(b"docx")
+        os.utime(path, (now - age * 3600, now - age * 3600))
+
+
+def test_prunes_by_age_and_count(tmp_path, monkeypatch):
+    """超过保留时长的目录和超出个数的最早目录被删除"""
+    monkeypatch.setattr(app, 'SESSION_OUTPUT_DIR', str(tmp_path))
+    _make_sessions(tmp_path, [0, 1, 2, 3, 30])
+
+    assert app.prune_session_dirs(max_age_hours=24, max_dirs=3) == 2
+    assert sorted(os.listdir(tmp_path)) == ["s0", "s1", "s2"]
+
+
+def test_keeps_current_session(tmp_path, monkeypatch):
+    """当前会话的目录即使已过期也不删除；新建会话目录时清理旧目录"""
+    monkeypatch.setattr(app, 'SESSION_OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(app, 'SESSION_MAX_AGE_HOURS', 24)
+    _make_sessions(tmp_path, [48, 48])
+
+    assert app.prune_session_dirs(keep="s0") == 1
+    assert os.listdir(tmp_path) == ["s0"]
+
+    app.session_output_dir("new")
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,66 @@
+"""
+预生成服务定时计划单元测试
+覆盖cron各字段的匹配，以及日和星期同时有限制时的判断（与Vixie cron一致）
+"""
+from datetime import datetime
+
+import pytest
+
+from watcher import CronSchedule
+
+
+def _matching_days(expression, year=2025, month=9):
+    """某月中符合计划（在6:00）的日期"""
+    schedule = CronSchedule(expression)
+    return [day for day in range(1, 31) if schedule.matches(datetime(year, month, day, 6, 0))]
+
+
+def test_minute_and_hour_fields():
+    """列表、范围和步长"""
+    schedule = CronSchedule("*/15 6-7,22 * * *")
+    assert schedule.matches(datetime(2025, 9, 22, 6, 45))
+    assert schedule.matches(datetime(2025, 9, 22, 22, 0))
+    assert not schedule.matches(datetime(2025, 9, 22, 6, 50))
+    assert not schedule.matches(datetime(2025, 9, 22, 8, 0))
+
+
+def test_weekday_only():
+    """只限制星期时按星期匹配（2025年9月1日为周一，0和7都表示周日）"""
+    assert _matching_days("0 6 * * 1") == [1, 8, 15, 22, 29]
+    assert _matching_days("0 6 * * 0") == _matching_days("0 6 * * 7") == [7, 14, 21, 28]
+
+
+def test_day_and_weekday_restricted_match_either():
+    """日和星期都有限制时满足其一即可"""
+    assert _matching_days("0 6 1,15 * 1") == [1, 8, 15, 22, 29]
+    assert _matching_days("0 6 2 * 0") == [2, 7, 14, 21, 28]
+
+
+def test_stepped_wildcard_days_are_not_restricted():
+    """以*开头的日、星期字段（如*/2）不算限制，两者同时满足才匹配"""
+    # 单数日（*/2从1开始）且为周日、周二、周四、周六
+    assert _matching_days("0 6 */2 * */2") == [7, 9, 11, 13, 21, 23, 25, 27]
+    assert _matching_days("0 6 */10 * *") == [1, 11, 21]
+
+
+def test_month_field():
+    """月份不符合时不匹配"""
+    schedule = CronSchedule("30 6 * 1,7 *")
+    assert schedule.matches(datetime(2025, 7, 3, 6, 30))
+    assert not schedule.matches(datetime(2025, 9, 3, 6, 30))
+
+
+def test_due_checks_every_minute_in_interval():
+    """(since, now] 区间内有符合计划的分钟时为True，区间起点不计入"""
+    schedule = CronSchedule("30 6 * * 1")
+    monday = datetime(2025, 9, 22, 6, 30)
+    assert schedule.due(datetime(2025, 9, 22, 6, 0), datetime(2025, 9, 22, 7, 0))
+    assert not schedule.due(monday, datetime(2025, 9, 22, 7, 0))
+    assert not schedule.due(datetime(2025, 9, 23, 6, 0), datetime(2025, 9, 23, 7, 0))
+
+
+@pytest.mark.parametrize('expression', ["30 6 * *", "60 6 * * *", "0 6 * * 8", "*/0 6 * * *", "a 6 * * *"])
+def test_invalid_expressions(expression):
+    """段数不对、取值超出范围或无法解析时抛出ValueError"""
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
@@ -0,0 +1,101 @@
+"""
+统计窗口指纹单元测试
+修改统计窗口之外的行或报告不用的列时指纹不变、沿用上次的报告；修改本周的行时重新生成
+"""
+from datetime import date, datetime
+
+import pytest
+
+from benchmarks.synthetic import generate_template, generate_workbook
+from date_calculator import week_number
+from excel_parser import ExcelParser
+from report_pipeline import build_report
+from result_cache import ResultCache
+
+END_DATE = date(2025, 9, 24)
+AS_OF = datetime(2025, 9, 24)
+
+# 合成登记表的列（从1开始）：C=姓名，G=联系电话（报告不用），Q=进京方式
+NAME_COLUMN, PHONE_COLUMN, TRAVEL_COLUMN = 3, 7, 17
+# 第1行为标题、第2行为表头；第3行为最早的登记（约120天前），最后一行为本周
+OLD_ROW = 3
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return generate_workbook(str(tmp_path / "2025年登记表.xlsx"), 600, end_date=END_DATE, days=120, noise=0)
+
+
+def _edit(path, target, cells, sheet_name="阳光xf登记"):
+    """修改指定单元格后另存为target（row为None表示最后一行）"""
+    import openpyxl
+
+    book = openpyxl.load_workbook(path)
+    sheet = book[sheet_name]
+    for (row, column), value in cells.items():
+        sheet.cell(row=row or sheet.max_row, column=column, value=value)
+    book.save(target)
+    return target
+
+
+def _fingerprint(path):
+    return ExcelParser(path, as_of=AS_OF).window_fingerprint()
+
+
+def test_fingerprint_is_stable(workbook, tmp_path):
+    """相同数据的指纹相同（与文件本身无关）"""
+    assert _fingerprint(workbook) == _fingerprint(_edit(workbook, str(tmp_path / "copy.xlsx"), {}))
+
+
+def test_old_rows_and_unused_columns_do_not_change_fingerprint(workbook, tmp_path):
+    """修改统计窗口之外的行或报告不用的列，指纹不变"""
+    edited = _edit(workbook, str(tmp_path / "old.xlsx"), {
+        (OLD_ROW, TRAVEL_COLUMN): "航空",
+        (OLD_ROW, PHONE_COLUMN): "10000000000",
+        (None, PHONE_COLUMN): "10000000000",
+    })
+    assert _fingerprint(edited) == _fingerprint(workbook)
+
+
+def test_recent_rows_change_fingerprint(workbook, tmp_path):
+    """修改本周的人员字段，指纹改变"""
+    edited = _edit(workbook, str(tmp_path / "recent.xlsx"), {(None, NAME_COLUMN): "测试人员"})
+    assert _fingerprint(edited) != _fingerprint(workbook)
+
+
+def test_fingerprint_depends_on_week(workbook):
+    """不同统计周的指纹不同"""
+    parser = ExcelParser(workbook, as_of=AS_OF)
+    current_week = week_number(AS_OF)
+    assert parser.window_fingerprint(current_week) != parser.window_fingerprint(current_week - 1)
+
+
+def test_window_key_depends_on_template_and_week(tmp_path):
+    """统计窗口的缓存键随模板和统计周变化，同一周内的基准日期相同"""
+    cache = ResultCache(str(tmp_path / "cache"))
+    template = generate_template(str(tmp_path / "template.docx"))
+    key = cache.window_key("fingerprint", template, as_of=AS_OF)
+    assert cache.window_key("fingerprint", template, as_of=datetime(2025, 9, 26)) == key
+    assert cache.window_key("fingerprint", template, as_of=datetime(2025, 10, 1)) != key
+    assert cache.window_key("other", template, as_of=AS_OF) != key
+
+
+def test_report_is_reused_only_when_window_unchanged(workbook, tmp_path):
+    """登记表修改了较早的行时沿用上次的报告，修改了本周的行时重新生成"""
+    cache = ResultCache(str(tmp_path / "cache"))
+    template = generate_template(str(tmp_path / "template.docx"))
+
+    def build(path, name):
+        summary = build_report(path, template, str(tmp_path / name), as_of=AS_OF, cache=cache)
+        assert summary['success'], summary['errors']
+        return summary
+
+    first = build(workbook, "first.docx")
+    assert not first.get('reused')
+
+    old = _edit(workbook, str(tmp_path / "old.xlsx"), {(OLD_ROW, TRAVEL_COLUMN): "航空"})
+    assert build(old, "old.docx").get('reused')
+
+    recent = _edit(workbook, str(tmp_path / "recent.xlsx"), {(None, NAME_COLUMN): "测试人员"})
+    rebuilt = build(recent, "recent.docx")
+    assert not rebuilt.get('reused') and not rebuilt.get('cached')
@@ -3,56 +3,51 @@
 系统验证脚本
 检查所有组件是否正常工作
 """
-import sys
+import importlib.metadata
+import importlib.util
 import os
+import subprocess
+import sys
+
+# 需要检查的依赖：(导入名, 发行包名, 显示名称)
+REQUIRED_PACKAGES = [
+    ("gradio", "gradio", "Gradio"),
+    ("pandas", "pandas", "Pandas"),
+    ("openpyxl", "openpyxl", "OpenPyXL"),
+    ("docx", "python-docx", "python-docx"),
+    ("msoffcrypto", "msoffcrypto-tool", "msoffcrypto-tool"),
+    ("audioop", "audioop-lts", "audioop (通过audioop-lts)"),
+]
+
+# 启动耗时预算（毫秒），可通过环境变量 REPORTGENE_IMPORT_BUDGET_MS 统一覆盖
+IMPORT_TIME_BUDGETS_MS = {
+    "app": 300,
+    "cli": 300,
+    "report_pipeline": 200,
+    "excel_parser": 100,
+    "word_generator": 100,
+    "date_calculator": 50,
+}
+
 
 def check_imports():
-    """检查所有必要的模块导入"""
+    """检查所有必要的模块是否已安装（只查找不导入，避免加载重型依赖）"""
     print("🔍 检查模块导入...")
     
-    try:
-        import gradio
-        print(f"  ✓ Gradio {gradio.__version__}")
-    except ImportError as e:
-        print(f"  ❌ Gradio导入失败: {e}")
-        return False
-    
-    try:
-        import pandas
-        print(f"  ✓ Pandas {pandas.__version__}")
-    except ImportError as e:
-        print(f"  ❌ Pandas导入失败: {e}")
-        return False
-    
-    try:
-        import openpyxl
-        print(f"  ✓ OpenPyXL {openpyxl.__version__}")
-    except ImportError as e:
-        print(f"  ❌ OpenPyXL导入失败: {e}")
-        return False
-    
-    try:
-        import docx
-        print(f"  ✓ python-docx")
-    except ImportError as e:
-        print(f"  ❌ python-docx导入失败: {e}")
-        return False
-    
-    try:
-        import msoffcrypto
-        print(f"  ✓ msoffcrypto-tool")
-    except ImportError as e:
-        print(f"  ❌ msoffcrypto-tool导入失败: {e}")
-        return False
-    
-    try:
-        import audioop
-        print(f"  ✓ audioop (通过audioop-lts)")
-    except ImportError as e:
-        print(f"  ❌ audioop导入失败: {e}")
-        return False
+    all_found = True
+    for module_name, dist_name, label in REQUIRED_PACKAGES:
+        if importlib.util.find_spec(module_name) is None:
+            print(f"  ❌ {label}未安装")
+            all_found = False
+            continue
+        
+        try:
+            version = importlib.metadata.version(dist_name)
+        except importlib.metadata.PackageNotFoundError:
+            version = ""
+        print(f"  ✓ {label} {version}".rstrip())
     
-    return True
+    return all_found
 
 def check_files():
     """检查必要文件是否存在"""
@@ -62,6 +57,19 @@ def check_files():
         "app.py",
         "excel_parser.py", 
         "date_calculator.py",
+        "source_schema.py",
+        "data_quality.py",
+        "stats_export.py",
+        "visitor_index.py",
+        "person_table.py",
+        "consolidated_store.py",
+        "result_cache.py",
+        "parse_cache.py",
+        "atomic_io.py",
+        "watcher.py",
+        "worker_pool.py",
+        "bundle.py",
+        "preview_layout.py",
         "word_generator.py",
         "template.docx",
         "requirements.txt",
@@ -132,8 +140,81 @@ def check_directories():
     
     return all_exist
 
-def main():
+def measure_import_time(module_name):
+    """
+    在独立子进程中测量模块的导入耗时（基于 python -X importtime）
+    
+    Args:
+        module_name: 模块名
+    
+    Returns:
+        tuple: (总耗时毫秒, [(耗时毫秒, 依赖模块名), ...] 按耗时降序)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else module_name)
+    
+    # 输出格式: "import time: self [us] | cumulative | imported package"，
+    # 子模块先于父模块输出，缩进每深一层增加两个空格
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append((level, name.strip(), int(cumulative)))
+    
+    total_us = 0
+    entries = []
+    for index in range(len(records) - 1, -1, -1):
+        level, name, cumulative_us = records[index]
+        if level == 0 and name == module_name:
+            total_us = cumulative_us
+            # 向前收集被测模块直接导入的依赖（直到上一个顶层模块为止）
+            for child_level, child_name, child_us in reversed(records[:index]):
+                if child_level == 0:
+                    break
+                if child_level == 1:
+                    entries.append((child_us / 1000, child_name))
+            break
+    
+    entries.sort(reverse=True)
+    return total_us / 1000, entries
+
+
+def check_import_time():
+    """检查各应用模块的启动耗时是否在预算内"""
+    print("\n⏱️  检查启动耗时...")
+    
+    override = os.environ.get("REPORTGENE_IMPORT_BUDGET_MS")
+    all_within = True
+    for module_name, budget in IMPORT_TIME_BUDGETS_MS.items():
+        if override:
+            budget = float(override)
+        try:
+            total_ms, entries = measure_import_time(module_name)
+        except ImportError as e:
+            print(f"  ❌ {module_name} 导入失败: {e}")
+            all_within = False
+            continue
+        
+        mark = "✓" if total_ms <= budget else "❌"
+        print(f"  {mark} {module_name}: {total_ms:.1f} ms (预算 {budget:.0f} ms)")
+        if total_ms > budget:
+            all_within = False
+            for dep_ms, dep_name in entries[:5]:
+                print(f"      - {dep_name}: {dep_ms:.1f} ms")
+    
+    return all_within
+
+def main(argv=None):
     """主验证函数"""
+    argv = sys.argv[1:] if argv is None else argv
     print("=" * 60)
     print("🧪 汇享易报告生成系统 - 系统验证")
     print("=" * 60)
@@ -145,6 +226,10 @@ def main():
         ("目录检查", check_directories)
     ]
     
+    # 启动耗时报告模式：python verify_system.py --import-time
+    if "--import-time" in argv:
+        checks = [("启动耗时", check_import_time)]
+    
     all_passed = True
     
     for name, check_func in checks:
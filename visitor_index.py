@@ -0,0 +1,103 @@
+"""
+重复来访索引模块
+读取登记表时建立 (责任单位, 姓名) -> 全部登记日期 的索引，
+用于统计本周登记人员此前的登记次数和多周内登记次数最多的人员
+"""
+
+
+class VisitorIndex:
+    """按 (责任单位, 姓名) 分组的登记日期索引"""
+
+    def __init__(self, units, names, ordinals):
+        """
+        建立索引（一次排序完成分组）
+
+        Args:
+            units: 每行的责任单位
+            names: 每行的姓名，空姓名的行不计入
+            ordinals: 每行登记日期的公历序数，无法解析（0）的行不计入
+        """
+        import numpy as np
+        import pandas as pd
+
+        # 显式指定object类型，所有sheet都读取失败（没有数据行）时也能按字符串处理
+        rows = pd.DataFrame({
+            'unit': pd.Series(units, dtype=object),
+            'name': pd.Series(names, dtype=object),
+            'ordinal': pd.Series(ordinals, dtype='int64'),
+        })
+        rows = rows[(rows['ordinal'] > 0) & (rows['name'].str.strip() != "")]
+        rows = rows.sort_values(['unit', 'name', 'ordinal'], kind='stable')
+
+        units = rows['unit'].to_numpy()
+        names = rows['name'].to_numpy()
+        # 每组第一行的位置
+        starts = np.flatnonzero(
+            np.r_[True, (units[1:] != units[:-1]) | (names[1:] != names[:-1])]
+        ) if len(rows) else np.zeros(0, dtype=np.int64)
+
+        self.keys = list(zip(units[starts], names[starts]))
+        self.ordinals = rows['ordinal'].to_numpy(dtype=np.int64)
+        self.group_ids = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(rows)]))
+        self._slices = {
+            key: (start, end) for key, start, end in zip(self.keys, starts, np.r_[starts[1:], len(rows)])
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def visits(self, unit, name):
+        """
+        某人的全部登记日期
+
+        Returns:
+            numpy.ndarray: 升序的公历序数数组，未登记过时为空数组
+        """
+        start, end = self._slices.get((unit, name), (0, 0))
+        return self.ordinals[start:end]
+
+    def repeat_visitors(self, persons, first_ordinal):
+        """
+        找出在指定日期之前登记过的人员
+
+        Args:
+            persons: 人员的 (责任单位, 姓名) 序列
+            first_ordinal: 本周一的公历序数，早于该日期的登记计为此前登记
+
+        Returns:
+            list: [(责任单位, 姓名, 此前登记次数), ...]，按次数从多到少排列，同一人只列一次
+        """
+        import numpy as np
+
+        result = {}
+        for key in persons:
+            key = tuple(key)
+            if key in result:
+                continue
+            previous = int(np.searchsorted(self.visits(*key), first_ordinal, side='left'))
+            if previous:
+                result[key] = previous
+        return sorted(((unit, name, count) for (unit, name), count in result.items()),
+                      key=lambda item: -item[2])
+
+    def top_visitors(self, first_ordinal, last_ordinal, limit=10, min_visits=2):
+        """
+        统计日期区间内登记次数最多的人员（一次bincount完成）
+
+        Args:
+            first_ordinal: 区间起始日期的公历序数（含）
+            last_ordinal: 区间结束日期的公历序数（含）
+            limit: 最多返回的人数
+            min_visits: 最少登记次数
+
+        Returns:
+            list: [(责任单位, 姓名, 登记次数), ...]，按次数从多到少排列
+        """
+        import numpy as np
+
+        if not self.keys:
+            return []
+        in_range = (self.ordinals >= first_ordinal) & (self.ordinals <= last_ordinal)
+        counts = np.bincount(self.group_ids[in_range], minlength=len(self.keys))
+        order = np.argsort(-counts, kind='stable')[:limit]
+        return [(*self.keys[i], int(counts[i])) for i in order if counts[i] >= min_visits]
@@ -0,0 +1,231 @@
+"""
+预生成服务模块
+轮询投放目录中的登记表（先比较大小和修改时间，变化后再比较内容摘要），
+新增或修改的文件以及按计划（类cron表达式）定时对全部文件提前生成报告，
+结果写入结果缓存和输出目录，用户在界面中生成报告时直接命中缓存
+
+不依赖任何外部服务，通过 python cli.py watch 启动
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+from report_pipeline import build_report, default_output_name
+from result_cache import ResultCache, file_digest
+
+EXCEL_EXTENSIONS = ('.xls', '.xlsx')
+
+# 默认轮询间隔（秒）
+DEFAULT_INTERVAL = 60
+# 文件最后修改后至少经过的秒数，避免处理正在保存的文件
+DEFAULT_SETTLE_SECONDS = 10
+
+# cron各字段的取值范围：分、时、日、月、星期（0和7均为星期日）
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_cron_field(text, low, high):
+    """解析cron表达式的一个字段，返回允许的取值集合"""
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"步长必须大于0: {text}")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"取值超出范围 {low}-{high}: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """五段式cron表达式（分 时 日 月 星期），支持 *、列表、范围和步长"""
+
+    def __init__(self, expression):
+        """
+        Args:
+            expression: cron表达式，如 "30 6 * * 1" 表示每周一6:30
+
+        Raises:
+            ValueError: 表达式格式不正确
+        """
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式应为5段（分 时 日 月 星期）: {expression}")
+        try:
+            parsed = [_parse_cron_field(text, low, high) for text, (low, high) in zip(fields, _CRON_FIELDS)]
+        except ValueError as e:
+            raise ValueError(f"cron表达式不正确: {expression}（{e}）")
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        # 与cron一致：日和星期都有限制时，满足其一即可；以*开头的字段（如*/2）不算限制
+        self._day_restricted = not fields[2].startswith('*')
+        self._weekday_restricted = not fields[4].startswith('*')
+
+    def matches(self, moment):
+        """
+        判断某一分钟是否符合计划
+
+        Args:
+            moment: datetime对象
+
+        Returns:
+            bool: 符合时为True
+        """
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def due(self, since, now):
+        """
+        判断 (since, now] 区间内是否有符合计划的时刻
+
+        Args:
+            since: 上次检查的时间
+            now: 本次检查的时间
+
+        Returns:
+            bool: 区间内有符合计划的分钟时为True
+        """
+        moment = since.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        while moment <= now:
+            if self.matches(moment):
+                return True
+            moment += timedelta(minutes=1)
+        return False
+
+
+class FolderWatcher:
+    """投放目录预生成服务"""
+
+    def __init__(self, folder, template_path, output_dir, password=None, schedule=None,
+                 interval=DEFAULT_INTERVAL, settle_seconds=DEFAULT_SETTLE_SECONDS, cache=None):
+        """
+        Args:
+            folder: 投放目录
+            template_path: Word模板路径
+            output_dir: 报告输出目录
+            password: Excel密码
+            schedule: CronSchedule对象，按计划对目录中的全部文件重新生成，为空则只处理变化的文件
+            interval: 轮询间隔（秒）
+            settle_seconds: 文件最后修改后至少经过的秒数
+            cache: ResultCache对象，默认为 result_cache 的默认缓存
+        """
+        self.folder = folder
+        self.template_path = template_path
+        self.output_dir = output_dir
+        self.password = password
+        self.schedule = schedule
+        self.interval = interval
+        self.settle_seconds = settle_seconds
+        self.cache = cache or ResultCache()
+        self._seen = {}  # {路径: (大小, 修改时间, 内容摘要)}
+        self._last_check = None
+
+    def workbooks(self):
+        """投放目录中的Excel文件（忽略Excel打开文件时生成的 ~$ 临时文件）"""
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(
+            os.path.join(self.folder, name) for name in os.listdir(self.folder)
+            if name.endswith(EXCEL_EXTENSIONS) and not name.startswith('~$')
+        )
+
+    def changed_workbooks(self, now=None):
+        """
+        找出新增或内容变化的文件
+
+        大小和修改时间未变的文件不读取内容；变化后再比较摘要，只是被重新保存的文件不会重复生成
+
+        Args:
+            now: 当前时间戳，默认为 time.time()
+
+        Returns:
+            list: 需要生成报告的文件路径
+        """
+        now = now or time.time()
+        changed = []
+        for path in self.workbooks():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            seen = self._seen.get(path)
+            if seen and seen[:2] == (stat.st_size, stat.st_mtime):
+                continue
+            if now - stat.st_mtime < self.settle_seconds:
+                continue  # 可能仍在保存，下次轮询再处理
+
+            digest = file_digest(path)
+            self._seen[path] = (stat.st_size, stat.st_mtime, digest)
+            if not seen or seen[2] != digest:
+                changed.append(path)
+
+        for path in set(self._seen) - set(self.workbooks()):
+            del self._seen[path]
+        return changed
+
+    def generate(self, excel_path):
+        """
+        为单个文件生成报告（写入结果缓存和输出目录）
+
+        Returns:
+            dict: build_report 返回的处理摘要
+        """
+        output_path = os.path.join(self.output_dir, default_output_name(excel_path))
+        try:
+            summary = build_report(excel_path, self.template_path, output_path,
+                                   password=self.password, cache=self.cache)
+        except Exception as e:
+            summary = {'excel_path': excel_path, 'output_path': None, 'success': False, 'errors': [str(e)]}
+
+        name = os.path.basename(excel_path)
+        if summary['success']:
+            source = "缓存" if summary.get('cached') else "沿用" if summary.get('reused') else "新生成"
+            print(f"✅ {name}: 本周总计 {summary['data']['total_current']} 人（{source}）-> {summary['output_path']}")
+        else:
+            print(f"❌ {name}: {'；'.join(summary['errors'])}")
+        return summary
+
+    def run_once(self, now=None):
+        """
+        执行一次检查：处理变化的文件；计划时间已到时处理全部文件
+
+        Args:
+            now: 当前时间（datetime对象），默认为当前时间
+
+        Returns:
+            list: 本次生成的处理摘要
+        """
+        now = now or datetime.now()
+        pending = self.changed_workbooks(now.timestamp())
+        if self.schedule and self._last_check and self.schedule.due(self._last_check, now):
+            print(f"⏰ 计划任务（{self.schedule.expression}）：重新生成全部报告")
+            pending = self.workbooks()
+        self._last_check = now
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        return [self.generate(path) for path in pending]
+
+    def run(self):
+        """持续轮询，直到进程被中断"""
+        plan = f"，计划: {self.schedule.expression}" if self.schedule else ""
+        print(f"👀 正在监视 {self.folder}（每 {self.interval} 秒检查一次{plan}）")
+        while True:
+            self.run_once()
+            time.sleep(self.interval)
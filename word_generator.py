@@ -2,9 +2,11 @@
 Word文档生成模块
 用于基于模板生成Word报告
 """
-from docx import Document
 from datetime import datetime
 import re
+import metrics
+import profiling
+from atomic_io import atomic_path
 
 
 class WordGenerator:
@@ -19,67 +21,115 @@ class WordGenerator:
         """
         self.template_path = template_path
     
-    def generate(self, data, output_path):
+    def load_template(self):
+        """
+        读取模板（与Excel解析无关，可以提前或并行读取）
+        
+        Returns:
+            Document: 模板文档对象，每次调用返回新的对象
+        """
+        from docx import Document  # 延迟导入，避免模块加载时引入python-docx
+        
+        with metrics.stage('template_load'):
+            return Document(self.template_path)
+    
+    @profiling.profiled('generate')
+    def generate(self, data, output_path, doc=None):
         """
         生成Word文档
         
         Args:
             data: 包含统计数据的字典
             output_path: 输出文件路径
+            doc: 已读取的模板文档对象（见 load_template），为空时读取模板
         
         Returns:
             bool: 是否成功生成
         """
         try:
             # 读取模板
-            doc = Document(self.template_path)
-            
-            # 准备替换数据
-            replacements = {
-                # 基础统计
-                '{{total_count}}': str(data.get('total_current', 0)),
-                '{{sunshine_count}}': str(data.get('sunshine_current', 0)),
-                '{{last_week_sunshine}}': str(data.get('sunshine_last', 0)),
-                '{{sunshine_trend}}': data.get('sunshine_trend', '持平'),
-                '{{gab_count}}': str(data.get('gab_current', 0)),
-                '{{last_week_gab}}': str(data.get('gab_last', 0)),
-                '{{gab_trend}}': data.get('gab_trend', '持平'),
-                
-                # 人员信息
-                '{{sunshine_persons}}': data.get('sunshine_persons_text', ''),
-                '{{gab_persons}}': data.get('gab_persons_text', ''),
-                
-                # 统计分析
-                '{{area_stats}}': data.get('area_stats_text', ''),
-                '{{group_appeal}}': data.get('group_appeal_text', '无'),
-                '{{travel_road_count}}': str(data.get('travel_road_count', 0)),
-                '{{travel_stats}}': data.get('travel_stats_text', '无'),
-            }
-            
-            # 遍历所有段落，替换占位符
-            for paragraph in doc.paragraphs:
-                for placeholder, value in replacements.items():
-                    if placeholder in paragraph.text:
-                        # 替换段落中的占位符
-                        self._replace_text_in_paragraph(paragraph, placeholder, value)
+            if doc is None:
+                doc = self.load_template()
             
-            # 遍历所有表格中的文本
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            for placeholder, value in replacements.items():
-                                if placeholder in paragraph.text:
-                                    self._replace_text_in_paragraph(paragraph, placeholder, value)
+            # 填充占位符
+            with metrics.stage('render'):
+                self._render(doc, data)
             
-            # 保存文档
-            doc.save(output_path)
+            # 保存文档（先写临时文件再重命名，正在预览或下载的读取方不会读到不完整的文件）
+            with metrics.stage('save'), atomic_path(output_path) as tmp_path:
+                doc.save(tmp_path)
             return True
             
         except Exception as e:
             print(f"生成Word文档失败: {e}")
             return False
     
+    def _render(self, doc, data):
+        """
+        将统计数据填充到文档的占位符中
+        
+        Args:
+            doc: 模板文档对象
+            data: 包含统计数据的字典
+        """
+        # 准备替换数据
+        replacements = {
+            # 基础统计
+            '{{total_count}}': str(data.get('total_current', 0)),
+            '{{total_last_year}}': str(data.get('total_last_year', 0)),
+            '{{total_yoy_trend}}': data.get('total_yoy_trend', '无去年同期数据'),
+        }
+        
+        # 各登记来源的统计和人员信息，如 {{sunshine_count}}、{{last_week_gab}}
+        for prefix in self._source_prefixes(data):
+            replacements.update({
+                '{{%s_count}}' % prefix: str(data.get(f'{prefix}_current', 0)),
+                '{{last_week_%s}}' % prefix: str(data.get(f'{prefix}_last', 0)),
+                '{{%s_trend}}' % prefix: data.get(f'{prefix}_trend', '持平'),
+                '{{%s_persons}}' % prefix: data.get(f'{prefix}_persons_text', ''),
+                '{{last_year_%s}}' % prefix: str(data.get(f'{prefix}_last_year', 0)),
+                '{{%s_yoy_trend}}' % prefix: data.get(f'{prefix}_yoy_trend', '无去年同期数据'),
+            })
+        
+        replacements.update({
+            # 统计分析
+            '{{area_stats}}': data.get('area_stats_text', ''),
+            '{{group_appeal}}': data.get('group_appeal_text', '无'),
+            '{{travel_road_count}}': str(data.get('travel_road_count', 0)),
+            '{{travel_stats}}': data.get('travel_stats_text', '无'),
+            
+            # 重复来访
+            '{{repeat_visitor_count}}': str(data.get('repeat_visitor_count', 0)),
+            '{{repeat_visitors}}': data.get('repeat_visitors_text', '') or '无',
+            '{{top_repeat_visitors}}': data.get('top_repeat_visitors_text', '') or '无',
+            '{{repeat_window_weeks}}': str(data.get('repeat_window_weeks', '')),
+        })
+        
+        # 遍历所有段落，替换占位符
+        for paragraph in doc.paragraphs:
+            for placeholder, value in replacements.items():
+                if placeholder in paragraph.text:
+                    # 替换段落中的占位符
+                    self._replace_text_in_paragraph(paragraph, placeholder, value)
+        
+        # 遍历所有表格中的文本
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    for paragraph in cell.paragraphs:
+                        for placeholder, value in replacements.items():
+                            if placeholder in paragraph.text:
+                                self._replace_text_in_paragraph(paragraph, placeholder, value)
+    
+    @staticmethod
+    def _source_prefixes(data):
+        """统计数据中的登记来源前缀；旧格式数据没有来源列表时使用内置来源"""
+        sources = data.get('sources')
+        if sources is None:
+            from source_schema import DEFAULT_SOURCES
+            sources = DEFAULT_SOURCES
+        return [source['prefix'] for source in sources]
+    
     def _replace_text_in_paragraph(self, paragraph, placeholder, value):
         """
         在段落中替换占位符，完整保留格式（字体、缩进等）
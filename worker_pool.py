@@ -0,0 +1,118 @@
+"""
+多进程生成模块
+Web界面的页面和排队由主进程处理，报告生成（解密、解析、渲染）交给预先启动的工作进程，
+吞吐量随容器CPU核数增加；各进程通过共享目录中的结果缓存（带文件锁）复用结果，
+多个进程同时请求同一份报告时只生成一次
+
+环境变量:
+    REPORTGENE_WORKERS: 工作进程数；1（默认）在主进程中生成，0表示与CPU核数相同
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+import profiling
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configured_workers(value=None):
+    """
+    解析工作进程数配置
+
+    Args:
+        value: 配置值，默认为环境变量 REPORTGENE_WORKERS
+
+    Returns:
+        int: 工作进程数（至少为1）
+    """
+    value = os.environ.get("REPORTGENE_WORKERS", "1") if value is None else value
+    workers = int(value)
+    return max(1, os.cpu_count() or 1) if workers == 0 else max(1, workers)
+
+
+def _warm_up():
+    """工作进程初始化：提前导入解析和生成所需的库，首个请求不再等待导入"""
+    import docx  # noqa: F401
+    import msoffcrypto  # noqa: F401
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    import xlrd  # noqa: F401
+
+
+def _ping():
+    """空任务（用于提前创建工作进程）"""
+
+
+def start(workers=None):
+    """
+    启动工作进程池（进程数为1时不启动，在主进程中生成）
+
+    进程以spawn方式创建（主进程中已有Gradio和指标服务的线程，不适合fork），
+    启动时即创建全部进程并完成预热
+
+    Args:
+        workers: 工作进程数，默认读取 REPORTGENE_WORKERS
+
+    Returns:
+        int: 实际的工作进程数（1表示未启用多进程）
+    """
+    global _pool
+    workers = configured_workers(workers)
+    if workers <= 1:
+        return 1
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_warm_up,
+            )
+            # 提交与进程数相同的空任务，等待全部进程创建并完成预热
+            for future in [_pool.submit(_ping) for _ in range(workers)]:
+                future.result()
+            print(f"⚙️ 已启动 {workers} 个工作进程")
+    return workers
+
+
+def shutdown():
+    """关闭工作进程池"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def _call(func, args, kwargs):
+    """在工作进程中执行，同时收集阶段耗时和计数"""
+    with metrics.collect() as collected:
+        result = func(*args, **kwargs)
+    return result, collected
+
+
+def run(func, *args, **kwargs):
+    """
+    在工作进程中执行函数并等待结果
+
+    未启动进程池或当前请求开启了性能分析（分析只能在本进程进行）时，直接在当前进程执行；
+    工作进程中的阶段耗时和计数会合并到当前请求的指标中
+
+    Args:
+        func: 模块级函数（需能被pickle）
+        *args, **kwargs: 函数参数
+
+    Returns:
+        函数的返回值
+    """
+    pool = _pool
+    if pool is None or profiling.is_active():
+        return func(*args, **kwargs)
+
+    result, collected = pool.submit(_call, func, args, kwargs).result()
+    metrics.merge(collected)
+    return result